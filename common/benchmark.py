@@ -1,61 +1,316 @@
-import requests
+import argparse
+import asyncio
+import json
+import random
 import time
+from contextlib import asynccontextmanager
+from urllib.parse import quote
 
+import httpx
 
-def measure_response_time(base_url: str, num_requests: int, title: str = ""):
+from data_fetcher.throttling import TokenBucket
+
+# Operations of a load mix, and the mix used by default. Additions and deletions change
+# the catalog of the target database, so they are only sent on demand (`--writes`)
+OPERATIONS = ("movies", "movie", "add", "delete")
+WRITE_OPERATIONS = ("add", "delete")
+DEFAULT_MIX = "movies=60,movie=35"
+WRITE_MIX = "movies=60,movie=35,add=4,delete=1"
+
+# API key of the DELETE requests (see movies_service/api/api.py)
+API_KEY = "Movies_API_KEY_number_1"
+
+
+def parse_mix(mix):
     """
-    Measure the average response time for making requests to the FastAPI endpoints.
+    Parse a load mix.
 
     Parameters:
-    - `base_url` (str): The base URL of the FastAPI application.
-    - `num_requests` (int): The number of requests to send.
-    - `title` (str, optional): The title of the movie for the `/movie/{title}` endpoint.
+    - `mix` (str): Comma-separated `operation=weight` pairs (e.g. "movies=70,movie=30").
+      The operations are `movies` (GET /movies), `movie` (GET /movie/{title}), `add`
+      (POST /movie/{title}) and `delete` (DELETE /movie/{imdb_id}).
 
     Returns:
-    - dict: A dictionary containing the average response times for the endpoints.
-
-    """
-    # Define the endpoint URLs
-    movies_url = f"{base_url}/movies"
-    movie_url = f"{base_url}/movie/{title}"
-
-    # Measure the response time for the /movies endpoint
-    start_time = time.time()
-    for _ in range(num_requests):
-        response = requests.get(movies_url)
-    end_time = time.time()
-    avg_movies_response_time = (end_time - start_time) / num_requests
-
-    # Measure the response time for the /movie/{title} endpoint
-    if title:
-        start_time = time.time()
-        for _ in range(num_requests):
-            response = requests.get(movie_url)
-        end_time = time.time()
-        avg_movie_response_time = (end_time - start_time) / num_requests
-    else:
-        avg_movie_response_time = None
+    - dict: The weight of each operation.
+
+    Raises:
+    - ValueError: If an operation is unknown or a weight is not a positive number.
+    """
+    weights = {}
+    for pair in mix.split(","):
+        operation, _, weight = pair.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        weights[operation] = float(weight or 1)
+        if weights[operation] <= 0:
+            raise ValueError(f"The weight of {operation} must be positive")
+    return weights
+
+
+def percentile(latencies, percent):
+    """
+    Get a percentile of sorted latencies, with the nearest-rank method.
+
+    Parameters:
+    - `latencies` (list): The latencies, sorted in ascending order.
+    - `percent` (float): The percentile, between 0 and 100.
+
+    Returns:
+    - float: The percentile, or None if there are no latencies.
+    """
+    if not latencies:
+        return None
+    rank = max(int(-(-percent * len(latencies) // 100)), 1)
+    return latencies[rank - 1]
+
+
+def summarize(results, wall_time):
+    """
+    Summarize the results of a set of requests.
 
+    Parameters:
+    - `results` (list): The (latency in seconds, status code or None) of each request.
+      The status is None for requests failing without a response.
+    - `wall_time` (float): The duration of the benchmark, in seconds.
+
+    Returns:
+    - dict: The number of requests, the number of errors (no response or 5xx), the
+      number of responses per status code, the throughput in requests per second and
+      the mean, p50, p95, p99 and max latencies in milliseconds.
+    """
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
     return {
-        "avg_movies_response_time": avg_movies_response_time,
-        "avg_movie_response_time": avg_movie_response_time,
+        "requests": len(results),
+        "errors": sum(1 for _, status in results if status is None or status >= 500),
+        "statuses": statuses,
+        "throughput": len(results) / wall_time if wall_time else None,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
     }
 
 
-# Define the base URL of your FastAPI application
-base_url = "http://127.0.0.1:8000"
+async def discover_catalog(client, limit=100):
+    """
+    Get movies of the service, used as targets of the requests.
+
+    Parameters:
+    - `client` (httpx.AsyncClient): The client of the service.
+    - `limit` (int): The maximum number of movies.
+
+    Returns:
+    - list: The (title, IMDb ID) of the movies, empty if the database is empty.
+    """
+    response = await client.get(
+        "/movies", params={"limit": limit, "fields": "Title,imdbID"}
+    )
+    if response.status_code == 404:
+        # The database is empty
+        return []
+    response.raise_for_status()
+    return [(movie["Title"], movie["imdbID"]) for movie in response.json()]
+
+
+async def run_load(
+    client, mix=DEFAULT_MIX, requests=1000, concurrency=10, rate=None, seed=None
+):
+    """
+    Send a mix of requests to the service and measure their latencies.
+
+    `concurrency` workers send the requests, each waiting for its response before
+    sending the next one. With a `rate`, the requests are also spaced by a token bucket.
+    The titles and IMDb IDs are taken from the first page of /movies. Each movie is
+    deleted once, so deletions beyond the catalog size are answered with 404.
+
+    Parameters:
+    - `client` (httpx.AsyncClient): The client of the service.
+    - `mix` (str): The load mix (see `parse_mix`).
+    - `requests` (int): The number of requests sent.
+    - `concurrency` (int): The number of requests in flight.
+    - `rate` (float, optional): The maximum number of requests sent per second.
+    - `seed` (int, optional): The seed of the random choices, to repeat a run.
+
+    Returns:
+    - dict: The settings of the run and the summary of each operation and of all the
+      requests (see `summarize`).
+    """
+    weights = parse_mix(mix)
+    generator = random.Random(seed)
+    operations = iter(
+        generator.choices(list(weights), list(weights.values()), k=requests)
+    )
+    catalog = await discover_catalog(client)
+    titles = [title for title, _ in catalog] or ["Disney"]
+    deletable = [imdb_id for _, imdb_id in catalog]
+    bucket = TokenBucket(rate, 1) if rate else None
+    results = {operation: [] for operation in weights}
+
+    def request(operation):
+        if operation == "movies":
+            page = generator.randint(1, 10)
+            return client.get("/movies", params={"page": page})
+        if operation == "movie":
+            return client.get(f"/movie/{quote(generator.choice(titles), safe='')}")
+        if operation == "add":
+            return client.post(f"/movie/{quote(generator.choice(titles), safe='')}")
+        imdb_id = deletable.pop() if deletable else "tt0000000"
+        return client.delete(f"/movie/{imdb_id}", headers={"Authorization": API_KEY})
+
+    async def worker():
+        # Workers share the operations, so at most one request per worker is in flight
+        for operation in operations:
+            if bucket:
+                await bucket.acquire()
+            start = time.perf_counter()
+            try:
+                status = (await request(operation)).status_code
+            except httpx.HTTPError:
+                status = None
+            results[operation].append((time.perf_counter() - start, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - start
+
+    return {
+        "mix": weights,
+        "requests": requests,
+        "concurrency": concurrency,
+        "rate": rate,
+        "wall_time": wall_time,
+        "operations": {
+            operation: summarize(operation_results, wall_time)
+            for operation, operation_results in results.items()
+        },
+        "all": summarize(sum(results.values(), []), wall_time),
+    }
+
+
+@asynccontextmanager
+async def in_process_client():
+    """
+    Get a client sending the requests to the ASGI app directly, without a socket.
+
+    The lifespan of the app is run, so it uses the database of alembic.ini: write
+    operations change its catalog.
+
+    Yields:
+    - httpx.AsyncClient: The client of the app.
+    """
+    # Imported here, so benchmarking a remote service does not load the app
+    from movies_service.app import app
+
+    async with app.router.lifespan_context(app):
+        # Errors of the app are measured as 500 responses
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://movies-service"
+        ) as client:
+            yield client
+
+
+async def benchmark(base_url=None, **options):
+    """
+    Run a load benchmark against a running service, or in process.
+
+    Parameters:
+    - `base_url` (str, optional): The base URL of the service. Defaults to None, to
+      run the app in process (see `in_process_client`).
+    - `**options`: The options of the load (see `run_load`).
+
+    Returns:
+    - dict: The results of `run_load`.
+    """
+    if base_url is None:
+        async with in_process_client() as client:
+            return await run_load(client, **options)
+    limits = httpx.Limits(max_connections=options.get("concurrency", 10))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        return await run_load(client, **options)
+
+
+def main(arguments=None):
+    """
+    Run the load benchmark from the command line.
+
+    Usage:
+        python -m common.benchmark --url http://127.0.0.1:8000 --concurrency 50
+        python -m common.benchmark --in-process --mix movies=1 --json > run.json
+        python -m common.benchmark --url http://127.0.0.1:8000 --writes
+
+    Parameters:
+    - `arguments` (list, optional): The command line arguments. Defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(description="Load benchmark of the Movies API.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:8000")
+    target.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run the app in process, without a socket.",
+    )
+    parser.add_argument(
+        "--mix",
+        help=f"Load mix. Defaults to {DEFAULT_MIX} ({WRITE_MIX} with --writes).",
+    )
+    parser.add_argument(
+        "--writes",
+        action="store_true",
+        help="Allow POST and DELETE requests, which change the database catalog.",
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rate", type=float, help="Maximum requests per second.")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON."
+    )
+    arguments = parser.parse_args(arguments)
+    mix = arguments.mix or (WRITE_MIX if arguments.writes else DEFAULT_MIX)
+    try:
+        weights = parse_mix(mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if not arguments.writes and any(
+        operation in weights for operation in WRITE_OPERATIONS
+    ):
+        parser.error("add and delete change the catalog of the database, use --writes")
+
+    results = asyncio.run(
+        benchmark(
+            None if arguments.in_process else arguments.url,
+            mix=mix,
+            requests=arguments.requests,
+            concurrency=arguments.concurrency,
+            rate=arguments.rate,
+            seed=arguments.seed,
+        )
+    )
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+        return
 
-# Define the number of requests to send
-num_requests = 100
+    print(
+        f"{results['requests']} requests, concurrency {results['concurrency']}, "
+        f"{results['wall_time']:.2f} s"
+    )
+    summaries = dict(results["operations"], all=results["all"])
+    for operation, summary in summaries.items():
+        if not summary["requests"]:
+            continue
+        print(
+            f"{operation: <7} {summary['requests']: >6} requests "
+            f"{summary['errors']: >4} errors {summary['throughput']: >8.1f} req/s  "
+            f"p50 {summary['p50_ms']:7.2f}  p95 {summary['p95_ms']:7.2f}  "
+            f"p99 {summary['p99_ms']:7.2f}  max {summary['max_ms']:7.2f} ms"
+        )
 
-# Define the title of the movie to check
-title = "The Wonderful World of Disney: 40 Years of Television Magic"
 
-# Measure the response time for the endpoints
-response_times = measure_response_time(base_url, num_requests, title)
-print(
-    f"Avg. response time for /movies: {response_times['avg_movies_response_time']} seconds"
-)
-print(
-    f"Avg. response time for /movie/{title}: {response_times['avg_movie_response_time']} seconds"
-)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from aiohttp import web
+
+from common import utils
+from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_fetcher.omdb_stub import OmdbStub
+from data_layer.engine_registry import engine_registry
+from data_layer.movie_count import movie_counts
+from data_layer.title_index import title_indexes
+
+
+def write_benchmark_config(directory, url, rate, workers):
+    """
+    Write the fetcher and Alembic configurations of a benchmark run.
+
+    The fetcher configuration of the project is used, sending the requests to the stub
+    without response cache and fetch deadline, and saving the movies to a new SQLite
+    database.
+
+    Parameters:
+    - `directory` (str): The directory the files are written to.
+    - `url` (str): The URL of the OMDB API stub.
+    - `rate` (float): The number of requests sent per second by the fetcher.
+    - `workers` (int): The number of fetch workers of the fetcher.
+
+    Returns:
+    - tuple: The paths of the fetcher and Alembic configuration files.
+    """
+    config = utils.load_config("data_fetcher/fetcher_config.json")
+    config["url"] = url
+    config["fetch_timeout"] = None
+    config.pop("response_cache", None)
+    config["rate_limit"] = {"rate": rate, "capacity": rate}
+    config["ingest"] = dict(config.get("ingest", {}), workers=workers)
+    config_file_path = os.path.join(directory, "fetcher_config.json")
+    with open(config_file_path, "w") as file:
+        json.dump(config, file)
+
+    alembic_config = os.path.join(directory, "alembic.ini")
+    database = os.path.join(directory, "movies.db")
+    with open(alembic_config, "w") as file:
+        file.write(f"[alembic]\nsqlalchemy.url = sqlite:///{database}\n")
+    return config_file_path, alembic_config
+
+
+async def measure_fetcher(
+    movies, latency=0.02, error_rate=0.0, rate_limit=None, rate=1000, workers=10
+):
+    """
+    Measure `fetch_and_save_movies_data` against a local OMDB API stub.
+
+    Parameters:
+    - `movies` (int): The number of movies fetched and saved.
+    - `latency` (float): The latency of the stub, in seconds.
+    - `error_rate` (float): The share of requests failed by the stub.
+    - `rate_limit` (int, optional): The number of requests accepted per second by the
+      stub.
+    - `rate` (float): The number of requests sent per second by the fetcher.
+    - `workers` (int): The number of fetch workers of the fetcher.
+
+    Returns:
+    - dict: The number of movies saved, the wall time in seconds, the number of
+      requests received by the stub, the requests per second and the number of
+      requests rejected or failed by the stub.
+    """
+    stub = OmdbStub(movies, latency, error_rate, rate_limit, seed=0)
+    runner = web.AppRunner(stub.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            fetcher = MovieDataFetcher(
+                *write_benchmark_config(
+                    directory, f"http://127.0.0.1:{port}/", rate, workers
+                )
+            )
+            await fetcher.open()
+            try:
+                start = time.perf_counter()
+                titles = await fetcher.fetch_and_save_movies_data(
+                    "Movie", limit=movies
+                )
+                wall_time = time.perf_counter() - start
+            finally:
+                await fetcher.close()
+                # The temporary database is forgotten, so runs do not pile up state
+                await engine_registry.dispose_async(fetcher.database_url)
+                movie_counts.clear(fetcher.database_url)
+                title_indexes.clear(fetcher.database_url)
+    finally:
+        await runner.cleanup()
+
+    return {
+        "movies": len([title for title in titles or [] if title]),
+        "wall_time": wall_time,
+        "requests": stub.requests,
+        "requests_per_second": stub.requests / wall_time,
+        "rejected": stub.rejected,
+        "failed": stub.failed,
+    }
+
+
+def main(arguments=None):
+    """
+    Run the fetcher benchmark from the command line.
+
+    Usage:
+        python -m common.fetcher_benchmark --sizes 100 1000 10000 --latency 0.02
+
+    Parameters:
+    - `arguments` (list, optional): The command line arguments. Defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measure the movie data fetcher against a local OMDB API stub."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int)
+    parser.add_argument("--rate", type=float, default=1000)
+    parser.add_argument("--workers", type=int, default=10)
+    arguments = parser.parse_args(arguments)
+
+    for size in arguments.sizes:
+        result = asyncio.run(
+            measure_fetcher(
+                size,
+                arguments.latency,
+                arguments.error_rate,
+                arguments.rate_limit,
+                arguments.rate,
+                arguments.workers,
+            )
+        )
+        print(
+            f"{size: >6} titles: {result['movies']: >6} saved in "
+            f"{result['wall_time']:7.2f} s, {result['requests']: >6} requests, "
+            f"{result['requests_per_second']:7.1f} requests/s, "
+            f"{result['rejected']} rejected, {result['failed']} failed"
+        )
+
+
+if __name__ == "__main__":
+    main()
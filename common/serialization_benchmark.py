@@ -0,0 +1,95 @@
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.responses import Response
+
+from data_layer.models import MovieModel
+
+# A movie as returned by the OMDB API
+SAMPLE_MOVIE = MovieModel(
+    imdb_id="tt0362300",
+    title="Ultimate Fan's Guide to Walt Disney World",
+    year="2004",
+    rated="N/A",
+    released="N/A",
+    runtime="56 min",
+    genre="N/A",
+    director="N/A",
+    writer="Jamie Iracleanos",
+    actors="David Lloyd, Bethany Lloyd, Stephen Lloyd",
+    plot="Follow four groups of fans as they share their tips on the best ways to visit "
+    "the Walt Disney World Resort. A family with young children, another family with "
+    "teenagers, a newlywed couple, and finally a group of young adult friends share "
+    "with you their secrets for a successful vacation!",
+    language="English",
+    country="United States",
+    awards="N/A",
+    poster="https://m.media-amazon.com/images/M/MV5BMTQyMzY5Mjg5NV5BMl5BanBnXkFtZTgwMzI5OTk1MDE@._V1_SX300.jpg",
+    ratings=[{"Source": "Internet Movie Database", "Value": "8.6/10"}],
+    metascore="N/A",
+    imdb_rating="8.6",
+    imdb_votes="32",
+    type="movie",
+    dvd="N/A",
+    box_office="N/A",
+    production="N/A",
+    website="N/A",
+)
+
+
+def measure(render, number):
+    """
+    Measure the average time taken by a response rendering function.
+
+    Parameters:
+    - `render` (callable): The function building the response body.
+    - `number` (int): The number of times the function is called.
+
+    Returns:
+    - float: The average time per call, in microseconds.
+    """
+    return timeit.timeit(render, number=number) / number * 1_000_000
+
+
+def measure_serialization(number=20_000, page_size=10):
+    """
+    Compare the cost of rendering movie responses with the different serialization paths.
+
+    - `json`: FastAPI's default path (jsonable_encoder + JSONResponse with stdlib json).
+    - `orjson`: jsonable_encoder + ORJSONResponse, the default response class of the app.
+    - `direct`: ORJSONResponse returned by the handler, skipping jsonable_encoder.
+    - `stored`: The JSON document stored on insert, sent as it is by /movie/{title}.
+
+    Parameters:
+    - `number` (int): The number of responses rendered for each path.
+    - `page_size` (int): The number of movies of a /movies page.
+
+    Returns:
+    - dict: The average time per response, in microseconds, for each endpoint and path.
+    """
+    movie = SAMPLE_MOVIE.to_dict()
+    page = [movie] * page_size
+    json_blob = SAMPLE_MOVIE.to_json()
+
+    return {
+        "/movie/{title}": {
+            "json": measure(lambda: JSONResponse(jsonable_encoder(movie)), number),
+            "orjson": measure(lambda: ORJSONResponse(jsonable_encoder(movie)), number),
+            "direct": measure(lambda: ORJSONResponse(movie), number),
+            "stored": measure(
+                lambda: Response(json_blob, media_type="application/json"), number
+            ),
+        },
+        "/movies": {
+            "json": measure(lambda: JSONResponse(jsonable_encoder(page)), number),
+            "orjson": measure(lambda: ORJSONResponse(jsonable_encoder(page)), number),
+            "direct": measure(lambda: ORJSONResponse(page), number),
+        },
+    }
+
+
+if __name__ == "__main__":
+    for endpoint, timings in measure_serialization().items():
+        for path, microseconds in timings.items():
+            print(f"{endpoint: <16} {path: <8} {microseconds:8.2f} us/response")
@@ -0,0 +1,94 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI, HTTPException
+from common.benchmark import DEFAULT_MIX, WRITE_MIX, main, parse_mix, percentile
+from common.benchmark import run_load, summarize
+
+
+def test_parse_mix():
+    assert parse_mix("movies=70, movie=30") == {"movies": 70, "movie": 30}
+    assert parse_mix("delete") == {"delete": 1}
+
+    with pytest.raises(ValueError):
+        parse_mix("search=1")
+    with pytest.raises(ValueError):
+        parse_mix("movies=0")
+
+
+def test_percentile():
+    latencies = list(range(1, 101))
+
+    assert percentile(latencies, 50) == 50
+    assert percentile(latencies, 99) == 99
+    assert percentile(latencies, 100) == 100
+    assert percentile([5], 95) == 5
+    assert percentile([], 50) is None
+
+
+def test_summarize():
+    summary = summarize([(0.001, 200), (0.003, 200), (0.002, 503), (0.004, None)], 2)
+
+    assert summary["requests"] == 4
+    assert summary["errors"] == 2
+    assert summary["statuses"] == {"200": 2, "503": 1, "None": 1}
+    assert summary["throughput"] == 2
+    assert summary["p50_ms"] == pytest.approx(2)
+    assert summary["max_ms"] == pytest.approx(4)
+
+
+@pytest.mark.asyncio
+async def test_run_load_in_process():
+    app = FastAPI()
+    movies = {"tt0000001": "Movie 1", "tt0000002": "Movie 2"}
+
+    @app.get("/movies")
+    async def get_movies(fields: str = None):
+        return [
+            {"Title": title, "imdbID": imdb_id} for imdb_id, title in movies.items()
+        ]
+
+    @app.get("/movie/{title}")
+    async def get_movie(title: str):
+        return {"Title": title}
+
+    @app.post("/movie/{title}")
+    async def add_movie(title: str):
+        return {"detail": f"{title} already exists in the database"}
+
+    @app.delete("/movie/{imdb_id}")
+    async def delete_movie(imdb_id: str):
+        if movies.pop(imdb_id, None) is None:
+            raise HTTPException(status_code=404)
+        return {"detail": "deleted"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        results = await run_load(
+            client, "movies=1,movie=1,add=1,delete=1", 40, concurrency=4, seed=1
+        )
+
+    assert results["all"]["requests"] == 40
+    assert results["all"]["errors"] == 0
+    assert sum(summary["requests"] for summary in results["operations"].values()) == 40
+    # Each movie is deleted once
+    assert results["operations"]["delete"]["statuses"]["200"] == 2
+    assert results["all"]["p99_ms"] <= results["all"]["max_ms"]
+
+
+def test_main_sends_writes_only_when_asked():
+    # Additions and deletions change the catalog of the database
+    assert "add" not in parse_mix(DEFAULT_MIX)
+    with pytest.raises(SystemExit):
+        main(["--in-process", "--mix", "movies=1,delete=1"])
+
+    with patch("common.benchmark.benchmark", AsyncMock(return_value={})) as run:
+        main(["--in-process", "--json"])
+        main(["--in-process", "--writes", "--json"])
+        main(["--in-process", "--writes", "--mix", "add=1", "--json"])
+
+    assert [call.kwargs["mix"] for call in run.await_args_list] == [
+        DEFAULT_MIX,
+        WRITE_MIX,
+        "add=1",
+    ]
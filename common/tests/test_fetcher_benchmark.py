@@ -0,0 +1,24 @@
+import pytest
+from common.fetcher_benchmark import measure_fetcher
+from data_layer.engine_registry import engine_registry
+from data_layer.movie_count import movie_counts
+from data_layer.title_index import title_indexes
+
+
+@pytest.mark.asyncio
+async def test_measure_fetcher():
+    engines = set(engine_registry.engines)
+    counts = set(movie_counts.counts)
+    indexes = set(title_indexes.indexes)
+
+    result = await measure_fetcher(25, latency=0)
+
+    assert result["movies"] == 25
+    # 3 search pages and 25 movies
+    assert result["requests"] == 28
+    assert result["requests_per_second"] > 0
+    assert result["rejected"] == result["failed"] == 0
+    # The temporary database is removed from the registries
+    assert set(engine_registry.engines) == engines
+    assert set(movie_counts.counts) == counts
+    assert set(title_indexes.indexes) == indexes
@@ -58,3 +58,53 @@ def test_load_valid_config():
 
         # Check if the result matches the expected configuration data
         assert result == json.loads(config_data)
+
+
+def test_get_engine_options_from_alembic_config(tmp_path):
+    # Create a temporary Alembic configuration file with pool options
+    alembic_config_file = tmp_path / "alembic.ini"
+    with open(alembic_config_file, "w") as f:
+        f.write(
+            "[alembic]\nsqlalchemy.url = sqlite:///test.db\n\n"
+            "[engine]\npool_size = 20\nmax_overflow = 5\n"
+            "pool_pre_ping = false\npool_recycle = 300\n"
+        )
+
+    options = utils.get_engine_options_from_alembic_config(alembic_config_file)
+
+    assert options == {
+        "pool_size": 20,
+        "max_overflow": 5,
+        "pool_pre_ping": False,
+        "pool_recycle": 300,
+    }
+
+
+def test_get_engine_options_from_alembic_config_missing_section(tmp_path):
+    # Create a temporary Alembic configuration file without the [engine] section
+    alembic_config_file = tmp_path / "alembic.ini"
+    with open(alembic_config_file, "w") as f:
+        f.write("[alembic]\nsqlalchemy.url = sqlite:///test.db\n")
+
+    assert utils.get_engine_options_from_alembic_config(alembic_config_file) == {}
+
+
+def test_get_snapshot_path_from_alembic_config(tmp_path):
+    alembic_config_file = tmp_path / "alembic.ini"
+    with open(alembic_config_file, "w") as f:
+        f.write(
+            "[alembic]\nsqlalchemy.url = sqlite:///test.db\n\n"
+            "[seed]\nsnapshot = movies_snapshot.jsonl.gz\n"
+        )
+
+    path = utils.get_snapshot_path_from_alembic_config(alembic_config_file)
+
+    assert path == "movies_snapshot.jsonl.gz"
+
+
+def test_get_snapshot_path_from_alembic_config_missing_section(tmp_path):
+    alembic_config_file = tmp_path / "alembic.ini"
+    with open(alembic_config_file, "w") as f:
+        f.write("[alembic]\nsqlalchemy.url = sqlite:///test.db\n")
+
+    assert utils.get_snapshot_path_from_alembic_config(alembic_config_file) is None
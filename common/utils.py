@@ -33,3 +33,44 @@ def load_config(config_file_path="config.json"):
     """
     with open(config_file_path, "r") as file:
         return json.load(file)
+
+
+def get_engine_options_from_alembic_config(alembic_config="alembic.ini"):
+    """
+    Get the connection pool options from the [engine] section of the Alembic configuration.
+
+    Args:
+        alembic_config (str): The path to the Alembic configuration file.
+
+    Returns:
+        dict: The pool options found in the file (pool_size, max_overflow,
+            pool_pre_ping and pool_recycle). Missing options are left out.
+    """
+    alembic_cfg = Config(alembic_config)
+    section = alembic_cfg.get_section("engine", {})
+    options = {}
+    for key in ("pool_size", "max_overflow", "pool_recycle"):
+        if key in section:
+            options[key] = int(section[key])
+    if "pool_pre_ping" in section:
+        options["pool_pre_ping"] = section["pool_pre_ping"].strip().lower() in (
+            "true",
+            "1",
+            "yes",
+            "on",
+        )
+    return options
+
+
+def get_snapshot_path_from_alembic_config(alembic_config="alembic.ini"):
+    """
+    Get the path of the catalog snapshot loaded into an empty database on startup.
+
+    Args:
+        alembic_config (str): The path to the Alembic configuration file.
+
+    Returns:
+        str or None: The `snapshot` option of the [seed] section, or None if it is not set.
+    """
+    alembic_cfg = Config(alembic_config)
+    return alembic_cfg.get_section("seed", {}).get("snapshot") or None
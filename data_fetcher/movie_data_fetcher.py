@@ -1,14 +1,27 @@
 import aiohttp
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 
-from sqlalchemy import create_engine
+from data_fetcher.response_cache import ResponseCache
+from data_fetcher.retrying import RetryPolicy, TransientResponseError
+from data_fetcher.throttling import OVERLOAD_STATUSES, RequestThrottle
+from data_layer.engine_registry import engine_registry
 from data_layer.unit_of_work import UnitOfWork
 from data_layer.movies_repository import MoviesRepository
-from data_layer.models import MovieModel, Base
+from data_layer.models import Base
 from common import utils
 
 
+@asynccontextmanager
+async def no_slot():
+    """
+    Send a request without waiting for a throttle slot (`contextlib.nullcontext` is
+    only an async context manager from Python 3.10).
+    """
+    yield
+
+
 class MovieDataFetcher:
     """
     Class to fetch and save movie data.
@@ -16,6 +29,15 @@ class MovieDataFetcher:
     Attributes:
         config_file_path (str): The path to the configuration file.
         alembic_config (str): The path to the Alembic configuration file.
+        session (aiohttp.ClientSession): The HTTP session shared by the fetches, or None
+            until `open` is called.
+        throttle (RequestThrottle): The rate and concurrency limits of the requests sent
+            to the OMDB API.
+        retry (RetryPolicy): The timeout and retries of the requests sent to the OMDB API.
+        fetch_timeout (float): The maximum duration of a fetch, in seconds, or None.
+            Movies not fetched in time are left out of its results.
+        cache (ResponseCache): The persistent cache of the OMDB API responses, or None
+            if the "response_cache" section of the configuration is missing.
     """
 
     def __init__(
@@ -34,11 +56,214 @@ class MovieDataFetcher:
         """
         self.config = utils.load_config(config_file_path)
         self.database_url = utils.get_database_url_from_alembic_config(alembic_config)
-        self.engine = create_engine(self.database_url)
+        self.engine = engine_registry.get_engine(self.database_url)
         Base.metadata.create_all(self.engine)
+        self.session = None
+        self.throttle = RequestThrottle.from_config(self.config)
+        self.retry = RetryPolicy.from_config(self.config)
+        self.fetch_timeout = self.config.get("fetch_timeout")
+        self.cache = ResponseCache.from_config(self.config)
+
+    def create_session(self):
+        """
+        Create an HTTP session with the connection pool set in the "connector" section
+        of the configuration (connection limits, keep-alive and DNS cache).
+
+        Returns:
+            aiohttp.ClientSession: The new HTTP session.
+        """
+        connector = aiohttp.TCPConnector(**self.config.get("connector", {}))
+        return aiohttp.ClientSession(connector=connector)
+
+    async def open(self):
+        """
+        Open the HTTP session shared by the fetches, so they reuse warm connections.
+        """
+        if self.session is None or self.session.closed:
+            self.session = self.create_session()
+
+    async def close(self):
+        """
+        Close the shared HTTP session and its connections, and the response cache.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.cache is not None:
+            self.cache.close()
+
+    @asynccontextmanager
+    async def client_session(self):
+        """
+        Get the shared HTTP session, or a session closed on exit if it is not open.
+
+        Yields:
+            aiohttp.ClientSession: The HTTP session to fetch with.
+        """
+        if self.session is not None and not self.session.closed:
+            yield self.session
+        else:
+            async with self.create_session() as session:
+                yield session
+
+    @staticmethod
+    async def send(
+        session, url, parameters, headers, throttle=None, retry=None, cache=None
+    ):
+        """
+        Send a GET request to the OMDB API and read its JSON body.
+
+        With a response cache, fresh cached responses are returned without sending the
+        request, and stale ones are revalidated with a conditional request when they
+        have an ETag or Last-Modified header. The cache file is read and written in a
+        worker thread, off the event loop.
+
+        Args:
+            session (aiohttp.ClientSession): The aiohttp session for making HTTP requests.
+            url (str): The URL of the OMDB API.
+            parameters (dict): The parameters for the API request.
+            headers (dict): The headers for the API request.
+            throttle (RequestThrottle, optional): The limits the request waits for. Its
+                concurrency limit is adapted to the response status. Defaults to None.
+            retry (RetryPolicy, optional): The timeout of each attempt and the retries of
+                the request on timeouts, connection errors and 429/5xx responses.
+                Defaults to None (a single attempt without timeout).
+            cache (ResponseCache, optional): The response cache. Defaults to None.
+
+        Returns:
+            tuple: The response (or CachedResponse) and its JSON body.
+
+        Raises:
+            asyncio.TimeoutError, aiohttp.ClientError, TransientResponseError:
+                If the last attempt failed.
+        """
+        cached = None
+        if cache:
+            key = cache.key(url, parameters)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached and cached.fresh:
+                return cached, cached.body
+            if cached:
+                headers = {**(headers or {}), **cached.validators()}
+
+        async def request():
+            response = await session.get(url, headers=headers, params=parameters)
+            if throttle:
+                throttle.record(response.status)
+            if retry and response.status in OVERLOAD_STATUSES:
+                response.release()
+                raise TransientResponseError(response.status)
+            if cached and response.status == 304:
+                response.release()
+                return response, None
+            return response, await response.json()
+
+        async def attempt():
+            # Only the request is timed, not the wait for the throttle
+            async with throttle.slot() if throttle else no_slot():
+                if retry is None:
+                    return await request()
+                return await asyncio.wait_for(request(), retry.timeout)
+
+        if retry is None:
+            response, response_json = await attempt()
+        else:
+            response, response_json = await retry.call(attempt)
+
+        if cache:
+            if cached and response.status == 304:
+                # Unchanged since it was cached
+                await asyncio.to_thread(cache.refresh, key)
+                return cached, cached.body
+            await asyncio.to_thread(
+                cache.set,
+                key,
+                response.status,
+                response_json,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+        return response, response_json
+
+    @staticmethod
+    async def in_thread(function, *args):
+        """
+        Run a blocking function, such as a database query or commit, in a worker thread,
+        so the event loop keeps serving requests meanwhile.
+
+        If the caller is cancelled, the function is still waited for before the
+        cancellation is raised, so its database session is never closed while the
+        thread uses it.
+
+        Args:
+            function (callable): The function to run.
+            *args: The arguments of the function.
+
+        Returns:
+            The result of the function.
+        """
+        call = asyncio.ensure_future(asyncio.to_thread(function, *args))
+        try:
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            await asyncio.wait([call])
+            raise
+
+    @staticmethod
+    async def gather_until(tasks, deadline=None):
+        """
+        Wait for tasks until a deadline, keeping the results of the completed ones.
+
+        Tasks still running at the deadline, or when the wait itself is cancelled, are
+        cancelled and awaited, so none of them outlives the call. Failed and cancelled
+        tasks are logged and their result is None.
+
+        Args:
+            tasks (list): The asyncio tasks to wait for.
+            deadline (float, optional): The event loop time to stop waiting at.
+                Defaults to None (wait for all the tasks).
+
+        Returns:
+            list: The result of each task (or None), in the order of `tasks`.
+        """
+        if not tasks:
+            return []
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline - asyncio.get_running_loop().time(), 0)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            running = [task for task in tasks if not task.done()]
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        if pending:
+            logging.warning(
+                f"Fetch deadline reached, {len(pending)} requests cancelled"
+            )
+
+        results = []
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is None:
+                results.append(task.result())
+            else:
+                if task in done and not task.cancelled():
+                    logging.warning(f"Request failed: {task.exception()!r}")
+                results.append(None)
+        return results
 
     @staticmethod
-    async def fetch_page(session, url, parameters, headers, page=1):
+    async def fetch_page(
+        session,
+        url,
+        parameters,
+        headers,
+        page=1,
+        throttle=None,
+        retry=None,
+        cache=None,
+    ):
         """
         Fetch a page of movie data from the OMDB API.
 
@@ -48,17 +273,33 @@ class MovieDataFetcher:
             parameters (dict): The parameters for the API request.
             headers (dict): The headers for the API request.
             page (int, optional): The page number to fetch. Defaults to 1.
+            throttle (RequestThrottle, optional): The limits of the request. Defaults to None.
+            retry (RetryPolicy, optional): The timeout and retries of the request.
+                Defaults to None.
+            cache (ResponseCache, optional): The response cache. Defaults to None.
 
         Returns:
             dict: The JSON response containing movie data from the specified page.
         """
         logging.info(f"Fetching Page: {page: <4}")
-        parameters["page"] = page
-        response = await session.get(url, headers=headers, params=parameters)
-        return await response.json()
+        # Copied, so concurrent pages and searches never share their parameters
+        _, response_json = await MovieDataFetcher.send(
+            session, url, dict(parameters, page=page), headers, throttle, retry, cache
+        )
+        return response_json
 
     @staticmethod
-    async def fetch_movies_data(session, url, parameters, headers, limit=100):
+    async def fetch_movies_data(
+        session,
+        url,
+        parameters,
+        headers,
+        limit=100,
+        throttle=None,
+        retry=None,
+        deadline=None,
+        cache=None,
+    ):
         """
         Fetch movie data from the OMDB API.
 
@@ -67,6 +308,13 @@ class MovieDataFetcher:
             parameters (dict): The parameters for the API request.
             headers (dict): The headers for the API request.
             limit (int, optional): The maximum number of movies to fetch. Defaults to 100.
+            throttle (RequestThrottle, optional): The limits of the requests. Defaults to None.
+            retry (RetryPolicy, optional): The timeout and retries of the requests.
+                Defaults to None.
+            deadline (float, optional): The event loop time the pages must be fetched by.
+                Pages after the first one that are not fetched in time are left out.
+                Defaults to None.
+            cache (ResponseCache, optional): The response cache. Defaults to None.
 
         Returns:
             list: A list containing movie data fetched from the OMDB API.
@@ -77,7 +325,21 @@ class MovieDataFetcher:
         movies_data_list = [None] * limit
 
         # First request
-        response = await MovieDataFetcher.fetch_page(session, url, parameters, headers)
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline - asyncio.get_running_loop().time(), 0)
+        response = await asyncio.wait_for(
+            MovieDataFetcher.fetch_page(
+                session,
+                url,
+                parameters,
+                headers,
+                throttle=throttle,
+                retry=retry,
+                cache=cache,
+            ),
+            timeout,
+        )
 
         if response.get("Response") == "True":
             total_results = int(response.get("totalResults", 0))
@@ -107,17 +369,28 @@ class MovieDataFetcher:
         page = 1
         for _ in range(remaining_requests):
             page += 1
-            parameters["page"] = page
             tasks.append(
-                MovieDataFetcher.fetch_page(session, url, parameters, headers, page)
+                asyncio.ensure_future(
+                    MovieDataFetcher.fetch_page(
+                        session,
+                        url,
+                        parameters,
+                        headers,
+                        page,
+                        throttle,
+                        retry,
+                        cache,
+                    )
+                )
             )
 
-        additional_movies_data = await asyncio.gather(*tasks)
+        # Pages failed or not fetched by the deadline are left out
+        additional_movies_data = await MovieDataFetcher.gather_until(tasks, deadline)
 
         # Save remaining data
         idx = received_movies_data
         for response in additional_movies_data:
-            movies_data = response.get("Search", [])
+            movies_data = response.get("Search", []) if response else []
             if movies_data:
                 movies_data_list[idx : idx + len(movies_data)] = movies_data
                 idx += len(movies_data)
@@ -126,7 +399,16 @@ class MovieDataFetcher:
         return movies_data_list[:idx]
 
     @staticmethod
-    async def fetch_movie_data_by_imdb_id(session, url, parameters, headers, imdb_id):
+    async def fetch_movie_data_by_imdb_id(
+        session,
+        url,
+        parameters,
+        headers,
+        imdb_id,
+        throttle=None,
+        retry=None,
+        cache=None,
+    ):
         """
         Fetch movie data by IMDb ID from the OMDB API.
 
@@ -135,13 +417,18 @@ class MovieDataFetcher:
             parameters (dict): The parameters for the API request.
             headers (dict): The headers for the API request.
             imdb_id (str): The IMDb ID of the movie.
+            throttle (RequestThrottle, optional): The limits of the request. Defaults to None.
+            retry (RetryPolicy, optional): The timeout and retries of the request.
+                Defaults to None.
+            cache (ResponseCache, optional): The response cache. Defaults to None.
 
         Returns:
             dict: Movie data fetched from the OMDB API.
         """
-        parameters["i"] = imdb_id
-        response = await session.get(url, headers=headers, params=parameters)
-        response_json = await response.json()
+        # Copied, so concurrent movies never share their parameters
+        response, response_json = await MovieDataFetcher.send(
+            session, url, dict(parameters, i=imdb_id), headers, throttle, retry, cache
+        )
 
         logging.debug(f"Status code : {response.status}")
         logging.debug(f"Response : {response_json}")
@@ -166,73 +453,186 @@ class MovieDataFetcher:
         s1 = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
         return re.sub("([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
 
-    async def fetch_and_save_movies_data(self, movie_title, limit=100):
+    @classmethod
+    def to_row(cls, movie_data):
+        """
+        Convert the movie data of the OMDB API to a row of MovieModel attributes.
+
+        Args:
+            movie_data (dict): The movie data fetched from the OMDB API.
+
+        Returns:
+            dict: The movie attribute values, keyed by snake_case attribute name.
+        """
+        row = {cls.camel_to_snake(key): value for key, value in movie_data.items()}
+        if "response" in row:
+            del row["response"]
+        return row
+
+    async def ingest(
+        self, session, repo, imdb_ids, deadline=None, progress=None, saved=None
+    ):
+        """
+        Fetch detailed movie data and save the movies as they arrive.
+
+        Fetch workers put the movies on a bounded queue, waiting while it is full, and a
+        writer upserts and commits them in chunks, in a worker thread (see `in_thread`),
+        so the event loop is not blocked by the writes. Memory stays constant whatever the
+        number of movies, and the chunks committed are kept if a later one fails. The
+        workers and the writer are cancelled when the ingest fails or is cancelled. The
+        sizes are set in the "ingest" section of the configuration (workers, queue_size,
+        commit_size).
+
+        Args:
+            session (aiohttp.ClientSession): The aiohttp session for making HTTP requests.
+            repo (MoviesRepository): The repository the movies are saved with.
+            imdb_ids (iterable): The IMDb IDs of the movies to fetch.
+            deadline (float, optional): The event loop time to stop fetching at. The
+                movies fetched by then are still saved. Defaults to None.
+            progress (callable, optional): Called with the number of movies saved so far
+                after each commit. Defaults to None.
+            saved (list, optional): Extended with the titles of each chunk once it is
+                committed, so the caller knows the movies saved even if the ingest fails
+                later. Defaults to None.
+
+        Returns:
+            list: The titles of the movies saved.
+        """
+        titles = [] if saved is None else saved
+        ingest_config = self.config.get("ingest", {})
+        queue = asyncio.Queue(ingest_config.get("queue_size", 100))
+        commit_size = ingest_config.get("commit_size", 50)
+        pending_ids = iter(imdb_ids)
+
+        async def fetch_movies():
+            # Workers share the pending IDs, so at most one request per worker runs
+            for imdb_id in pending_ids:
+                try:
+                    movie_data = await self.fetch_movie_data_by_imdb_id(
+                        session,
+                        self.config.get("url"),
+                        self.config.get("parameters_featch_by_id"),
+                        self.config.get("headers"),
+                        imdb_id,
+                        self.throttle,
+                        self.retry,
+                        self.cache,
+                    )
+                except Exception as e:
+                    logging.warning(f"Fetching {imdb_id} failed: {e!r}")
+                    continue
+                if movie_data:
+                    await queue.put(movie_data)
+
+        def save(rows):
+            # Movies saved meanwhile by another fetch are updated
+            repo.bulk_upsert(rows)
+            repo.session.commit()
+            titles.extend(row["title"] for row in rows)
+            logging.info(f"Saved {len(titles)} new films so far.")
+            if progress:
+                progress(len(titles))
+
+        async def save_movies():
+            rows = []
+            while (movie_data := await queue.get()) is not None:
+                rows.append(self.to_row(movie_data))
+                logging.debug(f"Added: {rows[-1]}")
+                if len(rows) >= commit_size:
+                    await self.in_thread(save, rows)
+                    rows = []
+            if rows:
+                await self.in_thread(save, rows)
+            return titles
+
+        writer = asyncio.ensure_future(save_movies())
+        workers = [
+            asyncio.ensure_future(fetch_movies())
+            for _ in range(ingest_config.get("workers", 10))
+        ]
+        fetchers = asyncio.ensure_future(self.gather_until(workers, deadline))
+        try:
+            await asyncio.wait([fetchers, writer], return_when=asyncio.FIRST_COMPLETED)
+            if not writer.done():
+                await queue.put(None)
+            # Otherwise the writer failed, and the workers are cancelled below
+            return await writer
+        finally:
+            # No request or write outlives the ingest, even when it is cancelled
+            tasks = [writer, fetchers, *workers]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def fetch_and_save_movies_data(
+        self, movie_title, limit=100, progress=None, saved=None
+    ):
         """
         Fetch and save movie data.
 
+        The movies are saved while they are fetched (see `ingest`). The fetch is bounded
+        by `fetch_timeout`: the movies fetched by then are saved and the remaining
+        requests are cancelled.
+
         Args:
             movie_title (str): The title of the movie to fetch.
             limit (int, optional): The maximum number of movies to fetch. Defaults to 100.
+            progress (callable, optional): Called with the number of movies saved so far
+                after each commit. Defaults to None.
+            saved (list, optional): Extended with the titles of the movies committed so
+                far, also when the fetch fails (see `ingest`). Defaults to None.
+
+        Returns:
+            list: The titles of the movies saved, padded with None up to the number of
+                search results, or None if no movie matches the title.
         """
+        loop = asyncio.get_running_loop()
+        deadline = None
+        if self.fetch_timeout is not None:
+            deadline = loop.time() + self.fetch_timeout
 
         with UnitOfWork(self.database_url) as unit_of_work:
-            repo = MoviesRepository(unit_of_work.session)
-            parameters_global_search = self.config.get("parameters_global_search")
-            parameters_global_search["s"] = movie_title
-            async with aiohttp.ClientSession() as session:
+            repo = MoviesRepository(
+                unit_of_work.session,
+                unit_of_work.movie_count,
+                unit_of_work.title_index,
+            )
+            # A copy per search: the seed and POST requests search concurrently
+            parameters_global_search = dict(
+                self.config.get("parameters_global_search"), s=movie_title
+            )
+            async with self.client_session() as session:
                 movies_data = await self.fetch_movies_data(
                     session,
                     self.config.get("url"),
                     parameters_global_search,
                     self.config.get("headers"),
                     limit,
+                    self.throttle,
+                    self.retry,
+                    deadline,
+                    self.cache,
                 )
-                counter = 0
                 if movies_data:
                     # Remove results beyond requested limit
                     movies_data = movies_data[: min(limit, len(movies_data))]
 
-                    loop = asyncio.get_event_loop()
-                    tasks = []
+                    # Movies already in the database, found with a single query
+                    imdb_ids = [movie.get("imdbID") for movie in movies_data if movie]
+                    existing_ids = await self.in_thread(repo.existing_ids, imdb_ids)
+
+                    # Feach detailed data only if movies does not exist in database
+                    # (search results may repeat a movie)
+                    new_ids = [
+                        imdb_id
+                        for imdb_id in dict.fromkeys(imdb_ids)
+                        if imdb_id not in existing_ids
+                    ]
 
                     logging.info(f"Fetching detailed movies data...")
-                    for movie in movies_data:
-                        if movie is not None:
-                            imdb_id = movie.get("imdbID")
-
-                            # Feach detailed data only if movies does not exist in database
-                            existing_movie = repo.get_by_id(imdb_id)
-                            if not existing_movie:
-                                tasks.append(
-                                    loop.create_task(
-                                        self.fetch_movie_data_by_imdb_id(
-                                            session,
-                                            self.config.get("url"),
-                                            self.config.get("parameters_featch_by_id"),
-                                            self.config.get("headers"),
-                                            imdb_id,
-                                        )
-                                    )
-                                )
-                    logging.info(f"All request running, waiting for responses...")
-
-                    saved_movies = [None] * len(movies_data)
-
-                    # Add detailed movie info to database
-                    for result in asyncio.as_completed(tasks):
-                        movie_data = await result
-                        if movie_data:
-                            snake_case_movie = {
-                                self.camel_to_snake(key): value
-                                for key, value in movie_data.items()
-                            }
-                            if "response" in snake_case_movie:
-                                del snake_case_movie["response"]
-                            repo.add(MovieModel(**snake_case_movie))
-                            saved_movies[counter] = snake_case_movie["title"]
-                            logging.debug(f"Added: {snake_case_movie}")
-                            counter += 1
-                    repo.session.commit()
-
-                    logging.info(f"Saved {counter} new films.")
-                    return saved_movies
+                    titles = await self.ingest(
+                        session, repo, new_ids, deadline, progress, saved
+                    )
+
+                    logging.info(f"Saved {len(titles)} new films.")
+                    return titles + [None] * (len(movies_data) - len(titles))
@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+from aiohttp import web
+
+from common import utils
+from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_fetcher.response_cache import ResponseCache
+from data_fetcher.retrying import RetryPolicy
+from data_fetcher.throttling import RequestThrottle
+
+PAGE_SIZE = 10
+NOT_FOUND = {"Response": "False", "Error": "Movie not found!"}
+REQUEST_LIMIT_REACHED = {"Response": "False", "Error": "Request limit reached!"}
+
+
+class OmdbStub:
+    """
+    Local stand-in for the OMDB API, to run the fetcher offline and deterministically.
+
+    It answers search ("s") and IMDb ID ("i") requests from a synthetic catalog of
+    `movies` movies, or replays the responses recorded by `record`. The latency, the
+    share of failed requests and the rate limit of the API can be simulated.
+
+    Attributes:
+        movies (int): The number of movies of the synthetic catalog.
+        latency (float): The delay before each response, in seconds.
+        error_rate (float): The share of requests answered with a 503 error.
+        rate_limit (int): The number of requests accepted per second, or None. Requests
+            over the limit are answered with a 429 error.
+        fixtures (dict): The recorded responses, keyed by normalized query string
+            (see `ResponseCache.query`), or None to use the synthetic catalog.
+        requests (int): The number of requests received.
+        rejected (int): The number of requests rejected by the rate limit.
+        failed (int): The number of requests answered with a simulated error.
+    """
+
+    def __init__(
+        self,
+        movies=1000,
+        latency=0.0,
+        error_rate=0.0,
+        rate_limit=None,
+        fixtures=None,
+        seed=None,
+    ):
+        """
+        Initializes the OmdbStub.
+
+        Args:
+            movies (int, optional): The number of movies of the synthetic catalog.
+                Defaults to 1000.
+            latency (float, optional): The delay before each response. Defaults to 0.
+            error_rate (float, optional): The share of requests answered with a 503
+                error. Defaults to 0.
+            rate_limit (int, optional): The number of requests accepted per second.
+                Defaults to None (no limit).
+            fixtures (dict, optional): The recorded responses to replay.
+                Defaults to None.
+            seed (int, optional): The seed of the simulated errors. Defaults to None.
+        """
+        self.movies = movies
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.fixtures = fixtures
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self.window = None
+        self.window_requests = 0
+
+    @classmethod
+    def from_fixtures(cls, path, **options):
+        """
+        Create an OmdbStub replaying the responses recorded in a fixtures file.
+
+        Args:
+            path (str): The path of the JSON file written by `record`.
+            **options: The other options of the stub (latency, error_rate, ...).
+
+        Returns:
+            OmdbStub: The stub.
+        """
+        with open(path) as fixtures:
+            return cls(fixtures=json.load(fixtures), **options)
+
+    @staticmethod
+    def movie(number):
+        """
+        Get the detailed data of a movie of the synthetic catalog.
+
+        Args:
+            number (int): The number of the movie, starting at 1.
+
+        Returns:
+            dict: The movie, as returned by the OMDB API.
+        """
+        return {
+            "Title": f"Movie {number}",
+            "Year": str(1950 + number % 75),
+            "Rated": "PG",
+            "Released": "01 Jan 2000",
+            "Runtime": f"{80 + number % 60} min",
+            "Genre": "Animation, Family",
+            "Director": f"Director {number % 100}",
+            "Writer": f"Writer {number % 100}",
+            "Actors": "Actor 1, Actor 2, Actor 3",
+            "Plot": f"The plot of movie {number}.",
+            "Language": "English",
+            "Country": "United States",
+            "Awards": "N/A",
+            "Poster": "N/A",
+            "Ratings": [{"Source": "Internet Movie Database", "Value": "7.0/10"}],
+            "Metascore": "N/A",
+            "imdbRating": "7.0",
+            "imdbVotes": str(number * 10),
+            "imdbID": f"tt{number:07d}",
+            "Type": "movie",
+            "DVD": "N/A",
+            "BoxOffice": "N/A",
+            "Production": "N/A",
+            "Website": "N/A",
+            "Response": "True",
+        }
+
+    def search(self, page):
+        """
+        Get a page of search results of the synthetic catalog.
+
+        Args:
+            page (int): The page number, starting at 1.
+
+        Returns:
+            dict: The search results, as returned by the OMDB API.
+        """
+        first = (page - 1) * PAGE_SIZE + 1
+        numbers = range(first, min(first + PAGE_SIZE, self.movies + 1))
+        if not numbers:
+            return NOT_FOUND
+        return {
+            "Search": [
+                {
+                    "Title": f"Movie {number}",
+                    "Year": str(1950 + number % 75),
+                    "imdbID": f"tt{number:07d}",
+                    "Type": "movie",
+                    "Poster": "N/A",
+                }
+                for number in numbers
+            ],
+            "totalResults": str(self.movies),
+            "Response": "True",
+        }
+
+    def answer(self, parameters):
+        """
+        Get the body of the response to a request.
+
+        Args:
+            parameters (dict): The parameters of the request.
+
+        Returns:
+            dict: The response body.
+        """
+        if self.fixtures is not None:
+            return self.fixtures.get(ResponseCache.query(parameters), NOT_FOUND)
+        if "i" in parameters:
+            number = int(parameters["i"].removeprefix("tt") or 0)
+            return self.movie(number) if 0 < number <= self.movies else NOT_FOUND
+        return self.search(int(parameters.get("page", 1)))
+
+    def over_rate_limit(self):
+        """
+        Count a request in the current one second window.
+
+        Returns:
+            bool: Whether the request exceeds the rate limit.
+        """
+        window = int(time.monotonic())
+        if window != self.window:
+            self.window = window
+            self.window_requests = 0
+        self.window_requests += 1
+        return self.window_requests > self.rate_limit
+
+    async def handle(self, request):
+        """
+        Answer a request to the OMDB API.
+
+        Args:
+            request (aiohttp.web.Request): The request.
+
+        Returns:
+            aiohttp.web.Response: The JSON response.
+        """
+        self.requests += 1
+        if self.rate_limit is not None and self.over_rate_limit():
+            self.rejected += 1
+            return web.json_response(REQUEST_LIMIT_REACHED, status=429)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.failed += 1
+            return web.json_response({"Response": "False"}, status=503)
+        return web.json_response(self.answer(dict(request.query)))
+
+    def app(self):
+        """
+        Create the web application of the stub.
+
+        Returns:
+            aiohttp.web.Application: The application, answering on "/".
+        """
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        return app
+
+
+async def record(
+    path, titles, limit=10, config_file_path="data_fetcher/fetcher_config.json"
+):
+    """
+    Record responses of the OMDB API into a fixtures file replayed by `OmdbStub`.
+
+    The search results of each title and the detailed data of the movies found are
+    fetched with the URL, API key, throttle and retries of the fetcher configuration.
+
+    Args:
+        path (str): The path of the JSON file to write.
+        titles (list): The titles searched.
+        limit (int, optional): The maximum number of movies recorded per title.
+            Defaults to 10.
+        config_file_path (str, optional): The path to the fetcher configuration.
+            Defaults to "data_fetcher/fetcher_config.json".
+
+    Returns:
+        int: The number of responses recorded.
+    """
+    config = utils.load_config(config_file_path)
+    url = config.get("url")
+    headers = config.get("headers")
+    throttle = RequestThrottle.from_config(config)
+    retry = RetryPolicy.from_config(config)
+    fixtures = {}
+
+    async def fetch(parameters):
+        _, body = await MovieDataFetcher.send(
+            session, url, parameters, headers, throttle, retry
+        )
+        fixtures[ResponseCache.query(parameters)] = body
+        return body
+
+    async with aiohttp.ClientSession() as session:
+        for title in titles:
+            imdb_ids = []
+            for page in range(1, (limit - 1) // PAGE_SIZE + 2):
+                body = await fetch(
+                    dict(config.get("parameters_global_search"), s=title, page=page)
+                )
+                imdb_ids += [movie["imdbID"] for movie in body.get("Search", [])]
+                if len(body.get("Search", [])) < PAGE_SIZE:
+                    break
+            await asyncio.gather(
+                *(
+                    fetch(dict(config.get("parameters_featch_by_id"), i=imdb_id))
+                    for imdb_id in imdb_ids[:limit]
+                )
+            )
+
+    with open(path, "w") as file:
+        json.dump(fixtures, file, indent=1, sort_keys=True)
+    logging.info(f"Recorded {len(fixtures)} responses to {path}")
+    return len(fixtures)
+
+
+def main(arguments=None):
+    """
+    Serve the stub or record fixtures from the command line.
+
+    Usage:
+        python -m data_fetcher.omdb_stub serve --port 8001 --latency 0.05
+        python -m data_fetcher.omdb_stub record fixtures.json Disney Pixar
+
+    Args:
+        arguments (list, optional): The command line arguments. Defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the OMDB API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Serve the stub.")
+    serve.add_argument("--port", type=int, default=8001)
+    serve.add_argument("--movies", type=int, default=1000)
+    serve.add_argument("--latency", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--rate-limit", type=int)
+    serve.add_argument("--fixtures", help="Replay the responses of a fixtures file.")
+    recorder = commands.add_parser("record", help="Record OMDB API responses.")
+    recorder.add_argument("path", help="The fixtures file to write.")
+    recorder.add_argument("titles", nargs="+")
+    recorder.add_argument("--limit", type=int, default=10)
+    arguments = parser.parse_args(arguments)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    if arguments.command == "record":
+        asyncio.run(record(arguments.path, arguments.titles, arguments.limit))
+        return
+
+    options = {
+        "movies": arguments.movies,
+        "latency": arguments.latency,
+        "error_rate": arguments.error_rate,
+        "rate_limit": arguments.rate_limit,
+    }
+    if arguments.fixtures:
+        stub = OmdbStub.from_fixtures(arguments.fixtures, **options)
+    else:
+        stub = OmdbStub(**options)
+    web.run_app(stub.app(), port=arguments.port)
+
+
+if __name__ == "__main__":
+    main()
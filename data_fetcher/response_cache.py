@@ -0,0 +1,327 @@
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import orjson
+
+# Request parameters left out of the cache keys, so a new API key keeps the entries
+IGNORED_PARAMETERS = {"apikey"}
+# Number of lookups whose "last used" times are written at once
+TOUCH_BATCH_SIZE = 100
+# Share of `max_entries` evicted when the cache is full, so evictions are rare
+EVICTED_SHARE = 0.1
+
+
+class CachedResponse:
+    """
+    A response of the OMDB API read from the response cache.
+
+    Attributes:
+        status (int): The HTTP status code of the response.
+        body (dict): The JSON body of the response.
+        etag (str): The ETag header of the response, or None.
+        last_modified (str): The Last-Modified header of the response, or None.
+        fresh (bool): Whether the response is younger than the time to live of the cache.
+    """
+
+    def __init__(self, status, body, etag=None, last_modified=None, fresh=True):
+        """
+        Initializes the CachedResponse.
+
+        Args:
+            status (int): The HTTP status code of the response.
+            body (dict): The JSON body of the response.
+            etag (str, optional): The ETag header of the response. Defaults to None.
+            last_modified (str, optional): The Last-Modified header of the response.
+                Defaults to None.
+            fresh (bool, optional): Whether the response can be used without
+                revalidating it. Defaults to True.
+        """
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh = fresh
+
+    def validators(self):
+        """
+        Get the headers revalidating the response with a conditional request.
+
+        Returns:
+            dict: The If-None-Match and If-Modified-Since headers available.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Persistent cache of the OMDB API responses, stored in a SQLite file.
+
+    Responses are keyed by their normalized URL and parameters, without the API key,
+    so they are reused across restarts and by the replicas sharing the file. Responses
+    older than `ttl` are revalidated with a conditional request when the API sent an
+    ETag or Last-Modified header, and fetched again otherwise. The least recently used
+    responses are evicted beyond `max_entries`.
+
+    Lookups do not write to the file: their "last used" times are kept in memory and
+    written in batches, and evictions only run once the cache is full, down to 90% of
+    `max_entries`. Commits are not synced to disk (it is a cache), and the methods can
+    be called from worker threads, so the fetcher keeps them off the event loop.
+
+    Attributes:
+        path (str): The path of the SQLite file, opened on first use.
+        max_entries (int): The maximum number of responses stored.
+        ttl (float): The time to live of the responses, in seconds.
+        touched (dict): The "last used" times not written yet, keyed by cache key.
+        entries (int): The number of responses stored (an upper bound), or None until
+            the file is opened.
+    """
+
+    def __init__(self, path, max_entries=10000, ttl=86400):
+        """
+        Initializes the ResponseCache.
+
+        Args:
+            path (str): The path of the SQLite file.
+            max_entries (int, optional): The maximum number of responses stored.
+                Defaults to 10000.
+            ttl (float, optional): The time to live of the responses. Defaults to one day.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.connection = None
+        self.touched = {}
+        self.entries = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a ResponseCache from the fetcher configuration.
+
+        Args:
+            config (dict): The fetcher configuration, with the optional "response_cache"
+                (path, max_entries, ttl) section.
+
+        Returns:
+            ResponseCache: The configured cache, or None if the section is missing.
+        """
+        if not config.get("response_cache"):
+            return None
+        return cls(**config["response_cache"])
+
+    @staticmethod
+    def key(url, parameters):
+        """
+        Get the cache key of a request.
+
+        Args:
+            url (str): The URL of the request.
+            parameters (dict): The parameters of the request.
+
+        Returns:
+            str: The URL with a lowercase scheme and host, followed by the sorted
+                parameters, without the API key and the parameters set to None.
+        """
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        query = ResponseCache.query(parameters)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}?{query}"
+
+    @staticmethod
+    def query(parameters):
+        """
+        Get the normalized query string of request parameters.
+
+        Args:
+            parameters (dict): The parameters of the request.
+
+        Returns:
+            str: The sorted parameters, without the API key and the parameters set to
+                None.
+        """
+        return urlencode(
+            sorted(
+                (name, str(value))
+                for name, value in parameters.items()
+                if name not in IGNORED_PARAMETERS and value is not None
+            )
+        )
+
+    @staticmethod
+    def cacheable(status, body):
+        """
+        Check whether a response can be cached.
+
+        Successful responses and "Movie not found!" errors are cached. Other errors,
+        like an invalid API key or the request limit, are not.
+
+        Args:
+            status (int): The HTTP status code of the response.
+            body (dict): The JSON body of the response.
+
+        Returns:
+            bool: Whether the response can be cached.
+        """
+        if status != 200 or not isinstance(body, dict):
+            return False
+        not_found = body.get("Error") == "Movie not found!"
+        return body.get("Response") != "False" or not_found
+
+    def connect(self):
+        """
+        Get the connection to the SQLite file, creating its table on first use.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        if self.connection is None:
+            # Used by one thread at a time, guarded by the lock
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # Commits are not synced to disk: a power loss only loses cached responses
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, status INTEGER, body BLOB, etag TEXT, "
+                "last_modified TEXT, stored_at REAL, used_at REAL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_used_at ON responses (used_at)"
+            )
+            self.connection.commit()
+            (self.entries,) = self.connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()
+        return self.connection
+
+    def get(self, key):
+        """
+        Get a cached response, marking it as recently used.
+
+        Args:
+            key (str): The cache key of the request (see `key`).
+
+        Returns:
+            CachedResponse: The cached response, or None if it is not cached.
+        """
+        with self.lock:
+            connection = self.connect()
+            row = connection.execute(
+                "SELECT status, body, etag, last_modified, stored_at FROM responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self.touched[key] = now
+            if len(self.touched) >= TOUCH_BATCH_SIZE:
+                self.write_touched()
+                connection.commit()
+        status, body, etag, last_modified, stored_at = row
+        return CachedResponse(
+            status, orjson.loads(body), etag, last_modified, now - stored_at < self.ttl
+        )
+
+    def write_touched(self):
+        """
+        Write the "last used" times kept in memory. The caller holds the lock and
+        commits.
+        """
+        if self.touched:
+            self.connection.executemany(
+                "UPDATE responses SET used_at = ? WHERE key = ?",
+                [(used_at, key) for key, used_at in self.touched.items()],
+            )
+            self.touched.clear()
+
+    def evict(self):
+        """
+        Evict the least recently used responses once the cache is full, keeping 90% of
+        `max_entries`. The caller holds the lock and commits.
+
+        Returns:
+            int: The number of responses evicted.
+        """
+        if self.entries <= self.max_entries:
+            return 0
+        # Eviction follows the last uses, including the ones not written yet
+        self.write_touched()
+        kept = self.max_entries - int(self.max_entries * EVICTED_SHARE)
+        evicted = self.connection.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+            "ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (kept,),
+        ).rowcount
+        (self.entries,) = self.connection.execute(
+            "SELECT COUNT(*) FROM responses"
+        ).fetchone()
+        return evicted
+
+    def set(self, key, status, body, etag=None, last_modified=None):
+        """
+        Store a response if it can be cached, evicting the least recently used ones
+        beyond `max_entries`.
+
+        Args:
+            key (str): The cache key of the request (see `key`).
+            status (int): The HTTP status code of the response.
+            body (dict): The JSON body of the response.
+            etag (str, optional): The ETag header of the response. Defaults to None.
+            last_modified (str, optional): The Last-Modified header of the response.
+                Defaults to None.
+        """
+        if not self.cacheable(status, body):
+            return
+        now = time.time()
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, status, orjson.dumps(body), etag, last_modified, now, now),
+            )
+            self.touched.pop(key, None)
+            # Replaced responses are counted too, until the next eviction counts again
+            self.entries += 1
+            evicted = self.evict()
+            connection.commit()
+        if evicted:
+            logging.debug(f"Evicted {evicted} responses from the response cache")
+
+    def refresh(self, key):
+        """
+        Mark a cached response as fresh again, after the API confirmed it is unchanged.
+
+        Args:
+            key (str): The cache key of the request (see `key`).
+        """
+        now = time.time()
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "UPDATE responses SET stored_at = ?, used_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self.touched.pop(key, None)
+            connection.commit()
+
+    def close(self):
+        """
+        Write the "last used" times kept in memory and close the connection to the
+        SQLite file.
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.write_touched()
+                self.connection.commit()
+                self.connection.close()
+                self.connection = None
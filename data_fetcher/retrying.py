@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import random
+
+import aiohttp
+
+
+class TransientResponseError(Exception):
+    """
+    Raised for a response whose status means the request may succeed if retried.
+
+    Attributes:
+        status (int): The HTTP status code of the response.
+    """
+
+    def __init__(self, status):
+        """
+        Initializes the TransientResponseError.
+
+        Args:
+            status (int): The HTTP status code of the response.
+        """
+        super().__init__(f"Transient response status: {status}")
+        self.status = status
+
+
+# Errors worth retrying: timeouts, connection failures and overloaded API responses
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    TransientResponseError,
+)
+
+
+class RetryPolicy:
+    """
+    Timeout and retry policy of the requests sent to the OMDB API.
+
+    Each attempt is bounded by `timeout` (see `MovieDataFetcher.send`). Attempts
+    failing with a transient error are retried after a jittered exponential backoff: a
+    random delay between 0 and `base_delay * 2 ** attempt`, capped at `max_delay`, so
+    concurrent requests failing together do not retry together.
+
+    Attributes:
+        attempts (int): The maximum number of attempts of a request.
+        base_delay (float): The maximum delay before the first retry, in seconds.
+        max_delay (float): The maximum delay before a retry, in seconds.
+        timeout (float): The maximum duration of an attempt, in seconds.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=5, timeout=10):
+        """
+        Initializes the RetryPolicy.
+
+        Args:
+            attempts (int, optional): The maximum number of attempts. Defaults to 3.
+            base_delay (float, optional): The maximum delay before the first retry.
+                Defaults to 0.5 seconds.
+            max_delay (float, optional): The maximum delay before a retry.
+                Defaults to 5 seconds.
+            timeout (float, optional): The maximum duration of an attempt.
+                Defaults to 10 seconds.
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a RetryPolicy from the fetcher configuration.
+
+        Args:
+            config (dict): The fetcher configuration, with the optional "retry"
+                (attempts, base_delay, max_delay, timeout) section.
+
+        Returns:
+            RetryPolicy: The configured policy.
+        """
+        return cls(**config.get("retry", {}))
+
+    def delay(self, attempt):
+        """
+        Get the delay before retrying a failed attempt.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def call(self, function):
+        """
+        Call `function` until it succeeds, it fails with a non transient error or the
+        attempts are exhausted.
+
+        Args:
+            function (callable): A coroutine function without arguments making an attempt.
+                It is expected to bound the attempt with `timeout`.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            Exception: The error of the last attempt.
+        """
+        for attempt in range(self.attempts):
+            try:
+                return await function()
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.attempts - 1:
+                    raise
+                delay = self.delay(attempt)
+                logging.warning(
+                    f"Request failed ({e!r}), retrying in {delay:.2f} seconds..."
+                )
+                await asyncio.sleep(delay)
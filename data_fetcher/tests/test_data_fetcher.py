@@ -1,5 +1,7 @@
 import pytest
 import asyncio
+import threading
+import time
 from unittest.mock import patch, AsyncMock, MagicMock
 from data_fetcher.movie_data_fetcher import MovieDataFetcher
 
@@ -104,7 +106,11 @@ async def test_fetch_page():
 
     # Assertions
     assert result == response_data
-    session_mock.get.assert_awaited_once_with(url, headers=headers, params=parameters)
+    session_mock.get.assert_awaited_once_with(
+        url, headers=headers, params={**parameters, "page": page}
+    )
+    # The parameters of the caller are left unchanged
+    assert "page" not in parameters
     response_mock.json.assert_awaited_once()
 
 
@@ -417,7 +423,7 @@ def test_fetch_and_save_movies_data():
                         mock_fetch_movies_data.return_value = movies_data
                         mock_fetch_movies_data_by_id.return_value = movie_data
 
-                        mock_movies_repo.return_value.get_by_id.return_value = None
+                        mock_movies_repo.return_value.existing_ids.return_value = set()
                         session.return_value = AsyncMock()
 
                         response = asyncio.run(
@@ -433,6 +439,21 @@ def test_fetch_and_save_movies_data():
                         if response is not None:
                             assert response[0] == movie_data["Title"]
 
+                        # Existing movies are looked up with a single query
+                        mock_movies_repo.return_value.existing_ids.assert_called_once()
+                        mock_movies_repo.return_value.get_by_id.assert_not_called()
+
+                        # Assert that the movie is upserted without the response key
+                        (rows,), _ = mock_movies_repo.return_value.bulk_upsert.call_args
+                        assert rows == [
+                            {
+                                "title": movie_data["Title"],
+                                "year": "2004",
+                                "runtime": "56 min",
+                                "imdb_id": "tt1234567",
+                            }
+                        ]
+
 
 def test_fetch_and_save_movies_data_filter_response_key():
     # Set up mock config
@@ -500,3 +521,164 @@ def test_fetch_and_save_movies_data_filter_response_key():
                             "Runtime"
                         )
                         assert movie_data.get("imdbID") == saved_movies[0].get("imdbID")
+
+
+@pytest.mark.asyncio
+async def test_open_creates_bounded_shared_session():
+    fetcher = MovieDataFetcher()
+    fetcher.config["connector"] = {"limit": 5, "limit_per_host": 2, "ttl_dns_cache": 60}
+
+    await fetcher.open()
+    session = fetcher.session
+    try:
+        assert session.connector.limit == 5
+        assert session.connector.limit_per_host == 2
+
+        # Opening again keeps the same session
+        await fetcher.open()
+        assert fetcher.session is session
+
+        # Fetches reuse the shared session
+        async with fetcher.client_session() as client_session:
+            assert client_session is session
+    finally:
+        await fetcher.close()
+
+    assert session.closed
+    assert fetcher.session is None
+
+
+@pytest.mark.asyncio
+async def test_client_session_without_open_is_closed_on_exit():
+    fetcher = MovieDataFetcher()
+
+    async with fetcher.client_session() as session:
+        assert not session.closed
+
+    assert session.closed
+    assert fetcher.session is None
+
+
+def test_to_row():
+    row = MovieDataFetcher.to_row(
+        {"Title": "Movie 1", "imdbID": "tt0000001", "Response": "True"}
+    )
+
+    assert row == {"title": "Movie 1", "imdb_id": "tt0000001"}
+
+
+@pytest.mark.asyncio
+async def test_ingest_commits_in_chunks():
+    fetcher = MovieDataFetcher()
+    fetcher.config["ingest"] = {"workers": 2, "queue_size": 1, "commit_size": 2}
+    repo = MagicMock()
+    committed = []
+    repo.session.commit.side_effect = lambda: committed.append(
+        [row["imdb_id"] for row in repo.bulk_upsert.call_args.args[0]]
+    )
+
+    async def fetch_movie_data_by_imdb_id(
+        session, url, parameters, headers, imdb_id, *args
+    ):
+        await asyncio.sleep(0)
+        if imdb_id == "tt0000003":
+            raise asyncio.TimeoutError()
+        return {"Title": f"Movie {imdb_id[-1]}", "imdbID": imdb_id}
+
+    imdb_ids = [f"tt000000{number}" for number in range(1, 7)]
+    with patch.object(
+        MovieDataFetcher,
+        "fetch_movie_data_by_imdb_id",
+        staticmethod(fetch_movie_data_by_imdb_id),
+    ):
+        titles = await fetcher.ingest(None, repo, imdb_ids)
+
+    # The failed movie is skipped and the others are committed 2 by 2
+    assert sorted(titles) == ["Movie 1", "Movie 2", "Movie 4", "Movie 5", "Movie 6"]
+    assert [len(chunk) for chunk in committed] == [2, 2, 1]
+    assert sorted(sum(committed, [])) == [
+        "tt0000001",
+        "tt0000002",
+        "tt0000004",
+        "tt0000005",
+        "tt0000006",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ingest_stops_fetching_when_saving_fails():
+    fetcher = MovieDataFetcher()
+    fetcher.config["ingest"] = {"workers": 2, "queue_size": 1, "commit_size": 1}
+    repo = MagicMock()
+    repo.bulk_upsert.side_effect = Exception("Database is locked")
+    fetched = []
+
+    async def fetch_movie_data_by_imdb_id(
+        session, url, parameters, headers, imdb_id, *args
+    ):
+        fetched.append(imdb_id)
+        return {"Title": "Movie", "imdbID": imdb_id}
+
+    imdb_ids = [f"tt{number:07}" for number in range(100)]
+    with patch.object(
+        MovieDataFetcher,
+        "fetch_movie_data_by_imdb_id",
+        staticmethod(fetch_movie_data_by_imdb_id),
+    ):
+        with pytest.raises(Exception, match="Database is locked"):
+            await fetcher.ingest(None, repo, imdb_ids)
+
+    # The bounded queue kept the workers from fetching every movie
+    assert len(fetched) < len(imdb_ids)
+
+
+@pytest.mark.asyncio
+async def test_ingest_cancels_its_tasks_when_cancelled():
+    fetcher = MovieDataFetcher()
+    fetcher.config["ingest"] = {"workers": 3, "queue_size": 1, "commit_size": 1}
+    repo = MagicMock()
+    started = []
+
+    async def fetch_movie_data_by_imdb_id(
+        session, url, parameters, headers, imdb_id, *args
+    ):
+        started.append(imdb_id)
+        await asyncio.sleep(10)
+
+    imdb_ids = [f"tt{number:07}" for number in range(100)]
+    with patch.object(
+        MovieDataFetcher,
+        "fetch_movie_data_by_imdb_id",
+        staticmethod(fetch_movie_data_by_imdb_id),
+    ):
+        ingest = asyncio.ensure_future(fetcher.ingest(None, repo, imdb_ids))
+        await asyncio.sleep(0.01)
+        ingest.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await ingest
+
+    # Only the test itself is still running
+    assert len(started) == 3
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_in_thread_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    finished = []
+
+    def commit(delay):
+        time.sleep(delay)
+        finished.append(threading.get_ident())
+        return "committed"
+
+    assert await MovieDataFetcher.in_thread(commit, 0) == "committed"
+    assert finished[0] != loop_thread
+
+    # A cancelled caller still waits for the thread
+    call = asyncio.ensure_future(MovieDataFetcher.in_thread(commit, 0.05))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert len(finished) == 2
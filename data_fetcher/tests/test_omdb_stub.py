@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestServer
+from data_fetcher.omdb_stub import OmdbStub, record
+
+
+async def get(session, server, **parameters):
+    async with session.get(server.make_url("/"), params=parameters) as response:
+        return response.status, await response.json()
+
+
+@pytest.mark.asyncio
+async def test_stub_answers_search_and_imdb_id_requests():
+    stub = OmdbStub(movies=15)
+
+    async with TestServer(stub.app()) as server, aiohttp.ClientSession() as session:
+        _, first_page = await get(session, server, s="Movie", page=1)
+        _, second_page = await get(session, server, s="Movie", page=2)
+        _, third_page = await get(session, server, s="Movie", page=3)
+        _, movie = await get(session, server, i="tt0000015")
+        _, missing = await get(session, server, i="tt0000016")
+
+    assert first_page["totalResults"] == "15"
+    assert len(first_page["Search"]) == 10
+    assert [movie["imdbID"] for movie in second_page["Search"]][-1] == "tt0000015"
+    assert third_page == {"Response": "False", "Error": "Movie not found!"}
+    assert movie["Title"] == "Movie 15"
+    assert missing["Error"] == "Movie not found!"
+    assert stub.requests == 5
+
+
+@pytest.mark.asyncio
+async def test_stub_simulates_rate_limit_and_errors(monkeypatch):
+    rate_limited = OmdbStub(movies=10, rate_limit=2)
+    failing = OmdbStub(movies=10, error_rate=1.0)
+    # The requests are sent within the same one second window
+    monkeypatch.setattr(
+        "data_fetcher.omdb_stub.time", SimpleNamespace(monotonic=lambda: 1.0)
+    )
+
+    async with aiohttp.ClientSession() as session:
+        async with TestServer(rate_limited.app()) as server:
+            statuses = [
+                (await get(session, server, i="tt0000001"))[0] for _ in range(3)
+            ]
+        async with TestServer(failing.app()) as server:
+            status, _ = await get(session, server, i="tt0000001")
+
+    assert statuses == [200, 200, 429]
+    assert rate_limited.rejected == 1
+    assert status == 503
+    assert failing.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path):
+    api = OmdbStub(movies=12)
+    fixtures_path = tmp_path / "fixtures.json"
+
+    async with TestServer(api.app()) as server:
+        config_file_path = tmp_path / "fetcher_config.json"
+        with open("data_fetcher/fetcher_config.json") as file:
+            config = json.load(file)
+        config["url"] = str(server.make_url("/"))
+        with open(config_file_path, "w") as file:
+            json.dump(config, file)
+
+        recorded = await record(fixtures_path, ["Movie"], 12, config_file_path)
+
+    # 2 search pages and 12 movies, keyed without the API key
+    assert recorded == 14
+    with open(fixtures_path) as file:
+        assert "i=tt0000012" in json.load(file)
+
+    replay = OmdbStub.from_fixtures(fixtures_path, movies=0)
+    async with TestServer(replay.app()) as server, aiohttp.ClientSession() as session:
+        _, movie = await get(session, server, apikey="other", i="tt0000012")
+        _, missing = await get(session, server, i="tt0000013")
+
+    assert movie == OmdbStub.movie(12)
+    assert missing["Error"] == "Movie not found!"
@@ -0,0 +1,169 @@
+import sqlite3
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_fetcher.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "omdb_cache.db"), max_entries=2, ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_key_is_normalized_without_api_key():
+    key = ResponseCache.key(
+        "HTTP://WWW.omdbapi.com/", {"s": "Disney", "apikey": "secret", "page": 2}
+    )
+
+    assert key == "http://www.omdbapi.com/?page=2&s=Disney"
+    assert key == ResponseCache.key(
+        "http://www.omdbapi.com", {"page": "2", "s": "Disney", "i": None}
+    )
+
+
+def test_cacheable():
+    assert ResponseCache.cacheable(200, {"Title": "Movie 1", "Response": "True"})
+    assert ResponseCache.cacheable(
+        200, {"Response": "False", "Error": "Movie not found!"}
+    )
+    assert not ResponseCache.cacheable(
+        200, {"Response": "False", "Error": "Invalid API key!"}
+    )
+    assert not ResponseCache.cacheable(401, {"Response": "False"})
+
+
+def test_from_config():
+    assert ResponseCache.from_config({}) is None
+
+    cache = ResponseCache.from_config(
+        {"response_cache": {"path": "omdb_cache.db", "max_entries": 5, "ttl": 10}}
+    )
+    assert cache.path == "omdb_cache.db"
+    assert cache.max_entries == 5
+    assert cache.ttl == 10
+
+
+def test_get_and_set_persist_across_instances(cache):
+    cache.set("a", 200, {"Title": "Movie 1"}, etag='"1"')
+    cache.close()
+
+    cached = ResponseCache(cache.path, ttl=60).get("a")
+
+    assert cached.status == 200
+    assert cached.body == {"Title": "Movie 1"}
+    assert cached.etag == '"1"'
+    assert cached.fresh
+    assert cache.get("missing") is None
+
+
+def test_set_evicts_least_recently_used(cache, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("data_fetcher.response_cache.time.time", lambda: now)
+    cache.set("a", 200, {"Title": "Movie 1"})
+    now += 1
+    cache.set("b", 200, {"Title": "Movie 2"})
+    now += 1
+    # "a" is used after "b"
+    cache.get("a")
+    now += 1
+    cache.set("c", 200, {"Title": "Movie 3"})
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_get_expired_response(cache, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("data_fetcher.response_cache.time.time", lambda: now)
+    cache.set("a", 200, {"Title": "Movie 1"})
+    now += 61
+
+    assert not cache.get("a").fresh
+
+    cache.refresh("a")
+    assert cache.get("a").fresh
+
+
+@pytest.mark.asyncio
+async def test_send_uses_and_revalidates_cached_responses(cache):
+    requests = []
+
+    async def omdb_stub(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"1"':
+            return web.Response(status=304)
+        return web.json_response(
+            {"Title": "Movie 1", "Response": "True"}, headers={"ETag": '"1"'}
+        )
+
+    app = web.Application()
+    app.router.add_get("/", omdb_stub)
+
+    async with TestServer(app) as server, aiohttp.ClientSession() as session:
+        url = str(server.make_url("/"))
+        for _ in range(2):
+            result = await MovieDataFetcher.fetch_movie_data_by_imdb_id(
+                session, url, {"apikey": "secret"}, {}, "tt0000001", cache=cache
+            )
+            assert result == {"Title": "Movie 1", "Response": "True"}
+        # The second fetch is served from the cache
+        assert len(requests) == 1
+
+        cache.ttl = 0
+        result = await MovieDataFetcher.fetch_movie_data_by_imdb_id(
+            session, url, {"apikey": "secret"}, {}, "tt0000001", cache=cache
+        )
+
+    # The expired response is revalidated
+    assert result == {"Title": "Movie 1", "Response": "True"}
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"1"'
+
+
+def test_get_writes_last_uses_in_batches(cache, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("data_fetcher.response_cache.time.time", lambda: now)
+    monkeypatch.setattr("data_fetcher.response_cache.TOUCH_BATCH_SIZE", 2)
+    cache.set("a", 200, {"Title": "Movie 1"})
+    cache.set("b", 200, {"Title": "Movie 2"})
+
+    def used_at():
+        with sqlite3.connect(cache.path) as connection:
+            return dict(connection.execute("SELECT key, used_at FROM responses"))
+
+    now += 1
+    cache.get("a")
+    # The lookup is kept in memory...
+    assert used_at() == {"a": 1000.0, "b": 1000.0}
+    cache.get("b")
+    # ...until a batch is full, or the cache is closed
+    assert used_at() == {"a": 1001.0, "b": 1001.0}
+    now += 1
+    cache.get("a")
+    cache.close()
+    assert used_at() == {"a": 1002.0, "b": 1001.0}
+
+
+def test_set_evicts_down_to_90_percent_once_full(tmp_path, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("data_fetcher.response_cache.time.time", lambda: now)
+    cache = ResponseCache(str(tmp_path / "omdb_cache.db"), max_entries=10)
+    evictions = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: evictions.append(evict()) or 0)
+
+    for number in range(15):
+        now += 1
+        cache.set(f"key {number}", 200, {"Title": f"Movie {number}"})
+    cache.close()
+
+    # Full caches keep 9 responses, so every other response evicts 2 of them
+    assert evictions == [0] * 10 + [2, 0, 2, 0, 2]
+    assert cache.get("key 5") is None
+    assert cache.get("key 6") is not None
+    cache.close()
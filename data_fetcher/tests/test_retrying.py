@@ -0,0 +1,184 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_fetcher.retrying import RetryPolicy, TransientResponseError
+
+
+def test_delay_is_jittered_and_capped():
+    retry = RetryPolicy(base_delay=1, max_delay=3)
+
+    for attempt in range(5):
+        delay = retry.delay(attempt)
+        assert 0 <= delay <= min(3, 2**attempt)
+
+
+def test_from_config():
+    retry = RetryPolicy.from_config({"retry": {"attempts": 5, "timeout": 2}})
+
+    assert retry.attempts == 5
+    assert retry.timeout == 2
+
+
+@pytest.mark.asyncio
+async def test_call_retries_transient_errors():
+    retry = RetryPolicy(attempts=3, base_delay=0)
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise TransientResponseError(503)
+        return "Movie 1"
+
+    assert await retry.call(request) == "Movie 1"
+    assert attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_call_raises_when_attempts_are_exhausted():
+    retry = RetryPolicy(attempts=2, base_delay=0)
+
+    async def request():
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await retry.call(request)
+
+
+@pytest.mark.asyncio
+async def test_call_does_not_retry_other_errors():
+    retry = RetryPolicy(attempts=3, base_delay=0)
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("Invalid response")
+
+    with pytest.raises(ValueError):
+        await retry.call(request)
+    assert attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_send_retries_hung_and_overloaded_requests_against_stub_server():
+    requests = 0
+
+    async def omdb_stub(request):
+        nonlocal requests
+        requests += 1
+        # The first request hangs, the second one is rejected
+        if requests == 1:
+            await asyncio.sleep(1)
+        if requests == 2:
+            return web.json_response({"Response": "False"}, status=503)
+        return web.json_response({"Title": "Movie 1", "Response": "True"})
+
+    app = web.Application()
+    app.router.add_get("/", omdb_stub)
+    retry = RetryPolicy(attempts=3, base_delay=0, timeout=0.1)
+
+    async with TestServer(app) as server, aiohttp.ClientSession() as session:
+        result = await MovieDataFetcher.fetch_movie_data_by_imdb_id(
+            session, str(server.make_url("/")), {}, {}, "tt0000001", retry=retry
+        )
+
+    assert result == {"Title": "Movie 1", "Response": "True"}
+    assert requests == 3
+
+
+@pytest.mark.asyncio
+async def test_gather_until_returns_partial_results():
+    async def fetch(title, delay):
+        await asyncio.sleep(delay)
+        return title
+
+    async def fail():
+        raise TransientResponseError(503)
+
+    tasks = [
+        asyncio.ensure_future(fetch("Movie 1", 0)),
+        asyncio.ensure_future(fetch("Movie 2", 1)),
+        asyncio.ensure_future(fail()),
+        asyncio.ensure_future(fetch("Movie 4", 0)),
+    ]
+    deadline = asyncio.get_running_loop().time() + 0.05
+
+    results = await MovieDataFetcher.gather_until(tasks, deadline)
+
+    assert results == ["Movie 1", None, None, "Movie 4"]
+    # The late request is cancelled
+    await asyncio.sleep(0)
+    assert tasks[1].cancelled()
+
+
+@pytest.mark.asyncio
+async def test_fetch_movies_data_skips_pages_missing_the_deadline():
+    async def fetch_page(
+        session,
+        url,
+        parameters,
+        headers,
+        page=1,
+        throttle=None,
+        retry=None,
+        cache=None,
+    ):
+        if page == 3:
+            await asyncio.sleep(1)
+        return {
+            "Response": "True",
+            "totalResults": "30",
+            "Search": [{"Title": f"Movie {page}"}],
+        }
+
+    deadline = asyncio.get_running_loop().time() + 0.1
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(MovieDataFetcher, "fetch_page", fetch_page)
+        movies_data = await MovieDataFetcher.fetch_movies_data(
+            None, "http://omdb", {}, {}, limit=30, deadline=deadline
+        )
+
+    assert movies_data == [{"Title": "Movie 1"}, {"Title": "Movie 2"}]
+
+
+@pytest.mark.asyncio
+async def test_fetch_movies_data_cancels_its_pages_when_cancelled():
+    started = []
+
+    async def fetch_page(
+        session,
+        url,
+        parameters,
+        headers,
+        page=1,
+        throttle=None,
+        retry=None,
+        cache=None,
+    ):
+        if page > 1:
+            started.append(page)
+            await asyncio.sleep(10)
+        return {
+            "Response": "True",
+            "totalResults": "30",
+            "Search": [{"Title": f"Movie {page}"}],
+        }
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(MovieDataFetcher, "fetch_page", fetch_page)
+        fetch = asyncio.ensure_future(
+            MovieDataFetcher.fetch_movies_data(None, "http://omdb", {}, {}, limit=30)
+        )
+        await asyncio.sleep(0.01)
+        fetch.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await fetch
+
+    # The pages were requested, and none of them is still running
+    assert started == [2, 3]
+    assert asyncio.all_tasks() == {asyncio.current_task()}
@@ -0,0 +1,126 @@
+import asyncio
+import time
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_fetcher.throttling import AdaptiveConcurrency, RequestThrottle, TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=2)
+
+    start = time.monotonic()
+    for _ in range(2):
+        await bucket.acquire()
+    burst_time = time.monotonic() - start
+
+    for _ in range(3):
+        await bucket.acquire()
+    total_time = time.monotonic() - start
+
+    assert burst_time < 0.01
+    # 3 more tokens at 100 tokens per second
+    assert total_time >= 0.025
+
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency_limits_requests_in_flight():
+    concurrency = AdaptiveConcurrency(initial=2, minimum=1, maximum=2)
+    throttle = RequestThrottle(TokenBucket(rate=1000, capacity=1000), concurrency)
+    max_in_flight = 0
+
+    async def request():
+        nonlocal max_in_flight
+        async with throttle.slot():
+            max_in_flight = max(max_in_flight, concurrency.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert max_in_flight == 2
+    assert concurrency.in_flight == 0
+
+
+def test_adaptive_concurrency_aimd():
+    concurrency = AdaptiveConcurrency(initial=8, minimum=1, maximum=10, decrease=0.5)
+
+    # Multiplicative decrease down to the minimum
+    concurrency.on_overload()
+    assert concurrency.limit == 4
+    for _ in range(5):
+        concurrency.on_overload()
+    assert concurrency.limit == 1
+
+    # Additive increase up to the maximum
+    concurrency.on_success()
+    assert concurrency.limit == 2
+    for _ in range(100):
+        concurrency.on_success()
+    assert concurrency.limit == 10
+
+
+def test_request_throttle_record():
+    throttle = RequestThrottle(concurrency=AdaptiveConcurrency(initial=4))
+
+    throttle.record(429)
+    assert throttle.concurrency.limit == 2
+
+    throttle.record(503)
+    assert throttle.concurrency.limit == 1
+
+    throttle.record(200)
+    assert throttle.concurrency.limit == 2
+
+
+def test_request_throttle_from_config():
+    throttle = RequestThrottle.from_config(
+        {
+            "rate_limit": {"rate": 5, "capacity": 2},
+            "concurrency": {"initial": 3, "minimum": 2, "maximum": 6},
+        }
+    )
+
+    assert throttle.bucket.rate == 5
+    assert throttle.bucket.capacity == 2
+    assert throttle.concurrency.limit == 3
+    assert throttle.concurrency.minimum == 2
+    assert throttle.concurrency.maximum == 6
+
+
+@pytest.mark.asyncio
+async def test_throttle_backs_off_and_ramps_up_against_stub_server():
+    requests = 0
+
+    async def omdb_stub(request):
+        # The first requests are rejected by the rate limit of the API
+        nonlocal requests
+        requests += 1
+        if requests <= 2:
+            return web.json_response(
+                {"Response": "False", "Error": "Request limit reached!"}, status=429
+            )
+        return web.json_response({"Title": "Movie 1", "Response": "True"})
+
+    app = web.Application()
+    app.router.add_get("/", omdb_stub)
+    throttle = RequestThrottle(
+        TokenBucket(rate=1000, capacity=1000),
+        AdaptiveConcurrency(initial=4, minimum=1, maximum=8),
+    )
+
+    async with TestServer(app) as server, aiohttp.ClientSession() as session:
+        url = str(server.make_url("/"))
+        for _ in range(2):
+            await MovieDataFetcher.fetch_movie_data_by_imdb_id(
+                session, url, {}, {}, "tt0000001", throttle
+            )
+        assert throttle.concurrency.limit == 1
+
+        result = await MovieDataFetcher.fetch_movie_data_by_imdb_id(
+            session, url, {}, {}, "tt0000001", throttle
+        )
+        assert result == {"Title": "Movie 1", "Response": "True"}
+        assert throttle.concurrency.limit == 2
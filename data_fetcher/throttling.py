@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+# Response status codes meaning that the OMDB API is overloaded
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Tokens are added at a constant rate up to the bucket capacity, and each request
+    takes one, so requests are sent at `rate` per second on average with bursts of up
+    to `capacity` requests.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens stored.
+        tokens (float): The number of tokens available.
+    """
+
+    def __init__(self, rate=10, capacity=10):
+        """
+        Initializes a full TokenBucket.
+
+        Args:
+            rate (float, optional): The number of tokens added per second. Defaults to 10.
+            capacity (float, optional): The maximum number of tokens stored. Defaults to 10.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        """
+        Add the tokens accumulated since the last update.
+        """
+        now = time.monotonic()
+        added = (now - self.updated_at) * self.rate
+        self.tokens = min(self.capacity, self.tokens + added)
+        self.updated_at = now
+
+    async def acquire(self):
+        """
+        Take a token, waiting until one is available.
+        """
+        # Waiters are served in arrival order
+        async with self.lock:
+            self.refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limiter.
+
+    The number of requests in flight is limited. Each successful response raises the
+    limit by about one request per round of `limit` responses, and each overload
+    response (429 or 5xx) multiplies it by `decrease`, so the limit converges to what
+    the API accepts.
+
+    Attributes:
+        limit (float): The current maximum number of requests in flight.
+        minimum (int): The lowest limit.
+        maximum (int): The highest limit.
+        decrease (float): The factor applied to the limit on overload.
+        in_flight (int): The number of requests in flight.
+    """
+
+    def __init__(self, initial=5, minimum=1, maximum=20, decrease=0.5):
+        """
+        Initializes the AdaptiveConcurrency.
+
+        Args:
+            initial (int, optional): The initial limit. Defaults to 5.
+            minimum (int, optional): The lowest limit. Defaults to 1.
+            maximum (int, optional): The highest limit. Defaults to 20.
+            decrease (float, optional): The factor applied to the limit on overload.
+                Defaults to 0.5.
+        """
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        """
+        Wait until a request can be sent without exceeding the limit.
+        """
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        """
+        Mark a request as completed.
+        """
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        """
+        Raise the limit after a successful response.
+        """
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_overload(self):
+        """
+        Lower the limit after an overload response.
+        """
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        logging.warning(f"OMDB API overloaded, concurrency limit: {self.limit:.1f}")
+
+
+class RequestThrottle:
+    """
+    Throttle of the requests sent to the OMDB API, combining a rate limit and an
+    adaptive concurrency limit.
+
+    Attributes:
+        bucket (TokenBucket): The rate limiter.
+        concurrency (AdaptiveConcurrency): The concurrency limiter.
+    """
+
+    def __init__(self, bucket=None, concurrency=None):
+        """
+        Initializes the RequestThrottle.
+
+        Args:
+            bucket (TokenBucket, optional): The rate limiter. Defaults to 10 requests per second.
+            concurrency (AdaptiveConcurrency, optional): The concurrency limiter.
+                Defaults to 5 requests in flight, adapted between 1 and 20.
+        """
+        self.bucket = bucket if bucket is not None else TokenBucket()
+        self.concurrency = (
+            concurrency if concurrency is not None else AdaptiveConcurrency()
+        )
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a RequestThrottle from the fetcher configuration.
+
+        Args:
+            config (dict): The fetcher configuration, with the optional "rate_limit"
+                (rate, capacity) and "concurrency" (initial, minimum, maximum, decrease)
+                sections.
+
+        Returns:
+            RequestThrottle: The configured throttle.
+        """
+        return cls(
+            TokenBucket(**config.get("rate_limit", {})),
+            AdaptiveConcurrency(**config.get("concurrency", {})),
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Wait for a token and a concurrency slot, held until the request is completed.
+        """
+        await self.concurrency.acquire()
+        try:
+            await self.bucket.acquire()
+            yield
+        finally:
+            await self.concurrency.release()
+
+    def record(self, status):
+        """
+        Adapt the concurrency limit to the status of a response.
+
+        Args:
+            status (int): The HTTP status code of the response.
+        """
+        if status in OVERLOAD_STATUSES:
+            self.concurrency.on_overload()
+        else:
+            self.concurrency.on_success()
@@ -0,0 +1,307 @@
+from data_layer.models import MovieModel
+from data_layer.movie_count import MovieCount
+from data_layer.search import search_results, search_statement
+from data_layer.title_index import SIMILARITY_THRESHOLD, TitleIndex
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import OperationalError
+import asyncio
+import logging
+import orjson
+
+
+class AsyncMoviesRepository:
+    """
+    Repository class for accessing movie data in the database through an asyncio session.
+
+    It mirrors `MoviesRepository`, so the API handlers can query the database without
+    blocking the event loop. Read methods select the requested columns with Core queries
+    and return the rows as dictionaries, without building MovieModel objects.
+
+    Attributes:
+    - `session`: The SQLAlchemy async database session.
+    - `movie_count` (MovieCount): The cached number of movies in the database.
+    - `title_index` (TitleIndex): The title index of the database.
+
+    Methods:
+    - `count()`: Get the number of movies in the database.
+    - `is_database_empty()`: Check if the movie table exists and is empty.
+    - `add(movie)`: Add a movie to the database.
+    - `get_by_id(imdb_id)`: Get a movie by its IMDb ID.
+    - `get_by_title(title, fields=None)`: Get a movie by its title.
+    - `get_json_by_title(title)`: Get a movie by its title as a JSON document.
+    - `get_all(offset=0, limit=100, after=None, fields=None)`: Get all movies in the database.
+    - `search(query, limit=10, after=None, fields=None)`: Search movies by text.
+    - `load_title_index()`: Build the title index if it is not built yet.
+    - `suggest_titles(prefix, limit=10)`: Get the movies whose title starts with a prefix.
+    - `similar_titles(title, limit=5, threshold=SIMILARITY_THRESHOLD)`: Get the movies whose title is the closest to a title.
+    - `near_title(title)`: Get the movie whose title only differs from a title by typos.
+    - `delete_by_id(imdb_id)`: Delete a movie by its IMDb ID.
+    """
+
+    def __init__(self, session, movie_count=None, title_index=None):
+        """
+        Initialize the AsyncMoviesRepository with the given async database session.
+
+        Parameters:
+        - `session`: The SQLAlchemy async database session.
+        - `movie_count` (MovieCount, optional): The cached number of movies shared with
+          other repositories of the same database. Defaults to a count private to
+          this repository.
+        - `title_index` (TitleIndex, optional): The title index shared with
+          other repositories of the same database. Defaults to an index private to
+          this repository.
+        """
+        self.session = session
+        self.movie_count = movie_count if movie_count is not None else MovieCount()
+        self.title_index = title_index if title_index is not None else TitleIndex()
+
+    async def count(self):
+        """
+        Get the number of movies in the database.
+
+        The table is only counted when the cached count is unknown.
+
+        Returns:
+            int: The number of movies in the database.
+        """
+        if not self.movie_count.is_known():
+            self.movie_count.set(
+                await self.session.scalar(select(func.count()).select_from(MovieModel))
+            )
+        return self.movie_count.value
+
+    async def is_database_empty(self):
+        """
+        Check if the MovieModel table exists and it is empty
+        Returns:
+            bool: True if the table is empty or it does not exists, False otherwise.
+        """
+        try:
+            return await self.count() == 0
+        except OperationalError:
+            # Handle the case where the table does not exist
+            logging.info("The movies table does not exist in the database.")
+            return True
+        except Exception as e:
+            logging.error(f"Error : {e}")
+            return True
+
+    def add(self, movie):
+        """
+        Add a movie to the database.
+
+        Parameters:
+        - `movie`: The movie object to add to the database.
+        """
+        self.session.add(movie)
+        self.movie_count.adjust(1)
+        self.title_index.add([(movie.title, movie.imdb_id)])
+
+    async def get_by_id(self, imdb_id):
+        """
+        Get a movie by its IMDb ID.
+
+        Parameters:
+        - `imdb_id` (str): The IMDb ID of the movie to retrieve.
+
+        Returns:
+        - dict or None: A dictionary representing the movie if found, or None if not found.
+        """
+        result = await self.session.scalars(
+            select(MovieModel).where(MovieModel.imdb_id == imdb_id)
+        )
+        movie = result.one_or_none()
+        if movie:
+            return movie.to_dict()
+        else:
+            return None
+
+    async def get_by_title(self, title, fields=None):
+        """
+        Get a movie by its title, ignoring case, accents and punctuation. An exact title
+        match is preferred (see `MovieModel.title_match`).
+
+        Parameters:
+        - `title` (str): The title of the movie to retrieve.
+        - `fields` (list, optional): The fields to retrieve (see `models.FIELDS`).
+          Defaults to all of them.
+
+        Returns:
+        - dict or None: A dictionary representing the movie if found, or None if not found.
+        """
+        condition, order = MovieModel.title_match(title)
+        result = await self.session.execute(
+            select(*MovieModel.columns_for(fields))
+            .where(condition)
+            .order_by(*order)
+            .limit(1)
+        )
+        movie = result.mappings().first()
+        if movie:
+            return dict(movie)
+        else:
+            return None
+
+    async def get_json_by_title(self, title):
+        """
+        Get a movie by its title as a JSON document.
+
+        The title is matched like in `get_by_title`. The document stored on insert is
+        returned as it is. Movies saved without it are serialized from their columns.
+
+        Parameters:
+        - `title` (str): The title of the movie to retrieve.
+
+        Returns:
+        - bytes or None: The JSON document of the movie if found, or None if not found.
+        """
+        condition, order = MovieModel.title_match(title)
+        result = await self.session.execute(
+            select(MovieModel.json_blob).where(condition).order_by(*order).limit(1)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        if row.json_blob is None:
+            return orjson.dumps(await self.get_by_title(title))
+        return row.json_blob
+
+    async def get_all(self, offset=0, limit=100, after=None, fields=None):
+        """
+        Get all movies in the database, ordered by title (and IMDb ID for equal titles).
+
+        Parameters:
+        - `offset` (int): The offset for pagination.
+        - `limit` (int): The maximum number of movies to retrieve.
+        - `after` (tuple, optional): The (title, imdb_id) of the last movie of the previous
+          page. Only movies sorted after it are returned (keyset pagination), so deep
+          pages do not scan and discard the preceding rows.
+        - `fields` (list, optional): The fields to retrieve (see `models.FIELDS`).
+          Defaults to all of them.
+
+        Returns:
+        - list: A list of dictionaries representing the movies.
+        """
+        query = select(*MovieModel.columns_for(fields)).order_by(
+            MovieModel.title, MovieModel.imdb_id
+        )
+        if after is not None:
+            query = query.where(tuple_(MovieModel.title, MovieModel.imdb_id) > after)
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return [dict(movie) for movie in result.mappings()]
+
+    async def search(self, query, limit=10, after=None, fields=None):
+        """
+        Search the movies matching all the words of a query in their title, plot,
+        actors or director, best matches first (see `search.search_statement`).
+
+        Parameters:
+        - `query` (str): The search query.
+        - `limit` (int): The maximum number of movies to retrieve.
+        - `after` (tuple, optional): The (rank, key) ordering key of the last movie of
+          the previous page (keyset pagination).
+        - `fields` (list, optional): The fields to retrieve (see `models.FIELDS`).
+          Defaults to all of them.
+
+        Returns:
+        - list: The (movie, (rank, key)) of each movie found, the movie being a
+          dictionary and (rank, key) its ordering key (see `search.search_statement`).
+        """
+        dialect = self.session.get_bind().dialect.name
+        statement = search_statement(dialect, query, limit, after, fields)
+        if statement is None:
+            return []
+        result = await self.session.execute(statement)
+        return search_results(result.mappings())
+
+    async def load_title_index(self):
+        """
+        Build the title index from the movies table, if it is not built yet.
+        """
+        if not self.title_index.is_built():
+            rows = await self.session.execute(
+                select(MovieModel.title, MovieModel.imdb_id)
+            )
+            self.title_index.build(rows.tuples())
+
+    async def suggest_titles(self, prefix, limit=10):
+        """
+        Get the movies whose normalized title starts with a prefix, from the title index.
+
+        The index is built first if needed (see `load_title_index`).
+
+        Parameters:
+        - `prefix` (str): The beginning of the title (see `models.normalize_title`).
+        - `limit` (int): The maximum number of movies.
+
+        Returns:
+        - list: The (title, imdb_id) of the movies found, in normalized title order.
+        """
+        await self.load_title_index()
+        return self.title_index.suggest(prefix, limit)
+
+    async def similar_titles(self, title, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """
+        Get the movies whose title is the closest to a title, from the title index.
+
+        Titles are compared by trigrams, like PostgreSQL's pg_trgm does (see
+        `TitleIndex.similar`). The index is built first if needed (see
+        `load_title_index`).
+
+        Parameters:
+        - `title` (str): The title (see `models.normalize_title`).
+        - `limit` (int): The maximum number of movies.
+        - `threshold` (float): The minimum similarity of the titles, between 0 and 1.
+
+        Returns:
+        - list: The (title, imdb_id, similarity) of the movies found, by decreasing
+          similarity.
+        """
+        await self.load_title_index()
+        # Large catalogs take tens of milliseconds, so it runs in a worker thread
+        return await asyncio.to_thread(
+            self.title_index.similar, title, limit, threshold
+        )
+
+    async def near_title(self, title):
+        """
+        Get the movie whose title only differs from a title by typos, from the title index.
+
+        The index is built first if needed (see `load_title_index`).
+
+        Parameters:
+        - `title` (str): The title (see `TitleIndex.near_match`).
+
+        Returns:
+        - tuple or None: The (title, imdb_id) of the movie, or None if there is none.
+        """
+        await self.load_title_index()
+        return await asyncio.to_thread(self.title_index.near_match, title)
+
+    async def delete_by_id(self, imdb_id):
+        """
+        Delete a movie by its IMDb ID.
+
+        Parameters:
+        - `imdb_id` (str): The IMDb ID of the movie to delete.
+
+        Returns:
+        - bool: True if the movie was deleted successfully, False otherwise.
+        """
+        try:
+            movie = await self.session.get(MovieModel, imdb_id)
+            if movie:
+                # Delete the movie if found
+                await self.session.delete(movie)
+                await self.session.commit()
+                self.movie_count.adjust(-1)
+                self.title_index.remove([(movie.title, movie.imdb_id)])
+                return True
+            else:
+                return False
+        except Exception as e:
+            # Handle exceptions
+            await self.session.rollback()
+            self.movie_count.invalidate()
+            self.title_index.invalidate()
+            return False
@@ -0,0 +1,73 @@
+from data_layer.engine_registry import engine_registry
+from data_layer.movie_count import movie_counts
+from data_layer.title_index import title_indexes
+
+
+class AsyncUnitOfWork:
+    """
+    Unit of Work pattern for managing asyncio database sessions.
+
+    Attributes:
+    - `database` (str): The database connection string.
+    - `movie_count` (MovieCount): The cached number of movies of the database, shared with its repositories.
+    - `title_index` (TitleIndex): The title index of the database, shared with its repositories.
+    - `session_maker` (sqlalchemy.ext.asyncio.async_sessionmaker): The async session maker object.
+
+    Methods:
+    - `__init__(database)`: Initialize the AsyncUnitOfWork with the given database connection string.
+    - `__aenter__()`: Enter the async context manager and return the AsyncUnitOfWork instance.
+    - `__aexit__(exc_type, exc_val, traceback)`: Exit the async context manager and close the session.
+    - `commit()`: Commit the current transaction.
+    - `rollback()`: Rollback the current transaction.
+    """
+
+    def __init__(self, database="sqlite:///:memory:"):
+        """
+        Initialize the AsyncUnitOfWork with the given database connection string.
+
+        The async session maker (and its engine) is shared through the engine registry.
+        Blocking drivers in the URL are replaced by their asyncio counterpart.
+
+        Parameters:
+        - `database` (str): The database connection string.
+        """
+        self.movie_count = movie_counts.get(database)
+        self.title_index = title_indexes.get(database)
+        self.session_maker = engine_registry.get_async_session_maker(database)
+
+    async def __aenter__(self):
+        """
+        Enter the async context manager and return the AsyncUnitOfWork instance.
+        """
+        self.session = self.session_maker()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, traceback):
+        """
+        Exit the async context manager and close the session.
+
+        Parameters:
+        - `exc_type`: The exception type.
+        - `exc_val`: The exception value.
+        - `traceback`: The traceback object.
+        """
+        if exc_type is not None:
+            await self.rollback()
+        await self.session.close()
+
+    async def commit(self):
+        """
+        Commit the current transaction.
+        """
+        await self.session.commit()
+
+    async def rollback(self):
+        """
+        Rollback the current transaction.
+
+        The cached movie count and title index may include the discarded changes, so
+        they are invalidated.
+        """
+        await self.session.rollback()
+        self.movie_count.invalidate()
+        self.title_index.invalidate()
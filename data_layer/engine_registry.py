@@ -0,0 +1,239 @@
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Async drivers used in place of the blocking ones of the configured database URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+class EngineRegistry:
+    """
+    Process-wide registry of SQLAlchemy engines and session makers keyed by database URL.
+
+    Building an engine sets up a connection pool and the dialect, so it is done once per
+    database URL and shared by every `UnitOfWork`, `AsyncUnitOfWork` and the
+    `MovieDataFetcher`.
+
+    Attributes:
+    - `pool_options` (dict): The connection pool options used for new engines.
+    - `engines` (dict): The engines created so far, keyed by database URL.
+    - `session_makers` (dict): The session makers bound to each engine, keyed by database URL.
+    - `async_engines` (dict): The async engines created so far, keyed by database URL.
+    - `async_session_makers` (dict): The async session makers, keyed by database URL.
+
+    Methods:
+    - `configure(...)`: Set the connection pool options used for new engines.
+    - `get_engine(database)`: Get (or create) the engine for a database URL.
+    - `get_session_maker(database)`: Get (or create) the session maker for a database URL.
+    - `get_async_engine(database)`: Get (or create) the async engine for a database URL.
+    - `get_async_session_maker(database)`: Get (or create) the async session maker.
+    - `dispose(database=None)`: Dispose the engines of a database, or of all of them.
+    - `dispose_async(database=None)`: Dispose the async and the blocking engines too.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty EngineRegistry with the default pool options.
+        """
+        self.pool_options = {}
+        self.engines = {}
+        self.session_makers = {}
+        self.async_engines = {}
+        self.async_session_makers = {}
+        self.configure()
+
+    def configure(
+        self, pool_size=5, max_overflow=10, pool_pre_ping=True, pool_recycle=1800
+    ):
+        """
+        Set the connection pool options used for new engines.
+
+        Engines already in the registry keep the options they were created with.
+
+        Parameters:
+        - `pool_size` (int): The number of connections kept open in the pool.
+        - `max_overflow` (int): The number of connections allowed beyond `pool_size`.
+        - `pool_pre_ping` (bool): Test connections for liveness before using them.
+        - `pool_recycle` (int): Seconds after which a connection is replaced (-1 disables it).
+        """
+        self.pool_options = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_pre_ping": pool_pre_ping,
+            "pool_recycle": pool_recycle,
+        }
+
+    @staticmethod
+    def async_url(database):
+        """
+        Get the URL of a database using its asyncio driver.
+
+        Parameters:
+        - `database` (str): The database connection string (e.g. `sqlite:///movies.db`).
+
+        Returns:
+        - str: The connection string for the async driver (e.g. `sqlite+aiosqlite:///movies.db`).
+        """
+        url = make_url(database)
+        if url.get_dialect().is_async:
+            return database
+        backend = url.get_backend_name()
+        if backend not in ASYNC_DRIVERS:
+            raise ValueError(f"No asyncio driver configured for {backend} databases")
+        return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+            hide_password=False
+        )
+
+    def engine_options(self, database, use_async=False):
+        """
+        Get the create_engine options for a database URL.
+
+        Pool sizing only applies to queue pools; in-memory SQLite databases use a single
+        connection, so they keep their default pool and only get the liveness options.
+        aiosqlite defaults to opening a connection (and its thread) per checkout, so file
+        databases get an async queue pool instead.
+
+        Parameters:
+        - `database` (str): The database connection string.
+        - `use_async` (bool): Whether the options are for an async engine.
+
+        Returns:
+        - dict: The keyword arguments for `create_engine` / `create_async_engine`.
+        """
+        options = dict(self.pool_options)
+        url = make_url(database)
+        pool_class = url.get_dialect().get_pool_class(url)
+        sqlite_file = url.get_backend_name() == "sqlite" and url.database not in (
+            None,
+            "",
+            ":memory:",
+        )
+        if use_async and sqlite_file:
+            options["poolclass"] = pool_class = AsyncAdaptedQueuePool
+        if not issubclass(pool_class, QueuePool):
+            del options["pool_size"]
+            del options["max_overflow"]
+        return options
+
+    def get_engine(self, database):
+        """
+        Get the engine for a database URL, creating it on first use.
+
+        Parameters:
+        - `database` (str): The database connection string.
+
+        Returns:
+        - sqlalchemy.engine.Engine: The shared engine.
+        """
+        database = str(database)
+        engine = self.engines.get(database)
+        if engine is None:
+            engine = create_engine(database, **self.engine_options(database))
+            self.engines[database] = engine
+        return engine
+
+    def get_session_maker(self, database):
+        """
+        Get the session maker bound to the engine of a database URL.
+
+        Parameters:
+        - `database` (str): The database connection string.
+
+        Returns:
+        - sqlalchemy.orm.session.sessionmaker: The shared session maker.
+        """
+        database = str(database)
+        session_maker = self.session_makers.get(database)
+        if session_maker is None:
+            session_maker = sessionmaker(bind=self.get_engine(database))
+            self.session_makers[database] = session_maker
+        return session_maker
+
+    def get_async_engine(self, database):
+        """
+        Get the async engine for a database URL, creating it on first use.
+
+        Parameters:
+        - `database` (str): The database connection string. Blocking drivers are replaced
+          by their asyncio counterpart (aiosqlite, asyncpg).
+
+        Returns:
+        - sqlalchemy.ext.asyncio.AsyncEngine: The shared async engine.
+        """
+        database = str(database)
+        engine = self.async_engines.get(database)
+        if engine is None:
+            async_database = self.async_url(database)
+            engine = create_async_engine(
+                async_database, **self.engine_options(async_database, use_async=True)
+            )
+            self.async_engines[database] = engine
+        return engine
+
+    def get_async_session_maker(self, database):
+        """
+        Get the async session maker bound to the async engine of a database URL.
+
+        Parameters:
+        - `database` (str): The database connection string.
+
+        Returns:
+        - sqlalchemy.ext.asyncio.async_sessionmaker: The shared async session maker.
+        """
+        database = str(database)
+        session_maker = self.async_session_makers.get(database)
+        if session_maker is None:
+            session_maker = async_sessionmaker(
+                bind=self.get_async_engine(database), expire_on_commit=False
+            )
+            self.async_session_makers[database] = session_maker
+        return session_maker
+
+    def dispose(self, database=None):
+        """
+        Dispose the engines (closing their pooled connections) and remove them from the
+        registry.
+
+        Async engines are dropped from the registry, their connections are only closed
+        by `dispose_async()`.
+
+        Parameters:
+        - `database` (str, optional): The database connection string whose engines are
+          disposed. Defaults to every database.
+        """
+        if database is None:
+            databases = {*self.engines, *self.async_engines}
+        else:
+            databases = {str(database)}
+        for url in databases:
+            engine = self.engines.pop(url, None)
+            if engine is not None:
+                engine.dispose()
+            self.session_makers.pop(url, None)
+            self.async_engines.pop(url, None)
+            self.async_session_makers.pop(url, None)
+
+    async def dispose_async(self, database=None):
+        """
+        Dispose the async and the blocking engines and remove them from the registry.
+
+        Parameters:
+        - `database` (str, optional): The database connection string whose engines are
+          disposed. Defaults to every database.
+        """
+        if database is None:
+            engines = list(self.async_engines.values())
+        else:
+            engines = [self.async_engines.get(str(database))]
+        for engine in engines:
+            if engine is not None:
+                await engine.dispose()
+        self.dispose(database)
+
+
+engine_registry = EngineRegistry()
@@ -1,15 +1,121 @@
-from sqlalchemy import Column, Integer, String, Text, JSON
-from sqlalchemy.orm import declarative_base
+import datetime
+import re
+import unicodedata
+
+import orjson
+from sqlalchemy import DDL, Column, Index, Integer, LargeBinary, String, Text, JSON
+from sqlalchemy import BigInteger, Date, Float
+from sqlalchemy import event
+from sqlalchemy.orm import declarative_base, validates
 
 Base = declarative_base()
 
+# Runs of characters separating the words of a normalized title
+NON_WORD = re.compile(r"[\W_]+")
+# Numbers as written by the OMDB API ("1,234", "$12,345,678", "142 min", "7.5")
+INTEGER = re.compile(r"\d+(?:,\d{3})*")
+DECIMAL = re.compile(r"\d+(?:\.\d+)?")
+# Months of the release dates of the OMDB API ("16 Jul 2010")
+MONTHS = {
+    month: number
+    for number, month in enumerate(
+        "jan feb mar apr may jun jul aug sep oct nov dec".split(), start=1
+    )
+}
+
+
+def normalize_title(title):
+    """
+    Normalize a title for case- and accent-insensitive matching.
+
+    Accents are removed, the case is folded and punctuation and repeated spaces are
+    collapsed, so "Amélie" and "amelie" or "Star Wars: Episode IV" and "star wars
+    episode iv" match.
+
+    Args:
+        title (str): The title, or a prefix of it.
+
+    Returns:
+        str: The normalized title, its words separated by single spaces.
+    """
+    title = title or ""
+    if not title.isascii():
+        decomposed = unicodedata.normalize("NFKD", title)
+        title = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_WORD.sub(" ", title.casefold()).strip()
+
+
+def parse_integer(text):
+    """
+    Parse the first whole number of a value of the OMDB API.
+
+    Thousands separators are allowed and units are ignored, so "1,234" is 1234,
+    "$12,345,678" is 12345678, "142 min" is 142 and "2010–2015" is 2010.
+
+    Args:
+        text (str): The value, e.g. a year, runtime, vote count or box office.
+
+    Returns:
+        int: The number, or None if the value has none (e.g. "N/A").
+    """
+    match = INTEGER.search(str(text or ""))
+    return int(match.group().replace(",", "")) if match else None
+
+
+def parse_decimal(text):
+    """
+    Parse the first decimal number of a value of the OMDB API (e.g. "7.5").
+
+    Args:
+        text (str): The value, e.g. an IMDb rating.
+
+    Returns:
+        float: The number, or None if the value has none (e.g. "N/A").
+    """
+    match = DECIMAL.search(str(text or ""))
+    return float(match.group()) if match else None
+
+
+def parse_date(text):
+    """
+    Parse a date of the OMDB API, written as "16 Jul 2010".
+
+    Args:
+        text (str): The value, e.g. a release date.
+
+    Returns:
+        datetime.date: The date, or None if the value is not a date (e.g. "N/A").
+    """
+    try:
+        day, month, year = str(text or "").split()
+        return datetime.date(int(year), MONTHS[month[:3].lower()], int(day))
+    except (KeyError, ValueError):
+        return None
+
+
+# Columns derived from other columns of the movies: the source attribute and parser of
+# each one. They are kept in sync with ORM objects (see `MovieModel.derive`) and
+# computed by Core inserts (see `MovieModel.derived_values`).
+DERIVED_COLUMNS = {
+    "title_normalized": ("title", normalize_title),
+    "year_number": ("year", parse_integer),
+    "released_date": ("released", parse_date),
+    "runtime_minutes": ("runtime", parse_integer),
+    "metascore_number": ("metascore", parse_integer),
+    "imdb_rating_number": ("imdb_rating", parse_decimal),
+    "imdb_votes_number": ("imdb_votes", parse_integer),
+    "box_office_number": ("box_office", parse_integer),
+}
+
 
 class MovieModel(Base):
     """
     Model representing a movie.
 
     Attributes:
-        imdb_id (str): The IMDb ID of the movie (primary key).
+        id (int): The row ID of the movie, a stable integer key for the full-text
+            search index (primary key of the table).
+        imdb_id (str): The IMDb ID of the movie (primary key of the ORM identity).
         title (str): The title of the movie.
         year (str): The release year of the movie.
         rated (str): The rating of the movie.
@@ -34,11 +140,46 @@ class MovieModel(Base):
         production (str): The production company of the movie.
         website (str): The official website of the movie.
         response (str): The response status of the movie.
+        json_blob (bytes): The movie serialized as JSON (see `to_json`), stored on insert
+            so it can be returned without encoding it on every request.
+        title_normalized (str): The title normalized by `normalize_title`, set with the
+            title, so title lookups ignore case and accents and still use an index.
+        year_number (int): The first year of `year` (the start year of series).
+        released_date (datetime.date): The release date, parsed from `released`.
+        runtime_minutes (int): The duration in minutes, parsed from `runtime`.
+        metascore_number (int): The metascore, parsed from `metascore`.
+        imdb_rating_number (float): The IMDb rating, parsed from `imdb_rating`.
+        imdb_votes_number (int): The number of IMDb votes, parsed from `imdb_votes`.
+        box_office_number (int): The box office earnings in dollars, parsed from
+            `box_office`.
+
+    The typed columns are NULL when OMDB has no value ("N/A") and are indexed, so
+    movies can be filtered and sorted by them in SQL (see `DERIVED_COLUMNS`).
     """
 
     __tablename__ = "movies"
+    __table_args__ = (
+        # Upserts resolve conflicts on the IMDb ID (ON CONFLICT (imdb_id))
+        Index("ix_movies_imdb_id", "imdb_id", unique=True),
+        # Title lookups and the (title, imdb_id) ordering / keyset pagination of listings
+        Index("ix_movies_title_imdb_id", "title", "imdb_id"),
+        Index("ix_movies_year", "year"),
+        Index("ix_movies_type_year", "type", "year"),
+        Index("ix_movies_title_normalized", "title_normalized"),
+        # Range filters and ordering by the typed columns
+        Index("ix_movies_year_number", "year_number"),
+        Index("ix_movies_released_date", "released_date"),
+        Index("ix_movies_runtime_minutes", "runtime_minutes"),
+        Index("ix_movies_metascore_number", "metascore_number"),
+        Index("ix_movies_imdb_rating_number", "imdb_rating_number"),
+        Index("ix_movies_imdb_votes_number", "imdb_votes_number"),
+        Index("ix_movies_box_office_number", "box_office_number"),
+    )
 
-    imdb_id = Column(String, primary_key=True)
+    # SQLite keeps the rowid of a table without an INTEGER PRIMARY KEY only until the
+    # next VACUUM, so the full-text index is keyed on this column instead
+    id = Column(Integer, primary_key=True)
+    imdb_id = Column(String, nullable=False)
     title = Column(String)
     year = Column(String)
     rated = Column(String)
@@ -62,6 +203,77 @@ class MovieModel(Base):
     box_office = Column(String)
     production = Column(String)
     website = Column(String)
+    json_blob = Column(LargeBinary)
+    title_normalized = Column(String)
+    year_number = Column(Integer)
+    released_date = Column(Date)
+    runtime_minutes = Column(Integer)
+    metascore_number = Column(Integer)
+    imdb_rating_number = Column(Float)
+    imdb_votes_number = Column(Integer)
+    box_office_number = Column(BigInteger)
+
+    # Movies are identified by their IMDb ID, e.g. by `Session.get`
+    __mapper_args__ = {"primary_key": [imdb_id]}
+
+    @validates(*{source for source, _ in DERIVED_COLUMNS.values()})
+    def derive(self, key, value):
+        """
+        Keep the derived columns of an attribute in sync on ORM objects.
+
+        Core inserts set them themselves (see `MoviesRepository.bulk_upsert`).
+
+        Args:
+            key (str): The name of the attribute.
+            value (str): The new value.
+
+        Returns:
+            str: The value, unchanged.
+        """
+        for column, (source, parse) in DERIVED_COLUMNS.items():
+            if source == key:
+                setattr(self, column, parse(value))
+        return value
+
+    @staticmethod
+    def derived_values(row):
+        """
+        Compute the derived columns of a movie given as a dictionary of attributes.
+
+        Args:
+            row (dict): The movie attribute values, keyed by attribute name.
+
+        Returns:
+            dict: The value of each column of `DERIVED_COLUMNS`.
+        """
+        return {
+            column: parse(row.get(source))
+            for column, (source, parse) in DERIVED_COLUMNS.items()
+        }
+
+    @classmethod
+    def title_match(cls, title):
+        """
+        Get the condition and ordering selecting the movie of a title.
+
+        Movies are matched by their indexed normalized title, so "the lion king" finds
+        "The Lion King". When several movies match, the one with exactly this title
+        comes first, then the lowest IMDb ID. Titles without any word are matched
+        exactly.
+
+        Args:
+            title (str): The requested title.
+
+        Returns:
+            tuple: The WHERE condition and the ORDER BY clauses.
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return cls.title == title, (cls.imdb_id,)
+        return cls.title_normalized == normalized, (
+            (cls.title == title).desc(),
+            cls.imdb_id,
+        )
 
     def to_dict(self):
         """
@@ -70,29 +282,147 @@ class MovieModel(Base):
         Returns:
             dict: A dictionary containing all attributes of the movie.
         """
-        return {
-            "Title": self.title,
-            "Year": self.year,
-            "Rated": self.rated,
-            "Released": self.released,
-            "Runtime": self.runtime,
-            "Genre": self.genre,
-            "Director": self.director,
-            "Writer": self.writer,
-            "Actors": self.actors,
-            "Plot": self.plot,
-            "Language": self.language,
-            "Country": self.country,
-            "Awards": self.awards,
-            "Poster": self.poster,
-            "Ratings": self.ratings,
-            "Metascore": self.metascore,
-            "imdbRating": self.imdb_rating,
-            "imdbVotes": self.imdb_votes,
-            "imdbID": self.imdb_id,
-            "Type": self.type,
-            "DVD": self.dvd,
-            "BoxOffice": self.box_office,
-            "Production": self.production,
-            "Website": self.website,
-        }
+        return {field: getattr(self, attribute) for field, attribute in FIELDS.items()}
+
+    def to_json(self):
+        """
+        Serialize the movie attributes to JSON.
+
+        Returns:
+            bytes: The JSON document of `to_dict`.
+        """
+        return orjson.dumps(self.to_dict())
+
+    @staticmethod
+    def json_for(row):
+        """
+        Serialize a movie given as a dictionary of attributes, like `to_json`, without
+        building a MovieModel.
+
+        Args:
+            row (dict): The movie attribute values, keyed by attribute name.
+
+        Returns:
+            bytes: The JSON document of the movie.
+        """
+        return orjson.dumps(
+            {field: row.get(attribute) for field, attribute in FIELDS.items()}
+        )
+
+    @classmethod
+    def columns_for(cls, fields=None):
+        """
+        Get the columns of the given API fields, labeled with the field names.
+
+        Selecting them with a Core `select()` returns rows that map straight to the
+        dictionaries of `to_dict`, without building MovieModel objects.
+
+        Args:
+            fields (list, optional): The API field names (see `FIELDS`). Defaults to all of them.
+
+        Returns:
+            list: The labeled columns, in the order of `FIELDS`.
+        """
+        if fields is None:
+            fields = FIELDS
+        return [
+            getattr(cls, attribute).label(field)
+            for field, attribute in FIELDS.items()
+            if field in fields
+        ]
+
+
+# API field names (as returned by the OMDB API) and the MovieModel attribute of each one
+FIELDS = {
+    "Title": "title",
+    "Year": "year",
+    "Rated": "rated",
+    "Released": "released",
+    "Runtime": "runtime",
+    "Genre": "genre",
+    "Director": "director",
+    "Writer": "writer",
+    "Actors": "actors",
+    "Plot": "plot",
+    "Language": "language",
+    "Country": "country",
+    "Awards": "awards",
+    "Poster": "poster",
+    "Ratings": "ratings",
+    "Metascore": "metascore",
+    "imdbRating": "imdb_rating",
+    "imdbVotes": "imdb_votes",
+    "imdbID": "imdb_id",
+    "Type": "type",
+    "DVD": "dvd",
+    "BoxOffice": "box_office",
+    "Production": "production",
+    "Website": "website",
+}
+
+
+# Triggers keeping the SQLite full-text search index in sync with the movies, by name.
+# Bulk loads drop them and rebuild the index once instead (see
+# `MoviesRepository.deferred_search_index`).
+SQLITE_SEARCH_TRIGGERS = {
+    "movies_fts_insert": (
+        "CREATE TRIGGER movies_fts_insert AFTER INSERT ON movies BEGIN "
+        "INSERT INTO movies_fts(rowid, title, plot, actors, director) "
+        "VALUES (new.id, new.title, new.plot, new.actors, new.director); END"
+    ),
+    "movies_fts_delete": (
+        "CREATE TRIGGER movies_fts_delete AFTER DELETE ON movies BEGIN "
+        "INSERT INTO movies_fts(movies_fts, rowid, title, plot, actors, director) "
+        "VALUES ('delete', old.id, old.title, old.plot, old.actors, old.director); "
+        "END"
+    ),
+    # Only the indexed columns are watched, so other updates leave the index alone
+    "movies_fts_update": (
+        "CREATE TRIGGER movies_fts_update "
+        "AFTER UPDATE OF title, plot, actors, director ON movies BEGIN "
+        "INSERT INTO movies_fts(movies_fts, rowid, title, plot, actors, director) "
+        "VALUES ('delete', old.id, old.title, old.plot, old.actors, old.director); "
+        "INSERT INTO movies_fts(rowid, title, plot, actors, director) "
+        "VALUES (new.id, new.title, new.plot, new.actors, new.director); END"
+    ),
+}
+
+# Full-text search index of the movies (see `data_layer.search`), created with the
+# movies table. The migration adding it to existing databases is c4e7a1d9f2b6.
+SQLITE_SEARCH_DDL = [
+    # External content table: the text is read from the movies table, by ID
+    "CREATE VIRTUAL TABLE movies_fts USING fts5("
+    "title, plot, actors, director, content='movies', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    # Ranking: title matches weigh the most, then people, then the plot
+    "INSERT INTO movies_fts(movies_fts, rank) "
+    "VALUES('rank', 'bm25(10.0, 1.0, 2.0, 2.0)')",
+    *SQLITE_SEARCH_TRIGGERS.values(),
+]
+POSTGRESQL_SEARCH_DDL = [
+    "ALTER TABLE movies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(director, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(actors, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(plot, '')), 'C')) STORED",
+    "CREATE INDEX ix_movies_search_vector ON movies USING GIN (search_vector)",
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        MovieModel.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+for statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(
+        MovieModel.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+# The triggers are dropped with the movies table, the FTS5 table is not
+event.listen(
+    MovieModel.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS movies_fts").execute_if(dialect="sqlite"),
+)
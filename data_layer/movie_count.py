@@ -0,0 +1,118 @@
+import time
+
+# Seconds a computed count is trusted, so the writes of other processes (other workers
+# or replicas sharing the database) are seen within that delay
+COUNT_TTL = 5.0
+
+
+class MovieCount:
+    """
+    Cached number of movies stored in a database.
+
+    The count is computed by the repositories and then kept up to date by the writes
+    made through them, so read requests do not run `SELECT count(*)` every time. It is
+    computed again once it is `ttl` seconds old, so writes made by other processes are
+    seen within that delay. An empty database is never cached: it is counted again on
+    every use until movies are stored, by this process or another one.
+
+    Attributes:
+    - `value` (int or None): The number of movies, or None if it is not known yet.
+    - `ttl` (float): The number of seconds a computed count is trusted.
+    - `expires_at` (float): The `time.monotonic()` time the count expires at.
+
+    Methods:
+    - `is_known()`: Check if the count has been computed.
+    - `set(value)`: Store a freshly computed count.
+    - `adjust(delta)`: Add `delta` to a known count.
+    - `invalidate()`: Forget the count, so it is computed again on next use.
+    """
+
+    def __init__(self, ttl=COUNT_TTL):
+        """
+        Initialize the MovieCount with an unknown value.
+
+        Parameters:
+        - `ttl` (float): The number of seconds a computed count is trusted.
+        """
+        self.value = None
+        self.ttl = ttl
+        self.expires_at = 0.0
+
+    def is_known(self):
+        """
+        Check if the count has been computed, is not empty and has not expired.
+
+        Returns:
+        - bool: True if the count is known, False otherwise.
+        """
+        return bool(self.value) and time.monotonic() < self.expires_at
+
+    def set(self, value):
+        """
+        Store a freshly computed count, trusted for `ttl` seconds.
+
+        Parameters:
+        - `value` (int): The number of movies in the database.
+        """
+        self.value = value
+        self.expires_at = time.monotonic() + self.ttl
+
+    def adjust(self, delta):
+        """
+        Add `delta` to the count. Unknown counts stay unknown.
+
+        Parameters:
+        - `delta` (int): The number of movies added (or removed, if negative).
+        """
+        if self.value is not None:
+            self.value = max(self.value + delta, 0)
+
+    def invalidate(self):
+        """
+        Forget the count, so it is computed again on next use.
+        """
+        self.value = None
+
+
+class MovieCountRegistry:
+    """
+    Process-wide registry of the cached movie counts keyed by database URL.
+
+    Methods:
+    - `get(database)`: Get the movie count of a database URL.
+    - `clear(database=None)`: Forget the count of a database, or every count.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty MovieCountRegistry.
+        """
+        self.counts = {}
+
+    def get(self, database):
+        """
+        Get the movie count of a database URL, creating it on first use.
+
+        Parameters:
+        - `database` (str): The database connection string.
+
+        Returns:
+        - MovieCount: The shared movie count of the database.
+        """
+        return self.counts.setdefault(str(database), MovieCount())
+
+    def clear(self, database=None):
+        """
+        Forget the count of a database, or every count.
+
+        Parameters:
+        - `database` (str, optional): The database connection string. Defaults to every
+          database.
+        """
+        if database is None:
+            self.counts.clear()
+        else:
+            self.counts.pop(str(database), None)
+
+
+movie_counts = MovieCountRegistry()
@@ -1,7 +1,31 @@
-from data_layer.models import MovieModel
+from contextlib import contextmanager
+from data_layer.models import DERIVED_COLUMNS, SQLITE_SEARCH_TRIGGERS, MovieModel
+from data_layer.movie_count import MovieCount
+from data_layer.search import search_results, search_statement
+from data_layer.title_index import SIMILARITY_THRESHOLD, TitleIndex
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import OperationalError
 import logging
 
+# Maximum number of IDs bound in an IN clause (SQLite allows 999 variables before 3.32)
+ID_CHUNK_SIZE = 500
+
+# Number of rows sent per executemany by bulk upserts
+UPSERT_CHUNK_SIZE = 1000
+
+# Bulk upserts of at least this many rows, and of at least this share of the movies
+# stored after them, rebuild the SQLite full-text index once instead of row by row:
+# a rebuild reads the whole table, about 10 times faster per row than the triggers
+REBUILD_SEARCH_INDEX_ROWS = 1000
+REBUILD_SEARCH_INDEX_SHARE = 0.1
+
+# INSERT constructs supporting ON CONFLICT, by dialect
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
 
 class MoviesRepository:
     """
@@ -9,24 +33,58 @@ class MoviesRepository:
 
     Attributes:
     - `session`: The SQLAlchemy database session.
+    - `movie_count` (MovieCount): The cached number of movies in the database.
+    - `title_index` (TitleIndex): The title index of the database.
 
     Methods:
+    - `count()`: Get the number of movies in the database.
     - `is_database_empty()`: Check if the movie table exists and is empty.
     - `add(movie)`: Add a movie to the database.
+    - `bulk_upsert(rows)`: Insert movies, or update them if they already exist.
+    - `deferred_search_index()`: Rebuild the full-text index once after many writes.
     - `get_by_id(imdb_id)`: Get a movie by its IMDb ID.
+    - `existing_ids(imdb_ids)`: Get the IMDb IDs already stored in the database.
+    - `existing_titles(imdb_ids)`: Get the titles of the IMDb IDs already stored.
     - `get_by_title(title)`: Get a movie by its title.
-    - `get_all(offset=0, limit=100)`: Get all movies in the database.
+    - `get_all(offset=0, limit=100, after=None)`: Get all movies in the database.
+    - `search(query, limit=10, after=None, fields=None)`: Search movies by text.
+    - `load_title_index()`: Build the title index if it is not built yet.
+    - `suggest_titles(prefix, limit=10)`: Get the movies whose title starts with a prefix.
+    - `similar_titles(title, limit=5, threshold=SIMILARITY_THRESHOLD)`: Get the movies whose title is the closest to a title.
+    - `near_title(title)`: Get the movie whose title only differs from a title by typos.
     - `delete_by_id(imdb_id)`: Delete a movie by its IMDb ID.
     """
 
-    def __init__(self, session):
+    def __init__(self, session, movie_count=None, title_index=None):
         """
         Initialize the MoviesRepository with the given database session.
 
         Parameters:
         - `session`: The SQLAlchemy database session.
+        - `movie_count` (MovieCount, optional): The cached number of movies shared with
+          other repositories of the same database. Defaults to a count private to
+          this repository.
+        - `title_index` (TitleIndex, optional): The title index shared with
+          other repositories of the same database. Defaults to an index private to
+          this repository.
         """
         self.session = session
+        self.movie_count = movie_count if movie_count is not None else MovieCount()
+        self.title_index = title_index if title_index is not None else TitleIndex()
+        self.search_index_deferred = False
+
+    def count(self):
+        """
+        Get the number of movies in the database.
+
+        The table is only counted when the cached count is unknown.
+
+        Returns:
+            int: The number of movies in the database.
+        """
+        if not self.movie_count.is_known():
+            self.movie_count.set(self.session.query(MovieModel).count())
+        return self.movie_count.value
 
     def is_database_empty(self):
         """
@@ -35,8 +93,7 @@ class MoviesRepository:
             bool: True if the table is empty or it does not exists, False otherwise.
         """
         try:
-            num_records = self.session.query(MovieModel).count()
-            return num_records == 0
+            return self.count() == 0
         except OperationalError:
             # Handle the case where the table does not exist
             logging.info("The movies table does not exist in the database.")
@@ -53,6 +110,158 @@ class MoviesRepository:
         - `movie`: The movie object to add to the database.
         """
         self.session.add(movie)
+        self.movie_count.adjust(1)
+        self.title_index.add([(movie.title, movie.imdb_id)])
+
+    def bulk_upsert(self, rows, chunk_size=UPSERT_CHUNK_SIZE):
+        """
+        Insert movies, or update them if they already exist.
+
+        Rows are sent with a dialect-native `INSERT ... ON CONFLICT (imdb_id) DO UPDATE`
+        executed once per chunk (executemany), without building MovieModel objects, so a
+        movie saved concurrently by another request updates the stored one instead of
+        failing the whole batch. The JSON document and derived columns of each movie (the
+        normalized title and the typed year, ratings, votes, runtime and box office, see
+        `models.DERIVED_COLUMNS`) are computed from the row. A movie repeated within a
+        chunk is sent once, with its last row, as PostgreSQL rejects an upsert updating
+        the same row twice. Large loads rebuild the full-text index once instead of row
+        by row (see `deferred_search_index`), and the title index is updated once for
+        all the rows. The changes are committed by the caller.
+
+        Parameters:
+        - `rows` (list): The movies, as dictionaries keyed by MovieModel attribute.
+          Unknown keys are ignored and missing attributes are stored as NULL.
+        - `chunk_size` (int): The maximum number of rows per statement.
+
+        Returns:
+        - tuple: The number of movies inserted and updated.
+
+        Raises:
+        - ValueError: If the database dialect does not support upserts.
+        """
+        dialect = self.session.get_bind().dialect.name
+        if dialect not in UPSERT_INSERTS:
+            raise ValueError(f"Bulk upsert is not supported for {dialect} databases")
+        if (
+            not self.search_index_deferred
+            and len(rows) >= REBUILD_SEARCH_INDEX_ROWS
+            and len(rows) >= REBUILD_SEARCH_INDEX_SHARE * (self.count() + len(rows))
+        ):
+            with self.deferred_search_index():
+                return self.bulk_upsert(rows, chunk_size)
+
+        table = MovieModel.__table__
+        columns = [
+            column.name
+            for column in table.columns
+            if not column.primary_key
+            and column.name != "json_blob"
+            and column.name not in DERIVED_COLUMNS
+        ]
+        statement = UPSERT_INSERTS[dialect](table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.imdb_id],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if not column.primary_key and column.name != "imdb_id"
+            },
+        )
+
+        inserted = updated = 0
+        # The titles of the new and renamed movies before (None if new) and after
+        previous_titles, titles_after = {}, {}
+        for start in range(0, len(rows), chunk_size):
+            # The values of each movie (the last row of a repeated movie wins)
+            chunk = {}
+            for row in rows[start : start + chunk_size]:
+                values = {column: row.get(column) for column in columns}
+                values["json_blob"] = MovieModel.json_for(values)
+                values.update(MovieModel.derived_values(values))
+                chunk[values["imdb_id"]] = values
+            titles = {imdb_id: values["title"] for imdb_id, values in chunk.items()}
+            existing = self.existing_titles(titles)
+            self.session.execute(statement, list(chunk.values()))
+            inserted += len(titles.keys() - existing.keys())
+            updated += len(titles.keys() & existing.keys())
+            # Only new and renamed movies change the title index
+            for imdb_id, title in titles.items():
+                if imdb_id not in existing or existing[imdb_id] != title:
+                    previous_titles.setdefault(imdb_id, existing.get(imdb_id))
+                    titles_after[imdb_id] = title
+
+        changed = {
+            imdb_id: title
+            for imdb_id, title in titles_after.items()
+            if previous_titles[imdb_id] != title
+        }
+        self.title_index.update(
+            removed=[
+                (previous_titles[imdb_id], imdb_id)
+                for imdb_id in changed
+                if previous_titles[imdb_id] is not None
+            ],
+            added=[(title, imdb_id) for imdb_id, title in changed.items()],
+        )
+        self.movie_count.adjust(inserted)
+        return inserted, updated
+
+    @contextmanager
+    def deferred_search_index(self):
+        """
+        Rebuild the full-text search index once after a block of writes, instead of
+        updating it row by row.
+
+        On SQLite, the triggers maintaining `movies_fts` are dropped for the block, then
+        the index is rebuilt from the movies table and the triggers are created again,
+        with the changes of the block. The rebuild reads the whole table, so it only
+        pays off for large loads. If the block commits, movies written meanwhile by
+        other sessions are indexed by the rebuild. If the block fails, the session is
+        rolled back, and the index and its triggers are restored and committed right
+        away. On PostgreSQL, the search vector is a generated column, so nothing is
+        deferred.
+
+        Yields:
+        - None: The block runs with the index deferred.
+        """
+        if (
+            self.search_index_deferred
+            or self.session.get_bind().dialect.name != "sqlite"
+        ):
+            yield
+            return
+
+        connection = self.session.connection()
+        for name in SQLITE_SEARCH_TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        self.search_index_deferred = True
+        try:
+            yield
+        except BaseException:
+            # The chunks committed by the block must not stay out of the index
+            self.session.rollback()
+            self.movie_count.invalidate()
+            self.title_index.invalidate()
+            self.rebuild_search_index()
+            self.session.commit()
+            raise
+        else:
+            self.rebuild_search_index()
+        finally:
+            self.search_index_deferred = False
+
+    def rebuild_search_index(self):
+        """
+        Rebuild the SQLite full-text index from the movies table and create its
+        triggers, replacing them if they exist.
+        """
+        connection = self.session.connection()
+        for name, trigger in SQLITE_SEARCH_TRIGGERS.items():
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            connection.exec_driver_sql(trigger)
+        connection.exec_driver_sql(
+            "INSERT INTO movies_fts(movies_fts) VALUES('rebuild')"
+        )
 
     def get_by_id(self, imdb_id):
         """
@@ -74,9 +283,57 @@ class MoviesRepository:
         else:
             return None
 
+    def existing_ids(self, imdb_ids, chunk_size=ID_CHUNK_SIZE):
+        """
+        Get the IMDb IDs already stored in the database.
+
+        Only the IDs are selected, with one `IN` query per chunk of IDs, instead of
+        loading each movie.
+
+        Parameters:
+        - `imdb_ids` (iterable): The IMDb IDs to look for.
+        - `chunk_size` (int): The maximum number of IDs per query.
+
+        Returns:
+        - set: The IMDb IDs found in the database.
+        """
+        imdb_ids = list(dict.fromkeys(imdb_ids))
+        existing = set()
+        for start in range(0, len(imdb_ids), chunk_size):
+            chunk = imdb_ids[start : start + chunk_size]
+            rows = self.session.query(MovieModel.imdb_id).filter(
+                MovieModel.imdb_id.in_(chunk)
+            )
+            existing.update(imdb_id for (imdb_id,) in rows)
+        return existing
+
+    def existing_titles(self, imdb_ids, chunk_size=ID_CHUNK_SIZE):
+        """
+        Get the titles of the IMDb IDs already stored in the database.
+
+        Like `existing_ids`, with one `IN` query per chunk of IDs.
+
+        Parameters:
+        - `imdb_ids` (iterable): The IMDb IDs to look for.
+        - `chunk_size` (int): The maximum number of IDs per query.
+
+        Returns:
+        - dict: The stored title of each IMDb ID found in the database.
+        """
+        imdb_ids = list(dict.fromkeys(imdb_ids))
+        existing = {}
+        for start in range(0, len(imdb_ids), chunk_size):
+            chunk = imdb_ids[start : start + chunk_size]
+            rows = self.session.query(MovieModel.imdb_id, MovieModel.title).filter(
+                MovieModel.imdb_id.in_(chunk)
+            )
+            existing.update(rows.tuples())
+        return existing
+
     def get_by_title(self, title):
         """
-        Get a movie by its title.
+        Get a movie by its title, ignoring case, accents and punctuation. An exact title
+        match is preferred (see `MovieModel.title_match`).
 
         Parameters:
         - `title` (str): The title of the movie to retrieve.
@@ -84,10 +341,9 @@ class MoviesRepository:
         Returns:
         - dict or None: A dictionary representing the movie if found, or None if not found.
         """
+        condition, order = MovieModel.title_match(title)
         result = (
-            self.session.query(MovieModel)
-            .filter(MovieModel.title == title)
-            .one_or_none()
+            self.session.query(MovieModel).filter(condition).order_by(*order).first()
         )
 
         if result:
@@ -95,26 +351,109 @@ class MoviesRepository:
         else:
             return None
 
-    def get_all(self, offset=0, limit=100):
+    def get_all(self, offset=0, limit=100, after=None):
         """
-        Get all movies in the database.
+        Get all movies in the database, ordered by title (and IMDb ID for equal titles).
 
         Parameters:
         - `offset` (int): The offset for pagination.
         - `limit` (int): The maximum number of movies to retrieve.
+        - `after` (tuple, optional): The (title, imdb_id) of the last movie of the previous
+          page. Only movies sorted after it are returned (keyset pagination).
 
         Returns:
         - list: A list of dictionaries representing the movies.
         """
-        movies = (
-            self.session.query(MovieModel)
-            .order_by(MovieModel.title)
-            .offset(offset)
-            .limit(limit)
-            .all()
+        query = self.session.query(MovieModel).order_by(
+            MovieModel.title, MovieModel.imdb_id
         )
+        if after is not None:
+            query = query.filter(tuple_(MovieModel.title, MovieModel.imdb_id) > after)
+        movies = query.offset(offset).limit(limit).all()
         return [movie.to_dict() for movie in movies]
 
+    def search(self, query, limit=10, after=None, fields=None):
+        """
+        Search the movies matching all the words of a query in their title, plot,
+        actors or director, best matches first (see `search.search_statement`).
+
+        Parameters:
+        - `query` (str): The search query.
+        - `limit` (int): The maximum number of movies to retrieve.
+        - `after` (tuple, optional): The (rank, key) ordering key of the last movie of
+          the previous page (keyset pagination).
+        - `fields` (list, optional): The fields to retrieve (see `models.FIELDS`).
+          Defaults to all of them.
+
+        Returns:
+        - list: The (movie, (rank, key)) of each movie found, the movie being a
+          dictionary and (rank, key) its ordering key (see `search.search_statement`).
+        """
+        dialect = self.session.get_bind().dialect.name
+        statement = search_statement(dialect, query, limit, after, fields)
+        if statement is None:
+            return []
+        return search_results(self.session.execute(statement).mappings())
+
+    def load_title_index(self):
+        """
+        Build the title index from the movies table, if it is not built yet.
+        """
+        if not self.title_index.is_built():
+            rows = self.session.execute(select(MovieModel.title, MovieModel.imdb_id))
+            self.title_index.build(rows.tuples())
+
+    def suggest_titles(self, prefix, limit=10):
+        """
+        Get the movies whose normalized title starts with a prefix, from the title index.
+
+        The index is built first if needed (see `load_title_index`).
+
+        Parameters:
+        - `prefix` (str): The beginning of the title (see `models.normalize_title`).
+        - `limit` (int): The maximum number of movies.
+
+        Returns:
+        - list: The (title, imdb_id) of the movies found, in normalized title order.
+        """
+        self.load_title_index()
+        return self.title_index.suggest(prefix, limit)
+
+    def similar_titles(self, title, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """
+        Get the movies whose title is the closest to a title, from the title index.
+
+        Titles are compared by trigrams, like PostgreSQL's pg_trgm does (see
+        `TitleIndex.similar`). The index is built first if needed (see
+        `load_title_index`).
+
+        Parameters:
+        - `title` (str): The title (see `models.normalize_title`).
+        - `limit` (int): The maximum number of movies.
+        - `threshold` (float): The minimum similarity of the titles, between 0 and 1.
+
+        Returns:
+        - list: The (title, imdb_id, similarity) of the movies found, by decreasing
+          similarity.
+        """
+        self.load_title_index()
+        return self.title_index.similar(title, limit, threshold)
+
+    def near_title(self, title):
+        """
+        Get the movie whose title only differs from a title by typos, from the title index.
+
+        The index is built first if needed (see `load_title_index`).
+
+        Parameters:
+        - `title` (str): The title (see `TitleIndex.near_match`).
+
+        Returns:
+        - tuple or None: The (title, imdb_id) of the movie, or None if there is none.
+        """
+        self.load_title_index()
+        return self.title_index.near_match(title)
+
     def delete_by_id(self, imdb_id):
         """
         Delete a movie by its IMDb ID.
@@ -132,10 +471,14 @@ class MoviesRepository:
                 # Delete the movie if found
                 self.session.delete(movie)
                 self.session.commit()
+                self.movie_count.adjust(-1)
+                self.title_index.remove([(movie.title, movie.imdb_id)])
                 return True
             else:
                 return False
         except Exception as e:
             # Handle exceptions
             self.session.rollback()
+            self.movie_count.invalidate()
+            self.title_index.invalidate()
             return False
@@ -0,0 +1,112 @@
+import re
+
+from sqlalchemy import column, func, literal, literal_column, select, table, tuple_
+
+from data_layer.models import MovieModel
+
+# FTS5 table of the movies on SQLite (see `models.SQLITE_SEARCH_DDL`)
+movies_fts = table("movies_fts", column("rowid"), column("rank"))
+
+# Type of the unique key ordering the results of equal rank, by dialect
+SEARCH_KEY_TYPES = {"sqlite": int, "postgresql": str}
+
+
+def search_terms(query):
+    """
+    Split a search query into words, dropping the operators of the search syntaxes.
+
+    Parameters:
+    - `query` (str): The search query of a client.
+
+    Returns:
+    - list: The lowercase words of the query.
+    """
+    return re.findall(r"\w+", query.lower())
+
+
+def search_statement(dialect, query, limit=10, after=None, fields=None):
+    """
+    Build the full-text search of the movies matching all the words of a query.
+
+    The title, plot, actors and director are searched for whole words. Words are
+    quoted, so the operators of the search syntaxes are never interpreted. On SQLite,
+    the FTS5 table `movies_fts` is ranked with BM25, and only the movies of the page are
+    read from the `movies` table. On PostgreSQL, the `search_vector` column is ranked
+    with `ts_rank`. Movies are ordered by rank (lower is better) and a unique key (the
+    `id` column on SQLite, the IMDb ID on PostgreSQL), selected as `_rank` and `_key`.
+
+    Parameters:
+    - `dialect` (str): The name of the database dialect.
+    - `query` (str): The search query.
+    - `limit` (int): The maximum number of movies.
+    - `after` (tuple, optional): The (rank, key) of the last movie of the previous page.
+      Only movies ranked after it are returned (keyset pagination).
+    - `fields` (list, optional): The fields to retrieve (see `models.FIELDS`).
+      Defaults to all of them.
+
+    Returns:
+    - sqlalchemy.Select or None: The statement, or None if the query has no words.
+
+    Raises:
+    - ValueError: If the database dialect does not support full-text search.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+
+    if dialect == "sqlite":
+        rank, key = movies_fts.c.rank, movies_fts.c.rowid
+        match = " ".join(f'"{term}"' for term in terms)
+        ranked = select(rank, key).where(
+            literal_column("movies_fts").op("MATCH")(match)
+        )
+        if after is not None:
+            ranked = ranked.where(
+                tuple_(rank, key) > tuple_(literal(float(after[0])), literal(after[1]))
+            )
+        # Movies are ranked within the index, so only the page is joined to `movies`
+        ranked = ranked.order_by(rank, key).limit(limit).subquery("ranked")
+        rank, key = ranked.c.rank, ranked.c.rowid
+        return (
+            select(
+                *MovieModel.columns_for(fields), rank.label("_rank"), key.label("_key")
+            )
+            .select_from(
+                ranked.join(MovieModel, MovieModel.id == key)
+            )
+            .order_by(rank, key)
+        )
+
+    if dialect != "postgresql":
+        raise ValueError(f"Full-text search is not supported for {dialect} databases")
+
+    vector = literal_column("movies.search_vector")
+    tsquery = func.plainto_tsquery("english", " ".join(terms))
+    rank, key = -func.ts_rank(vector, tsquery), MovieModel.imdb_id
+    statement = select(
+        *MovieModel.columns_for(fields), rank.label("_rank"), key.label("_key")
+    ).where(vector.op("@@")(tsquery))
+    if after is not None:
+        statement = statement.where(
+            tuple_(rank, key) > tuple_(literal(float(after[0])), literal(after[1]))
+        )
+    return statement.order_by(rank, key).limit(limit)
+
+
+def search_results(rows):
+    """
+    Split the rows of a search statement into movies and their ordering keys.
+
+    Parameters:
+    - `rows` (iterable): The mappings returned by the statement of `search_statement`.
+
+    Returns:
+    - list: The (movie, (rank, key)) of each row, the movie being a dictionary of the
+      requested fields.
+    """
+    results = []
+    for row in rows:
+        movie = dict(row)
+        key = (movie.pop("_rank"), movie.pop("_key"))
+        results.append((movie, key))
+    return results
@@ -0,0 +1,137 @@
+import argparse
+import gzip
+import logging
+
+import orjson
+from sqlalchemy import select
+
+from common import utils
+from data_layer.engine_registry import engine_registry
+from data_layer.models import DERIVED_COLUMNS, Base, MovieModel
+from data_layer.movies_repository import MoviesRepository, UPSERT_CHUNK_SIZE
+from data_layer.unit_of_work import UnitOfWork
+
+# Columns saved in a snapshot. The row IDs are assigned, and the JSON documents and
+# derived columns computed, again on import.
+SNAPSHOT_COLUMNS = [
+    column
+    for column in MovieModel.__table__.columns
+    if not column.primary_key
+    and column.name != "json_blob"
+    and column.name not in DERIVED_COLUMNS
+]
+
+
+def export_snapshot(database, path, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Export the movies table to a snapshot file.
+
+    A snapshot is a gzip-compressed JSON Lines file holding one movie per line, as a
+    dictionary of MovieModel attributes. Rows are streamed, so memory does not grow
+    with the number of movies.
+
+    Parameters:
+    - `database` (str): The database connection string.
+    - `path` (str): The path of the snapshot file to write.
+    - `chunk_size` (int): The number of rows fetched from the database at a time.
+
+    Returns:
+    - int: The number of movies exported.
+    """
+    exported = 0
+    with UnitOfWork(database) as unit_of_work, gzip.open(
+        path, "wb", compresslevel=6
+    ) as snapshot:
+        result = unit_of_work.session.execute(
+            select(*SNAPSHOT_COLUMNS)
+            .order_by(MovieModel.imdb_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for row in result.mappings():
+            snapshot.write(orjson.dumps(dict(row)) + b"\n")
+            exported += 1
+    logging.info(f"Exported {exported} movies to {path}")
+    return exported
+
+
+def import_snapshot(database, path, chunk_size=UPSERT_CHUNK_SIZE, progress=None):
+    """
+    Load a snapshot file written by `export_snapshot` into a database.
+
+    Movies are upserted and committed in chunks (see `MoviesRepository.bulk_upsert`),
+    so memory does not grow with the number of movies and existing movies are updated.
+    The full-text search index is rebuilt once at the end (see
+    `MoviesRepository.deferred_search_index`). The movies table is created if needed.
+
+    Parameters:
+    - `database` (str): The database connection string.
+    - `path` (str): The path of the snapshot file to read.
+    - `chunk_size` (int): The number of movies upserted and committed at a time.
+    - `progress` (callable, optional): Called with the number of movies loaded so far
+      after each commit.
+
+    Returns:
+    - int: The number of movies loaded.
+    """
+    Base.metadata.create_all(engine_registry.get_engine(database))
+    loaded = 0
+    with UnitOfWork(database) as unit_of_work, gzip.open(path, "rb") as snapshot:
+        repo = MoviesRepository(
+            unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+        )
+
+        def save(rows):
+            nonlocal loaded
+            repo.bulk_upsert(rows, chunk_size)
+            unit_of_work.commit()
+            loaded += len(rows)
+            if progress:
+                progress(loaded)
+
+        with repo.deferred_search_index():
+            rows = []
+            for line in snapshot:
+                rows.append(orjson.loads(line))
+                if len(rows) >= chunk_size:
+                    save(rows)
+                    rows = []
+            if rows:
+                save(rows)
+        unit_of_work.commit()
+    logging.info(f"Loaded {loaded} movies from {path}")
+    return loaded
+
+
+def main(arguments=None):
+    """
+    Export or import a snapshot from the command line.
+
+    Usage:
+        python -m data_layer.snapshot export movies_snapshot.jsonl.gz
+        python -m data_layer.snapshot import movies_snapshot.jsonl.gz
+
+    Parameters:
+    - `arguments` (list, optional): The command line arguments. Defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(description="Export or import a movies snapshot.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="The snapshot file (gzip-compressed JSON Lines).")
+    parser.add_argument(
+        "--database",
+        help="The database connection string. Defaults to the one of alembic.ini.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=UPSERT_CHUNK_SIZE)
+    arguments = parser.parse_args(arguments)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    database = arguments.database or utils.get_database_url_from_alembic_config()
+    if arguments.command == "export":
+        export_snapshot(database, arguments.path, arguments.chunk_size)
+    else:
+        import_snapshot(database, arguments.path, arguments.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import orjson
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from data_layer.models import Base, MovieModel
+from data_layer.async_movies_repository import AsyncMoviesRepository
+from data_layer.movie_count import MovieCount
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    # Create an in-memory SQLite database for testing
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+
+    # Clean up after the test
+    await session.close()
+    await engine.dispose()
+
+
+async def add_movies(session):
+    session.add_all(
+        [
+            MovieModel(imdb_id="tt6181728", title="Interstellar", year="2014"),
+            MovieModel(imdb_id="tt1375666", title="Inception", year="2010"),
+            MovieModel(imdb_id="tt0166222", title="Avatar", year="2009"),
+        ]
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_is_database_empty(async_session):
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    assert await movies_repo.is_database_empty() is True
+
+    await add_movies(async_session)
+
+    assert await AsyncMoviesRepository(async_session).is_database_empty() is False
+
+
+@pytest.mark.asyncio
+async def test_is_database_empty_table_not_exist():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with async_sessionmaker(bind=engine)() as session:
+        movies_repo = AsyncMoviesRepository(session)
+
+        assert await movies_repo.is_database_empty() is True
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_add_and_get_movie_by_id(async_session):
+    movies_repo = AsyncMoviesRepository(async_session)
+    movies_repo.add(MovieModel(imdb_id="tt1375666", title="Inception", year="2010"))
+    await async_session.commit()
+
+    movie = await movies_repo.get_by_id("tt1375666")
+
+    assert movie["Title"] == "Inception"
+    assert movie["Year"] == "2010"
+    assert await movies_repo.get_by_id("tt0000000") is None
+
+
+@pytest.mark.asyncio
+async def test_get_movie_by_title(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    movie = await movies_repo.get_by_title("Inception")
+
+    assert movie["imdbID"] == "tt1375666"
+    assert await movies_repo.get_by_title("no_match_title") is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_movies_ordered_by_title(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    movies = await movies_repo.get_all(offset=1, limit=5)
+
+    assert [movie["Title"] for movie in movies] == ["Inception", "Interstellar"]
+
+
+@pytest.mark.asyncio
+async def test_delete_movie_by_id(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    assert await movies_repo.delete_by_id("tt1375666") is True
+    assert await movies_repo.get_by_id("tt1375666") is None
+    assert await movies_repo.delete_by_id("tt1375666") is False
+
+
+@pytest.mark.asyncio
+async def test_get_all_movies_after_cursor(async_session):
+    await add_movies(async_session)
+    async_session.add(MovieModel(imdb_id="tt0000001", title="Inception"))
+    await async_session.commit()
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    first_page = await movies_repo.get_all(limit=2)
+    last = first_page[-1]
+    second_page = await movies_repo.get_all(limit=2, after=(last["Title"], last["imdbID"]))
+
+    assert [movie["imdbID"] for movie in first_page] == ["tt0166222", "tt0000001"]
+    assert [movie["imdbID"] for movie in second_page] == ["tt1375666", "tt6181728"]
+
+
+@pytest.mark.asyncio
+async def test_count_is_cached_and_maintained(async_session):
+    await add_movies(async_session)
+    movie_count = MovieCount()
+    movies_repo = AsyncMoviesRepository(async_session, movie_count)
+
+    assert await movies_repo.count() == 3
+    assert movie_count.value == 3
+
+    movies_repo.add(MovieModel(imdb_id="tt0000001", title="Tenet"))
+    await async_session.commit()
+    assert await movies_repo.delete_by_id("tt1375666") is True
+
+    assert await AsyncMoviesRepository(async_session, movie_count).count() == 3
+
+
+@pytest.mark.asyncio
+async def test_get_all_and_get_by_title_project_fields(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    movies = await movies_repo.get_all(limit=1, fields=["imdbID", "Title"])
+    movie = await movies_repo.get_by_title("Inception", fields=["Year"])
+
+    assert movies == [{"Title": "Avatar", "imdbID": "tt0166222"}]
+    assert movie == {"Year": "2010"}
+
+
+@pytest.mark.asyncio
+async def test_get_by_title_returns_all_fields_by_default(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    movie = await movies_repo.get_by_title("Inception")
+
+    assert movie == (await async_session.get(MovieModel, "tt1375666")).to_dict()
+
+
+@pytest.mark.asyncio
+async def test_get_json_by_title(async_session):
+    stored = MovieModel(imdb_id="tt1375666", title="Inception", year="2010")
+    stored.json_blob = b'{"Title":"Inception"}'
+    async_session.add_all([stored, MovieModel(imdb_id="tt0166222", title="Avatar")])
+    await async_session.commit()
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    # The stored document is returned as it is
+    assert await movies_repo.get_json_by_title("Inception") == b'{"Title":"Inception"}'
+
+    # Movies saved without it are serialized from their columns
+    avatar = orjson.loads(await movies_repo.get_json_by_title("Avatar"))
+    assert avatar["imdbID"] == "tt0166222"
+    assert avatar == (await async_session.get(MovieModel, "tt0166222")).to_dict()
+
+    assert await movies_repo.get_json_by_title("no_match_title") is None
+
+
+@pytest.mark.asyncio
+async def test_search(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    results = await movies_repo.search("interstellar", fields=["Title", "Year"])
+
+    movies = [movie for movie, _ in results]
+    assert movies == [{"Title": "Interstellar", "Year": "2014"}]
+    assert await movies_repo.search("matrix") == []
+
+
+@pytest.mark.asyncio
+async def test_suggest_titles(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    assert await movies_repo.suggest_titles("IN", limit=5) == [
+        ("Inception", "tt1375666"),
+        ("Interstellar", "tt6181728"),
+    ]
+
+    # Deleted movies are removed from the built index
+    await movies_repo.delete_by_id("tt1375666")
+    assert await movies_repo.suggest_titles("in") == [("Interstellar", "tt6181728")]
+
+
+@pytest.mark.asyncio
+async def test_similar_titles(async_session):
+    await add_movies(async_session)
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    similar = await movies_repo.similar_titles("Interstelar", limit=1)
+    assert [(title, imdb_id) for title, imdb_id, _ in similar] == [
+        ("Interstellar", "tt6181728")
+    ]
+    assert await movies_repo.near_title("interstelar") == ("Interstellar", "tt6181728")
+    assert await movies_repo.near_title("Avatar 2") is None
+
+
+@pytest.mark.asyncio
+async def test_get_by_title_ignores_case_and_accents(async_session):
+    async_session.add(MovieModel(imdb_id="tt0211915", title="Amélie", year="2001"))
+    await async_session.commit()
+    movies_repo = AsyncMoviesRepository(async_session)
+
+    assert await movies_repo.get_by_title("amelie ", ["Year"]) == {"Year": "2001"}
+    movie = orjson.loads(await movies_repo.get_json_by_title("AMÉLIE"))
+    assert movie["imdbID"] == "tt0211915"
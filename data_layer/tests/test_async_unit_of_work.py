@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy import select
+from data_layer.async_unit_of_work import AsyncUnitOfWork
+from data_layer.engine_registry import engine_registry
+from data_layer.models import Base, MovieModel
+
+
+@pytest.mark.asyncio
+async def test_commit_and_rollback(tmp_path):
+    database = f"sqlite:///{tmp_path / 'movies.db'}"
+    async with engine_registry.get_async_engine(database).begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with AsyncUnitOfWork(database) as uow:
+        uow.session.add(MovieModel(title="Test Movie", imdb_id="tt123456"))
+        await uow.commit()
+        uow.session.add(MovieModel(title="Other Movie", imdb_id="tt654321"))
+        await uow.rollback()
+
+    async with AsyncUnitOfWork(database) as uow:
+        imdb_ids = (await uow.session.scalars(select(MovieModel.imdb_id))).all()
+
+    assert imdb_ids == ["tt123456"]
+    await engine_registry.dispose_async()
+
+
+@pytest.mark.asyncio
+async def test_units_of_work_share_async_engine(tmp_path):
+    database = f"sqlite:///{tmp_path / 'movies.db'}"
+
+    assert AsyncUnitOfWork(database).session_maker is (
+        AsyncUnitOfWork(database).session_maker
+    )
+    assert str(engine_registry.get_async_engine(database).url).startswith(
+        "sqlite+aiosqlite://"
+    )
+    await engine_registry.dispose_async()
+
+
+@pytest.mark.asyncio
+async def test_exit_with_exception():
+    session_mock = AsyncMock()
+    unit_of_work = AsyncUnitOfWork()
+    unit_of_work.session = session_mock
+
+    await unit_of_work.__aexit__(Exception, Exception("Test Exception"), None)
+
+    session_mock.rollback.assert_awaited_once()
+    session_mock.close.assert_awaited_once()
+    await engine_registry.dispose_async()
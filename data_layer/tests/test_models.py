@@ -1,8 +1,14 @@
+import datetime
+import json
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from data_layer.models import (
     MovieModel,
+    normalize_title,
+    parse_date,
+    parse_decimal,
+    parse_integer,
 )
 
 
@@ -94,3 +100,79 @@ def test_movie_model(db_session):
     assert retrieved_movie.box_office == movie_data["box_office"]
     assert retrieved_movie.production == movie_data["production"]
     assert retrieved_movie.website == movie_data["website"]
+
+
+def test_movie_model_to_json():
+    movie = MovieModel(
+        imdb_id="tt0362300",
+        title="Ultimate Fan's Guide to Walt Disney World",
+        ratings=[{"Source": "Internet Movie Database", "Value": "8.6/10"}],
+    )
+
+    assert json.loads(movie.to_json()) == movie.to_dict()
+
+
+def test_movie_model_columns_for():
+    columns = MovieModel.columns_for(["imdbID", "Title"])
+
+    # Columns are labeled with the API field names, in the order of to_dict
+    assert [column.name for column in columns] == ["Title", "imdbID"]
+    assert len(MovieModel.columns_for()) == len(MovieModel().to_dict())
+
+
+def test_normalize_title():
+    assert normalize_title("Amélie") == "amelie"
+    assert normalize_title("  Star Wars: Episode IV - A New Hope") == (
+        "star wars episode iv a new hope"
+    )
+    assert normalize_title("WALL·E") == "wall e"
+    assert normalize_title(" -: ") == ""
+    assert normalize_title(None) == ""
+
+
+def test_movie_model_keeps_normalized_title():
+    movie = MovieModel(imdb_id="tt0110357", title="The Lion  King")
+    assert movie.title_normalized == "the lion king"
+
+    movie.title = "Le Roi Lion (Édition Spéciale)"
+    assert movie.title_normalized == "le roi lion edition speciale"
+
+
+def test_parse_omdb_numbers_and_dates():
+    assert parse_integer("2010") == 2010
+    assert parse_integer("2010–2015") == 2010
+    assert parse_integer("142 min") == 142
+    assert parse_integer("1,234,567") == 1234567
+    assert parse_integer("$292,587,330") == 292587330
+    assert parse_integer("N/A") is None
+    assert parse_integer(None) is None
+    assert parse_decimal("8.8") == 8.8
+    assert parse_decimal("7") == 7.0
+    assert parse_decimal("N/A") is None
+    assert parse_date("16 Jul 2010") == datetime.date(2010, 7, 16)
+    assert parse_date("31 Feb 2010") is None
+    assert parse_date("2010") is None
+    assert parse_date("N/A") is None
+
+
+def test_movie_model_keeps_typed_columns():
+    movie = MovieModel(
+        imdb_id="tt1375666",
+        year="2010",
+        released="16 Jul 2010",
+        runtime="148 min",
+        metascore="74",
+        imdb_rating="8.8",
+        imdb_votes="2,600,000",
+        box_office="$292,587,330",
+    )
+    assert movie.year_number == 2010
+    assert movie.released_date == datetime.date(2010, 7, 16)
+    assert movie.runtime_minutes == 148
+    assert movie.metascore_number == 74
+    assert movie.imdb_rating_number == 8.8
+    assert movie.imdb_votes_number == 2600000
+    assert movie.box_office_number == 292587330
+
+    movie.box_office = "N/A"
+    assert movie.box_office_number is None
@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+from data_layer.movie_count import MovieCount, MovieCountRegistry
+
+
+def test_movie_count_starts_unknown():
+    movie_count = MovieCount()
+
+    assert movie_count.is_known() is False
+
+    # Adjusting an unknown count keeps it unknown
+    movie_count.adjust(1)
+    assert movie_count.value is None
+
+
+def test_movie_count_adjust_and_invalidate():
+    movie_count = MovieCount()
+    movie_count.set(10)
+
+    movie_count.adjust(2)
+    movie_count.adjust(-1)
+    assert movie_count.value == 11
+
+    movie_count.adjust(-20)
+    assert movie_count.value == 0
+
+    movie_count.invalidate()
+    assert movie_count.is_known() is False
+
+
+def test_movie_count_does_not_cache_empty_databases():
+    movie_count = MovieCount()
+    movie_count.set(0)
+
+    assert movie_count.is_known() is False
+
+    movie_count.set(3)
+    assert movie_count.is_known() is True
+
+    # Deleting the last movie makes it unknown again
+    movie_count.adjust(-3)
+    assert movie_count.is_known() is False
+
+
+def test_movie_count_expires():
+    movie_count = MovieCount(ttl=5.0)
+    with patch("data_layer.movie_count.time.monotonic", return_value=100.0):
+        movie_count.set(10)
+    with patch("data_layer.movie_count.time.monotonic", return_value=104.9):
+        movie_count.adjust(1)
+        assert movie_count.is_known() is True
+    with patch("data_layer.movie_count.time.monotonic", return_value=105.0):
+        assert movie_count.is_known() is False
+
+
+def test_movie_count_registry_shares_count_per_database():
+    registry = MovieCountRegistry()
+
+    assert registry.get("sqlite:///movies.db") is registry.get("sqlite:///movies.db")
+    assert registry.get("sqlite:///movies.db") is not registry.get("sqlite:///other.db")
+
+    registry.clear("sqlite:///other.db")
+    assert list(registry.counts) == ["sqlite:///movies.db"]
+
+    registry.clear()
+    assert registry.counts == {}
@@ -1,9 +1,14 @@
+import json
 from h11 import Data
 from httpx import delete
 import pytest
 from unittest.mock import Mock, MagicMock
 from data_layer.models import MovieModel
 from data_layer.movies_repository import MoviesRepository
+from data_layer.movie_count import MovieCount
+from data_layer.title_index import TitleIndex
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError, DatabaseError
 
 
@@ -64,7 +69,7 @@ def test_get_movie_by_id_no_match(mock_session):
 
 def test_get_movie_by_title(mock_session):
     # Mocking the query method of the session
-    mock_session.query().filter().one_or_none.return_value = MovieModel(
+    mock_session.query().filter().order_by().first.return_value = MovieModel(
         imdb_id="tt1375666",
         title="Inception",
         year="2010",
@@ -88,7 +93,7 @@ def test_get_movie_by_title(mock_session):
 
 def test_get_movie_by_title_no_match(mock_session):
     # Mocking the query method of the session
-    mock_session.query().filter().one_or_none.return_value = None
+    mock_session.query().filter().order_by().first.return_value = None
 
     # Create a repository instance with the mocked session
     movies_repo = MoviesRepository(mock_session)
@@ -249,3 +254,523 @@ def test_is_database_empty_returns_false_when_not_empty(mock_session):
 
     # Assert that the method returns False
     assert is_empty is False
+
+
+def test_get_all_movies_after_cursor(mock_session):
+    # Set up the mock behavior for query, order_by, filter, offset, limit, and all methods
+    mock_query = MagicMock()
+    mock_query.order_by.return_value = mock_query
+    mock_query.filter.return_value = mock_query
+    mock_query.offset.return_value = mock_query
+    mock_query.limit.return_value = mock_query
+    mock_query.all.return_value = [MovieModel(imdb_id="tt6181728", title="Interstellar")]
+    mock_session.query.return_value = mock_query
+
+    # Create a repository instance with the mocked session
+    movies_repo = MoviesRepository(mock_session)
+
+    # Call the get_all method with the key of the last movie of the previous page
+    response = movies_repo.get_all(limit=1, after=("Inception", "tt0166222"))
+
+    assert response[0]["Title"] == "Interstellar"
+
+    # Assert that the seek condition is applied and nothing is skipped by offset
+    mock_query.filter.assert_called_once()
+    mock_query.offset.assert_called_once_with(0)
+
+
+@pytest.fixture
+def sqlite_session():
+    # Create an in-memory SQLite database with the model indexes
+    engine = create_engine("sqlite:///:memory:")
+    MovieModel.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    # Record the statements sent to the database
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    yield session, statements
+
+    session.close()
+    engine.dispose()
+
+
+def query_plan(session, statement, parameters):
+    """Return the EXPLAIN QUERY PLAN details of a recorded statement."""
+    rows = session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_get_by_title_uses_title_index(sqlite_session):
+    session, statements = sqlite_session
+    MoviesRepository(session).get_by_title("Inception")
+
+    plan = query_plan(session, *statements[-1])
+
+    assert "USING INDEX ix_movies_title_normalized (title_normalized=?)" in plan
+    assert "SCAN movies" not in plan
+
+
+def test_get_by_title_ignores_case_and_accents(sqlite_session):
+    session, _ = sqlite_session
+    movies_repo = MoviesRepository(session)
+    movies_repo.add(MovieModel(imdb_id="tt0110357", title="The Lion King"))
+    movies_repo.bulk_upsert(
+        [
+            {"imdb_id": "tt0211915", "title": "Amélie"},
+            {"imdb_id": "tt0000001", "title": "The Lion-King"},
+        ]
+    )
+    session.commit()
+
+    assert movies_repo.get_by_title("the lion king")["imdbID"] == "tt0000001"
+    assert movies_repo.get_by_title("AMELIE")["Title"] == "Amélie"
+    # Exact matches win ties between movies with the same normalized title
+    assert movies_repo.get_by_title("The Lion King")["imdbID"] == "tt0110357"
+    assert movies_repo.get_by_title("The Lion-King")["imdbID"] == "tt0000001"
+    assert movies_repo.get_by_title("lion king") is None
+
+
+def test_get_all_uses_title_index_for_ordering(sqlite_session):
+    session, statements = sqlite_session
+    movies_repo = MoviesRepository(session)
+
+    movies_repo.get_all(limit=10)
+    plan = query_plan(session, *statements[-1])
+
+    assert "ix_movies_title_imdb_id" in plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan
+
+    movies_repo.get_all(limit=10, after=("Inception", "tt1375666"))
+    plan = query_plan(session, *statements[-1])
+
+    assert "SEARCH movies USING INDEX ix_movies_title_imdb_id" in plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan
+
+
+def test_year_and_type_filters_use_indexes(sqlite_session):
+    session, statements = sqlite_session
+    session.query(MovieModel).filter(MovieModel.year == "2010").all()
+    session.query(MovieModel).filter(
+        MovieModel.type == "movie", MovieModel.year == "2010"
+    ).all()
+
+    assert "USING INDEX ix_movies_year (year=?)" in query_plan(session, *statements[-2])
+    assert "USING INDEX ix_movies_type_year (type=? AND year=?)" in query_plan(
+        session, *statements[-1]
+    )
+
+
+def test_typed_columns_filter_and_order_with_indexes(sqlite_session):
+    session, statements = sqlite_session
+    best_rated = MovieModel.imdb_rating_number.desc()
+    session.query(MovieModel).filter(MovieModel.year_number.between(1990, 1999)).all()
+    session.query(MovieModel).order_by(best_rated).limit(10).all()
+
+    assert "USING INDEX ix_movies_year_number (year_number>? AND year_number<?)" in (
+        query_plan(session, *statements[-2])
+    )
+    plan = query_plan(session, *statements[-1])
+    assert "ix_movies_imdb_rating_number" in plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan
+
+
+def test_count_is_cached_and_maintained(sqlite_session):
+    session, statements = sqlite_session
+    movie_count = MovieCount()
+    movies_repo = MoviesRepository(session, movie_count)
+
+    assert movies_repo.count() == 0
+    counted = len(statements)
+
+    # Adding and deleting movies keeps the count without counting the table again
+    movies_repo.add(MovieModel(imdb_id="tt1375666", title="Inception"))
+    movies_repo.add(MovieModel(imdb_id="tt6181728", title="Interstellar"))
+    session.commit()
+    assert movies_repo.delete_by_id("tt1375666") is True
+
+    assert MoviesRepository(session, movie_count).count() == 1
+    assert MoviesRepository(session, movie_count).is_database_empty() is False
+    assert not any("count(*)" in statement for statement, _ in statements[counted:])
+
+
+def test_existing_ids_queries_ids_in_chunks(sqlite_session):
+    session, statements = sqlite_session
+    movies_repo = MoviesRepository(session)
+    movies_repo.add(MovieModel(imdb_id="tt1375666", title="Inception"))
+    movies_repo.add(MovieModel(imdb_id="tt0816692", title="Interstellar"))
+    session.commit()
+    queried = len(statements)
+
+    existing_ids = movies_repo.existing_ids(
+        ["tt1375666", "tt0000001", "tt0816692", "tt0000002", "tt1375666"],
+        chunk_size=2,
+    )
+
+    assert existing_ids == {"tt1375666", "tt0816692"}
+    # 4 distinct IDs in chunks of 2, selecting the IDs only
+    new_statements = [statement for statement, _ in statements[queried:]]
+    assert len(new_statements) == 2
+    assert all(
+        statement.startswith("SELECT movies.imdb_id AS movies_imdb_id \nFROM movies")
+        for statement in new_statements
+    )
+
+
+def test_existing_ids_without_ids(sqlite_session):
+    session, statements = sqlite_session
+
+    assert MoviesRepository(session).existing_ids([]) == set()
+    assert statements == []
+
+
+def test_delete_movie_by_id_exception_invalidates_count(mock_session):
+    mock_session.query().filter_by().first.side_effect = Exception()
+    movie_count = MovieCount()
+    movie_count.set(5)
+
+    movies_repo = MoviesRepository(mock_session, movie_count)
+
+    assert movies_repo.delete_by_id("tt1375666") is False
+    assert movie_count.is_known() is False
+
+
+def test_bulk_upsert_inserts_and_updates(sqlite_session):
+    session, statements = sqlite_session
+    movie_count = MovieCount()
+    movies_repo = MoviesRepository(session, movie_count)
+    movies_repo.add(MovieModel(imdb_id="tt1375666", title="Inception"))
+    session.commit()
+    assert movies_repo.count() == 1
+
+    rows = [
+        {"imdb_id": "tt1375666", "title": "Inception", "year": "2010"},
+        {"imdb_id": "tt0816692", "title": "Interstellar", "response": "True"},
+        {"imdb_id": "tt0468569", "title": "The Dark Knight"},
+    ]
+    assert movies_repo.bulk_upsert(rows, chunk_size=2) == (2, 1)
+    session.commit()
+
+    assert movie_count.value == 3
+    assert movies_repo.get_by_id("tt1375666")["Year"] == "2010"
+    stored = session.get(MovieModel, "tt0816692")
+    assert json.loads(stored.json_blob) == stored.to_dict()
+    # The typed columns are parsed from the row
+    assert session.get(MovieModel, "tt1375666").year_number == 2010
+    assert stored.year_number is None
+    # One executemany per chunk
+    inserts = [statement for statement, _ in statements if "ON CONFLICT" in statement]
+    assert len(inserts) == 2
+
+
+def test_bulk_upsert_sends_repeated_movies_once(sqlite_session):
+    session, statements = sqlite_session
+    movies_repo = MoviesRepository(session)
+
+    # Search pages of the OMDB API can repeat a movie
+    rows = [
+        {"imdb_id": "tt1375666", "title": "Inception", "year": "2009"},
+        {"imdb_id": "tt0816692", "title": "Interstellar"},
+        {"imdb_id": "tt1375666", "title": "Inception", "year": "2010"},
+    ]
+    assert movies_repo.bulk_upsert(rows) == (2, 0)
+    session.commit()
+
+    # PostgreSQL rejects an upsert updating the same row twice
+    (parameters,) = [
+        parameters for statement, parameters in statements if "ON CONFLICT" in statement
+    ]
+    assert len(parameters) == 2
+    assert movies_repo.get_by_id("tt1375666")["Year"] == "2010"
+
+
+def test_bulk_upsert_many_rows(sqlite_session):
+    session, _ = sqlite_session
+    movies_repo = MoviesRepository(session)
+    rows = [
+        {"imdb_id": f"tt{number:07}", "title": f"Movie {number}", "year": "2000"}
+        for number in range(10_000)
+    ]
+
+    assert movies_repo.bulk_upsert(rows) == (10_000, 0)
+    session.commit()
+
+    assert session.query(MovieModel).count() == 10_000
+
+
+def test_title_index_follows_writes(sqlite_session):
+    session, statements = sqlite_session
+    title_index = TitleIndex()
+    movies_repo = MoviesRepository(session, MovieCount(), title_index)
+    movies_repo.add(MovieModel(imdb_id="tt1375666", title="Inception"))
+    session.commit()
+
+    # The index is built from the table on first use
+    assert movies_repo.suggest_titles("in") == [("Inception", "tt1375666")]
+    queried = len(statements)
+
+    # Inserted and renamed movies are indexed without querying the table again
+    movies_repo.bulk_upsert(
+        [
+            {"imdb_id": "tt0816692", "title": "Interstellar"},
+            {"imdb_id": "tt1375666", "title": "Inception (2010)"},
+        ]
+    )
+    session.commit()
+    movies_repo.delete_by_id("tt0816692")
+    movies_repo.add(MovieModel(imdb_id="tt0468569", title="The Dark Knight"))
+    session.commit()
+
+    assert movies_repo.suggest_titles("IN") == [("Inception (2010)", "tt1375666")]
+    assert movies_repo.suggest_titles("dark") == []
+    assert movies_repo.suggest_titles("the dark") == [("The Dark Knight", "tt0468569")]
+    # Misspelled titles are matched by trigrams
+    assert [title for title, _, _ in movies_repo.similar_titles("Dark Knigt")] == [
+        "The Dark Knight"
+    ]
+    assert movies_repo.near_title("The Dark Knights") == (
+        "The Dark Knight",
+        "tt0468569",
+    )
+    assert movies_repo.near_title("Interstellar") is None
+    assert not any(
+        "SELECT movies.title" in statement for statement, _ in statements[queried:]
+    )
+
+
+def test_bulk_upsert_unsupported_dialect(mock_session):
+    mock_session.get_bind().dialect.name = "mysql"
+
+    with pytest.raises(ValueError):
+        MoviesRepository(mock_session).bulk_upsert([{"imdb_id": "tt1375666"}])
+
+
+def add_search_movies(movies_repo):
+    movies_repo.bulk_upsert(
+        [
+            {
+                "imdb_id": "tt0000001",
+                "title": "The Wonderful World of Disney: 40 Years of Television Magic",
+                "plot": "A look back at the anthology series.",
+            },
+            {
+                "imdb_id": "tt0000002",
+                "title": "Disneyland Fun",
+                "actors": "Mickey Mouse",
+            },
+            {
+                "imdb_id": "tt0000003",
+                "title": "Magic Kingdom",
+                "plot": "A tour of the Disney parks around the world.",
+                "director": "Walt Disney",
+            },
+            {"imdb_id": "tt0000004", "title": "Inception", "plot": "Dreams."},
+        ]
+    )
+    movies_repo.session.commit()
+
+
+def test_search_ranks_title_matches_first(sqlite_session):
+    session, statements = sqlite_session
+    movies_repo = MoviesRepository(session)
+    add_search_movies(movies_repo)
+
+    results = movies_repo.search("disney world", fields=["Title"])
+
+    assert [movie["Title"] for movie, _ in results] == [
+        "The Wonderful World of Disney: 40 Years of Television Magic",
+        "Magic Kingdom",
+    ]
+    # The FTS5 index is searched and the movies are read by their integer ID
+    plan = query_plan(session, *statements[-1])
+    assert "SCAN movies_fts VIRTUAL TABLE INDEX" in plan
+    assert "SEARCH movies USING INTEGER PRIMARY KEY (rowid=?)" in plan
+
+
+def test_search_matches_whole_words(sqlite_session):
+    session, _ = sqlite_session
+    movies_repo = MoviesRepository(session)
+    add_search_movies(movies_repo)
+
+    results = movies_repo.search("DISNEY", fields=["Title"])
+    titles = {movie["Title"] for movie, _ in results}
+
+    assert titles == {
+        "The Wonderful World of Disney: 40 Years of Television Magic",
+        "Magic Kingdom",
+    }
+    assert movies_repo.search("disn") == []
+    # Search operators are ignored
+    assert len(movies_repo.search('mickey" -(*')) == 1
+    assert movies_repo.search(" *:- ") == []
+
+
+def test_search_pages_with_keyset(sqlite_session):
+    session, _ = sqlite_session
+    movies_repo = MoviesRepository(session)
+    add_search_movies(movies_repo)
+
+    first_page = movies_repo.search("magic", limit=1)
+    second_page = movies_repo.search("magic", limit=1, after=first_page[-1][1])
+    last_page = movies_repo.search("magic", limit=1, after=second_page[-1][1])
+
+    ids = [movie["imdbID"] for movie, _ in first_page + second_page]
+    assert sorted(ids) == ["tt0000001", "tt0000003"]
+    assert last_page == []
+    assert [key for _, key in first_page + second_page] == sorted(
+        key for _, key in first_page + second_page
+    )
+
+
+def test_search_index_follows_updates_and_deletes(sqlite_session):
+    session, _ = sqlite_session
+    movies_repo = MoviesRepository(session)
+    add_search_movies(movies_repo)
+
+    movies_repo.bulk_upsert([{"imdb_id": "tt0000004", "title": "Disney Dreams"}])
+    session.commit()
+    movies_repo.delete_by_id("tt0000003")
+
+    ids = {movie["imdbID"] for movie, _ in movies_repo.search("disney")}
+    assert ids == {"tt0000001", "tt0000004"}
+
+
+def test_search_index_survives_vacuum(sqlite_session):
+    session, _ = sqlite_session
+    movies_repo = MoviesRepository(session)
+    movies_repo.bulk_upsert(
+        [
+            {"imdb_id": f"tt{number:07}", "title": f"Movie {number}"}
+            for number in range(5)
+        ]
+    )
+    movies_repo.bulk_upsert([{"imdb_id": "tt0000009", "title": "Disney Dreams"}])
+    session.commit()
+    movies_repo.delete_by_id("tt0000001")
+
+    # VACUUM may renumber the rowids of tables without an INTEGER PRIMARY KEY, so the
+    # index is keyed on the `id` primary key
+    session.connection().exec_driver_sql("VACUUM")
+
+    results = movies_repo.search("disney")
+    assert [movie["imdbID"] for movie, _ in results] == ["tt0000009"]
+    assert results[0][1][1] == session.get(MovieModel, "tt0000009").id
+    fts_sql = session.execute(
+        text("SELECT sql FROM sqlite_master WHERE name = 'movies_fts'")
+    ).scalar()
+    assert "content_rowid='id'" in fts_sql
+
+
+def search_triggers(session):
+    return session.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name")
+    ).scalars().all()
+
+
+def test_bulk_upsert_rebuilds_search_index_once(sqlite_session):
+    session, statements = sqlite_session
+    movies_repo = MoviesRepository(session)
+    add_search_movies(movies_repo)
+    rows = [
+        {"imdb_id": f"tt1{number:06}", "title": f"Movie {number}"}
+        for number in range(1_000)
+    ]
+    rows[0]["title"] = "Disney Classics"
+    # Renamed after the triggers were dropped
+    rows.append({"imdb_id": "tt0000003", "title": "Mickey Returns"})
+    statements.clear()
+
+    assert movies_repo.bulk_upsert(rows, chunk_size=100) == (1_000, 1)
+    session.commit()
+
+    rebuilds = [
+        statement for statement, _ in statements if "VALUES('rebuild')" in statement
+    ]
+    assert len(rebuilds) == 1
+    assert search_triggers(session) == [
+        "movies_fts_delete",
+        "movies_fts_insert",
+        "movies_fts_update",
+    ]
+    ids = {movie["imdbID"] for movie, _ in movies_repo.search("disney")}
+    assert ids == {"tt0000001", "tt1000000"}
+    assert [movie["imdbID"] for movie, _ in movies_repo.search("returns")] == [
+        "tt0000003"
+    ]
+    # Later writes are indexed by the triggers again
+    movies_repo.delete_by_id("tt1000000")
+    assert len(movies_repo.search("classics")) == 0
+
+
+def test_bulk_upsert_keeps_search_triggers_for_small_loads(sqlite_session):
+    session, statements = sqlite_session
+    movies_repo = MoviesRepository(session)
+    add_search_movies(movies_repo)
+    statements.clear()
+
+    movies_repo.bulk_upsert([{"imdb_id": "tt0000004", "title": "Disney Dreams"}])
+    session.commit()
+
+    assert not any("TRIGGER" in statement for statement, _ in statements)
+    assert len(movies_repo.search("dreams")) == 1
+
+
+def test_deferred_search_index_restores_index_on_failure(sqlite_session):
+    session, _ = sqlite_session
+    movie_count = MovieCount()
+    movies_repo = MoviesRepository(session, movie_count)
+    add_search_movies(movies_repo)
+
+    with pytest.raises(RuntimeError):
+        with movies_repo.deferred_search_index():
+            movies_repo.bulk_upsert([{"imdb_id": "tt0000004", "title": "Disney 1"}])
+            session.commit()
+            movies_repo.bulk_upsert([{"imdb_id": "tt0000005", "title": "Disney 2"}])
+            raise RuntimeError("Failed load")
+
+    assert not movies_repo.search_index_deferred
+    assert len(search_triggers(session)) == 3
+    # The committed chunk is indexed, the rolled back one is gone
+    ids = {movie["imdbID"] for movie, _ in movies_repo.search("disney")}
+    assert ids == {"tt0000001", "tt0000003", "tt0000004"}
+    assert movies_repo.count() == 4
+
+
+def test_bulk_upsert_indexes_titles_renamed_across_chunks(sqlite_session):
+    session, _ = sqlite_session
+    title_index = TitleIndex()
+    movies_repo = MoviesRepository(session, MovieCount(), title_index)
+    movies_repo.bulk_upsert([{"imdb_id": "tt1375666", "title": "Inception"}])
+    session.commit()
+    assert movies_repo.suggest_titles("inc") == [("Inception", "tt1375666")]
+
+    movies_repo.bulk_upsert(
+        [
+            {"imdb_id": "tt1375666", "title": "Origin"},
+            {"imdb_id": "tt0816692", "title": "Interstellar"},
+            {"imdb_id": "tt1375666", "title": "Inception (2010)"},
+            {"imdb_id": "tt0816692", "title": "Interstellar"},
+        ],
+        chunk_size=1,
+    )
+    session.commit()
+
+    assert movies_repo.suggest_titles("in") == [
+        ("Inception (2010)", "tt1375666"),
+        ("Interstellar", "tt0816692"),
+    ]
+    assert movies_repo.suggest_titles("origin") == []
+
+
+def test_search_unsupported_dialect(mock_session):
+    mock_session.get_bind().dialect.name = "mysql"
+
+    with pytest.raises(ValueError):
+        MoviesRepository(mock_session).search("disney")
@@ -0,0 +1,78 @@
+import gzip
+import orjson
+import pytest
+from data_layer.engine_registry import engine_registry
+from data_layer.models import Base, MovieModel
+from data_layer.snapshot import export_snapshot, import_snapshot, main
+from data_layer.unit_of_work import UnitOfWork
+
+
+def movie(number):
+    return {
+        "imdb_id": f"tt{number:07d}",
+        "title": f"Movie {number}",
+        "year": "2000",
+        "director": "Director",
+        "ratings": [{"Source": "Internet Movie Database", "Value": "7.0/10"}],
+    }
+
+
+@pytest.fixture
+def source(tmp_path):
+    database = f"sqlite:///{tmp_path / 'source.db'}"
+    Base.metadata.create_all(engine_registry.get_engine(database))
+    with UnitOfWork(database) as unit_of_work:
+        for number in range(1, 6):
+            row = movie(number)
+            json_blob = MovieModel.json_for(row)
+            unit_of_work.session.add(MovieModel(**row, json_blob=json_blob))
+        unit_of_work.commit()
+    return database
+
+
+def write_snapshot(path, rows):
+    with gzip.open(path, "wb") as snapshot:
+        for row in rows:
+            snapshot.write(orjson.dumps(row) + b"\n")
+    return path
+
+
+def read_movies(database):
+    with UnitOfWork(database) as unit_of_work:
+        movies = unit_of_work.session.query(MovieModel).order_by(MovieModel.imdb_id)
+        return [(movie.to_dict(), movie.json_blob) for movie in movies]
+
+
+def test_export_import_roundtrip(source, tmp_path):
+    path = tmp_path / "movies_snapshot.jsonl.gz"
+    target = f"sqlite:///{tmp_path / 'target.db'}"
+    progress = []
+
+    assert export_snapshot(source, path) == 5
+    assert import_snapshot(target, path, chunk_size=2, progress=progress.append) == 5
+
+    # Committed in chunks of 2 movies
+    assert progress == [2, 4, 5]
+    assert read_movies(target) == read_movies(source)
+
+
+def test_import_snapshot_updates_existing_movies(source, tmp_path):
+    updated = dict(movie(1), title="Updated title")
+    path = write_snapshot(tmp_path / "movies_snapshot.jsonl.gz", [updated, movie(6)])
+
+    assert import_snapshot(source, path) == 2
+
+    movies = read_movies(source)
+    assert len(movies) == 6
+    assert movies[0][0]["Title"] == "Updated title"
+    assert movies[0][1] == MovieModel.json_for(updated)
+
+
+def test_main(source, tmp_path):
+    path = tmp_path / "movies_snapshot.jsonl.gz"
+    target = f"sqlite:///{tmp_path / 'target.db'}"
+
+    main(["export", str(path), "--database", source])
+    main(["import", str(path), "--database", target, "--chunk-size", "3"])
+
+    assert read_movies(target) == read_movies(source)
@@ -0,0 +1,148 @@
+import pytest
+from data_layer.title_index import (
+    MERGE_SIZE,
+    TitleIndex,
+    TitleIndexRegistry,
+    title_trigrams,
+)
+
+
+def test_title_index_starts_unbuilt():
+    title_index = TitleIndex()
+
+    # Updating an unbuilt index keeps it unbuilt
+    title_index.add([("Inception", "tt1375666")])
+    title_index.remove([("Inception", "tt1375666")])
+    assert title_index.is_built() is False
+    assert title_index.suggest("inc") == []
+    assert title_index.similar("inception") == []
+    assert title_index.near_match("inception") is None
+
+
+def test_title_index_suggest():
+    title_index = TitleIndex()
+    title_index.build(
+        [
+            ("Star Wars: Episode V", "tt0080684"),
+            ("Stardust", "tt0486655"),
+            ("Star Wars: Episode IV", "tt0076759"),
+            ("Amélie", "tt0211915"),
+            ("Star Trek", "tt0796366"),
+        ]
+    )
+
+    assert title_index.suggest("STAR WARS") == [
+        ("Star Wars: Episode IV", "tt0076759"),
+        ("Star Wars: Episode V", "tt0080684"),
+    ]
+    assert title_index.suggest("star", limit=2) == [
+        ("Star Trek", "tt0796366"),
+        ("Star Wars: Episode IV", "tt0076759"),
+    ]
+    assert title_index.suggest("ame") == [("Amélie", "tt0211915")]
+    assert title_index.suggest("starw") == []
+    assert title_index.suggest(" : ") == []
+
+
+def test_title_index_add_and_remove():
+    title_index = TitleIndex()
+    title_index.build([("Inception", "tt1375666")])
+
+    title_index.add([("Interstellar", "tt0816692"), ("Inception", "tt1375666")])
+    assert title_index.suggest("in") == [
+        ("Inception", "tt1375666"),
+        ("Interstellar", "tt0816692"),
+    ]
+
+    title_index.remove([("Inception", "tt1375666"), ("Avatar", "tt0499549")])
+    assert title_index.suggest("in") == [("Interstellar", "tt0816692")]
+
+    title_index.invalidate()
+    assert title_index.is_built() is False
+
+
+def test_title_index_merges_large_batches():
+    title_index = TitleIndex()
+    title_index.build([("Movie 0", "tt0000000")])
+    movies = [(f"Movie {number}", f"tt{number:07d}") for number in range(1, 200)]
+
+    title_index.add(movies)
+    assert len(title_index.entries) == 200
+    assert title_index.entries == sorted(title_index.entries)
+
+    title_index.remove(movies[: MERGE_SIZE + 1])
+    assert len(title_index.entries) == 200 - MERGE_SIZE - 1
+    # Movies 1 to 65 are removed
+    assert title_index.suggest("movie 1", limit=1) == [("Movie 100", "tt0000100")]
+
+
+def test_title_trigrams():
+    # Words are padded like pg_trgm does: show_trgm('cat') = {"  c"," ca","at ",cat}
+    assert title_trigrams("cat") == {"  c", " ca", "at ", "cat"}
+    assert title_trigrams("a cat") == {"  a", " a ", "  c", " ca", "at ", "cat"}
+    assert title_trigrams("") == set()
+
+
+def test_title_index_similar():
+    title_index = TitleIndex()
+    title_index.build(
+        [
+            ("Interstellar", "tt0816692"),
+            ("Inception", "tt1375666"),
+            ("Interstate 60", "tt0205933"),
+            ("Avatar", "tt0499549"),
+        ]
+    )
+
+    # 11 trigrams shared out of the 14 of both titles
+    assert title_index.similar("INTERSTELAR") == [
+        ("Interstellar", "tt0816692", pytest.approx(11 / 14)),
+        ("Interstate 60", "tt0205933", pytest.approx(7 / 19)),
+    ]
+    assert title_index.similar("interstelar", limit=1) == [
+        ("Interstellar", "tt0816692", pytest.approx(11 / 14))
+    ]
+    assert title_index.similar("interstelar", threshold=0.8) == []
+    assert title_index.similar("Interstellar")[0][2] == 1.0
+    assert title_index.similar("The Matrix") == []
+    assert title_index.similar(" : ") == []
+
+
+def test_title_index_similar_follows_updates():
+    title_index = TitleIndex()
+    title_index.build([(f"Movie {number}", f"tt{number:07d}") for number in range(10)])
+
+    title_index.add([("Moviegoer", "tt0100000")])
+    title_index.remove([(f"Movie {number}", f"tt{number:07d}") for number in range(6)])
+
+    # More than half the slots were empty, so they were dropped
+    assert len(title_index.trigrams.entries) == 5
+    assert [imdb_id for _, imdb_id, _ in title_index.similar("movie 8")] == [
+        "tt0000008",
+        "tt0000006",
+        "tt0000007",
+        "tt0000009",
+        "tt0100000",
+    ]
+
+
+def test_title_index_near_match():
+    title_index = TitleIndex()
+    title_index.build([("Interstellar", "tt0816692"), ("Rocky II", "tt0079817")])
+
+    assert title_index.near_match("Interstelar") == ("Interstellar", "tt0816692")
+    assert title_index.near_match("rocky ii!") == ("Rocky II", "tt0079817")
+    # Numbered titles are different movies, however close
+    assert title_index.near_match("Rocky III") is None
+    assert title_index.near_match("Rocky 2") is None
+    assert title_index.near_match("Inception") is None
+
+
+def test_title_index_registry_shares_index_per_database():
+    registry = TitleIndexRegistry()
+
+    assert registry.get("sqlite:///movies.db") is registry.get("sqlite:///movies.db")
+    assert registry.get("sqlite:///movies.db") is not registry.get("sqlite:///other.db")
+
+    registry.clear()
+    assert registry.indexes == {}
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import Mock
 from sqlalchemy import inspect
 from data_layer.unit_of_work import UnitOfWork
+from data_layer.engine_registry import engine_registry
 from data_layer.models import MovieModel
 
 
@@ -11,6 +12,7 @@ class TestUnitOfWork(unittest.TestCase):
 
     Methods:
         setUp(): Set up the test environment before each test method is executed.
+        tearDown(): Dispose the shared engines after each test method is executed.
         test_table_created(): Test if the database table is created successfully.
         test_commit(): Test the commit functionality of the UnitOfWork class.
         test_rollback(): Test the rollback functionality of the UnitOfWork class.
@@ -31,6 +33,12 @@ class TestUnitOfWork(unittest.TestCase):
         # Create all tables defined in the models
         MovieModel.metadata.create_all(self.engine)
 
+    def tearDown(self):
+        """
+        Dispose the shared engines so every test starts with a fresh in-memory database.
+        """
+        engine_registry.dispose()
+
     def test_table_created(self):
         """
         Test if the database table is created successfully.
@@ -77,3 +85,22 @@ class TestUnitOfWork(unittest.TestCase):
 
         session_mock.rollback.assert_called_once()
         session_mock.close.assert_called_once()
+
+    def test_engine_shared_between_units_of_work(self):
+        """
+        Test that units of work for the same database share the engine and session maker.
+        """
+        other_uow = UnitOfWork(self.database)
+        self.assertIs(other_uow.session_maker, self.uow.session_maker)
+        with other_uow as uow:
+            self.assertIs(uow.session.bind, self.engine)
+
+    def test_rollback_invalidates_movie_count(self):
+        """
+        Test that rolling back forgets the cached movie count and title index.
+        """
+        self.uow.movie_count.set(3)
+        self.uow.title_index.build([("Inception", "tt1375666")])
+        self.uow.rollback()
+        self.assertFalse(self.uow.movie_count.is_known())
+        self.assertFalse(self.uow.title_index.is_built())
@@ -0,0 +1,481 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+import re
+import threading
+
+from data_layer.models import normalize_title
+
+# Separator of the fields packed in an index entry, sorted before any title character
+SEPARATOR = "\x00"
+
+# Batches of more entries than this are merged in one pass instead of one by one
+MERGE_SIZE = 64
+
+# Minimum similarity of the titles found by `TitleIndex.similar` (the pg_trgm default)
+SIMILARITY_THRESHOLD = 0.3
+
+# Minimum similarity of a title taken for another one by `TitleIndex.near_match`
+NEAR_MATCH_SIMILARITY = 0.75
+
+# Numbers and Roman numerals, which tell sequels apart ("Rocky II" and "Rocky III")
+NUMERAL = re.compile(
+    r"\d+|(?=[ivxlcdm])m*(c[md]|d?c{0,3})(x[cl]|l?x{0,3})(i[xv]|v?i{0,3})"
+)
+
+# Posting list of the trigrams found in no title
+NO_SLOTS = array("I")
+
+
+@lru_cache(maxsize=65536)
+def word_trigrams(word):
+    """
+    Get the trigrams of a word, padded like pg_trgm does: two spaces before, one after.
+
+    Parameters:
+    - `word` (str): The word, normalized.
+
+    Returns:
+    - frozenset: The trigrams of the word (e.g. "  a", " ab", "ab " for "ab").
+    """
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def title_trigrams(normalized):
+    """
+    Get the trigrams of a title, the union of the trigrams of its words.
+
+    Parameters:
+    - `normalized` (str): The title, normalized (see `models.normalize_title`).
+
+    Returns:
+    - frozenset: The trigrams of the title.
+    """
+    return frozenset().union(*map(word_trigrams, normalized.split()))
+
+
+def numerals(normalized):
+    """
+    Get the numbers and Roman numerals of a title.
+
+    Parameters:
+    - `normalized` (str): The title, normalized (see `models.normalize_title`).
+
+    Returns:
+    - list: The numerals of the title, sorted.
+    """
+    return sorted(word for word in normalized.split() if NUMERAL.fullmatch(word))
+
+
+class TrigramIndex:
+    """
+    Trigram index of the entries of a `TitleIndex`, to find the titles closest to a query.
+
+    Titles are compared like PostgreSQL's pg_trgm does: the similarity of two normalized
+    titles is the number of trigrams they share divided by the number of distinct
+    trigrams of both. Each entry gets a slot, and each trigram a posting list, the array
+    of the slots of the titles having it in ascending order, so a query only reads the
+    posting lists of its own trigrams. Removed entries leave an empty slot, skipped by
+    the queries, until half the slots are empty and the index is rebuilt. It is not
+    thread-safe: `TitleIndex` guards it with its lock.
+
+    Attributes:
+    - `entries` (list): The entry of each slot (see `TitleIndex.entry`), None if removed.
+    - `slots` (dict): The slot of each entry.
+    - `sizes` (array): The number of trigrams of the title of each slot.
+    - `postings` (dict): The posting list of each trigram.
+
+    Methods:
+    - `add(entry)`: Add an entry.
+    - `remove(entry)`: Remove an entry.
+    - `similar(normalized, limit=5, threshold=SIMILARITY_THRESHOLD)`: Get the closest entries.
+    """
+
+    def __init__(self, entries=()):
+        """
+        Initialize a TrigramIndex.
+
+        Parameters:
+        - `entries` (iterable, optional): The entries indexed first.
+        """
+        self.entries = []
+        self.slots = {}
+        self.sizes = array("I")
+        self.postings = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        """
+        Add an entry, unless it is indexed already.
+
+        Parameters:
+        - `entry` (str): The entry (see `TitleIndex.entry`).
+        """
+        if entry in self.slots:
+            return
+        slot = len(self.entries)
+        self.entries.append(entry)
+        self.slots[entry] = slot
+        trigrams = title_trigrams(entry.partition(SEPARATOR)[0])
+        self.sizes.append(len(trigrams))
+        for trigram in trigrams:
+            postings = self.postings.get(trigram)
+            if postings is None:
+                postings = self.postings[trigram] = array("I")
+            postings.append(slot)
+
+    def remove(self, entry):
+        """
+        Remove an entry, if it is indexed.
+
+        Parameters:
+        - `entry` (str): The entry (see `TitleIndex.entry`).
+        """
+        slot = self.slots.pop(entry, None)
+        if slot is None:
+            return
+        self.entries[slot] = None
+        if len(self.slots) * 2 < len(self.entries):
+            # Half the slots are empty, the index is rebuilt without them
+            entries = [entry for entry in self.entries if entry is not None]
+            self.__init__(entries)
+
+    def similar(self, normalized, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """
+        Get the entries whose title is the closest to a normalized title.
+
+        A title sharing `shared` of the `size` trigrams of the query has a similarity
+        of at most `shared / size`, so the titles reaching the threshold share at least
+        `needed` trigrams, and are all in one of the `size - needed + 1` shortest
+        posting lists (prefix filtering). Only those are counted. The titles found are
+        then checked from the one sharing the most trigrams, and the search stops as
+        soon as the remaining ones cannot beat the closest titles kept.
+
+        Parameters:
+        - `normalized` (str): The title, normalized (see `models.normalize_title`).
+        - `limit` (int): The maximum number of entries.
+        - `threshold` (float): The minimum similarity of the entries, between 0 and 1.
+
+        Returns:
+        - list: The (similarity, entry) of the closest entries, by decreasing
+          similarity, then in entry order.
+        """
+        trigrams = title_trigrams(normalized)
+        size = len(trigrams)
+        if not size or limit < 1:
+            return []
+        postings = sorted(
+            (self.postings.get(trigram, NO_SLOTS) for trigram in trigrams), key=len
+        )
+        # Compared like the similarities, so rounding errors cannot exclude a title
+        needed = next(
+            (shared for shared in range(1, size + 1) if shared / size >= threshold),
+            size + 1,
+        )
+        read = max(size - needed + 1, 0)
+        counts = Counter()
+        for slots in postings[:read]:
+            counts.update(slots)
+        unread = size - read
+
+        closest = []
+        lowest = threshold
+        candidates = [
+            slot for slot, count in counts.items() if count + unread >= needed
+        ]
+        candidates.sort(key=counts.__getitem__, reverse=True)
+        for slot in candidates:
+            # Trigrams shared at most, found in the lists read or not
+            shared = counts[slot] + unread
+            if shared / size < lowest:
+                break
+            entry, other_size = self.entries[slot], self.sizes[slot]
+            shared = min(shared, other_size)
+            if entry is None or shared / (size + other_size - shared) < lowest:
+                continue
+            shared = len(trigrams & title_trigrams(entry.partition(SEPARATOR)[0]))
+            similarity = shared / (size + other_size - shared)
+            if similarity >= lowest:
+                closest.append((similarity, entry))
+                closest.sort(key=lambda found: (-found[0], found[1]))
+                del closest[limit:]
+                if len(closest) == limit:
+                    lowest = closest[-1][0]
+        return closest
+
+
+class TitleIndex:
+    """
+    In-memory prefix and trigram index of the movie titles of a database.
+
+    Each movie is packed in one string, `normalized title \\0 title \\0 imdb_id`, kept in
+    a sorted list, so a prefix lookup is a binary search followed by a scan of the
+    matching entries, and each movie costs a single string and list slot instead of a
+    trie node or tuple per title. The entries are also indexed by trigram (see
+    `TrigramIndex`), to find the titles closest to a misspelled one. The index is built
+    once from the movies table and then kept up to date by the writes made through the
+    repositories, like `MovieCount`. It is shared by threads (the fetcher and the seed
+    write from worker threads), so it is guarded by a lock.
+
+    Attributes:
+    - `entries` (list or None): The sorted entries, or None if the index is not built.
+    - `trigrams` (TrigramIndex or None): The trigram index of the entries, or None if
+      the index is not built.
+
+    Methods:
+    - `is_built()`: Check if the index has been built.
+    - `build(movies)`: Build the index from the (title, imdb_id) of every movie.
+    - `add(movies)`: Add movies to a built index.
+    - `remove(movies)`: Remove movies from a built index.
+    - `update(removed, added)`: Remove and add movies at once.
+    - `suggest(prefix, limit=10)`: Get the movies whose normalized title starts with a prefix.
+    - `similar(title, limit=5, threshold=SIMILARITY_THRESHOLD)`: Get the movies whose title is the closest to a title.
+    - `near_match(title, threshold=NEAR_MATCH_SIMILARITY)`: Get the movie whose title only differs from a title by typos.
+    - `invalidate()`: Forget the index, so it is built again on next use.
+    """
+
+    def __init__(self):
+        """
+        Initialize an unbuilt TitleIndex.
+        """
+        self.entries = None
+        self.trigrams = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def entry(title, imdb_id):
+        """
+        Pack a movie into an index entry.
+
+        Parameters:
+        - `title` (str): The title of the movie.
+        - `imdb_id` (str): The IMDb ID of the movie.
+
+        Returns:
+        - str: The entry, ordered by normalized title, title and IMDb ID.
+        """
+        title = title or ""
+        return SEPARATOR.join((normalize_title(title), title, imdb_id))
+
+    @staticmethod
+    def unpack(entry):
+        """
+        Unpack a movie from an index entry.
+
+        Parameters:
+        - `entry` (str): The entry (see `entry`).
+
+        Returns:
+        - tuple: The (title, imdb_id) of the movie.
+        """
+        title, _, imdb_id = entry.partition(SEPARATOR)[2].rpartition(SEPARATOR)
+        return title, imdb_id
+
+    def is_built(self):
+        """
+        Check if the index has been built.
+
+        Returns:
+        - bool: True if the index is built, False otherwise.
+        """
+        return self.entries is not None
+
+    def build(self, movies):
+        """
+        Build the index from every movie of the database.
+
+        Parameters:
+        - `movies` (iterable): The (title, imdb_id) of every movie.
+        """
+        entries = sorted(self.entry(title, imdb_id) for title, imdb_id in movies)
+        trigrams = TrigramIndex(entries)
+        with self.lock:
+            self.entries = entries
+            self.trigrams = trigrams
+
+    def add(self, movies):
+        """
+        Add movies to the index. Unbuilt indexes stay unbuilt.
+
+        Parameters:
+        - `movies` (iterable): The (title, imdb_id) of the movies.
+        """
+        self.update(added=movies)
+
+    def remove(self, movies):
+        """
+        Remove movies from the index. Unbuilt indexes stay unbuilt.
+
+        Parameters:
+        - `movies` (iterable): The (title, imdb_id) of the movies.
+        """
+        self.update(removed=movies)
+
+    def update(self, removed=(), added=()):
+        """
+        Remove movies from the index, then add movies, holding the lock once. Unbuilt
+        indexes stay unbuilt.
+
+        Entries are packed before the lock is taken, so bulk writes block the readers
+        only while the index changes.
+
+        Parameters:
+        - `removed` (iterable): The (title, imdb_id) of the movies removed.
+        - `added` (iterable): The (title, imdb_id) of the movies added.
+        """
+        removed = {self.entry(title, imdb_id) for title, imdb_id in removed}
+        added = sorted({self.entry(title, imdb_id) for title, imdb_id in added})
+        with self.lock:
+            if self.entries is None:
+                return
+            for entry in removed:
+                self.trigrams.remove(entry)
+            if len(removed) > MERGE_SIZE:
+                self.entries = [entry for entry in self.entries if entry not in removed]
+            else:
+                for entry in removed:
+                    if self.contains(entry):
+                        del self.entries[bisect_left(self.entries, entry)]
+
+            added = [entry for entry in added if not self.contains(entry)]
+            for entry in added:
+                self.trigrams.add(entry)
+            if len(added) > MERGE_SIZE:
+                # Both lists are sorted, so they are merged in linear time
+                self.entries = sorted(self.entries + added)
+            else:
+                for entry in added:
+                    insort(self.entries, entry)
+
+    def contains(self, entry):
+        """
+        Check if a built index contains an entry. The caller holds the lock.
+
+        Parameters:
+        - `entry` (str): The entry (see `entry`).
+
+        Returns:
+        - bool: True if the entry is in the index, False otherwise.
+        """
+        position = bisect_left(self.entries, entry)
+        return position < len(self.entries) and self.entries[position] == entry
+
+    def suggest(self, prefix, limit=10):
+        """
+        Get the movies whose normalized title starts with a prefix.
+
+        Parameters:
+        - `prefix` (str): The beginning of the title, normalized like the titles.
+        - `limit` (int): The maximum number of movies.
+
+        Returns:
+        - list: The (title, imdb_id) of the movies found, in normalized title order.
+          Empty if the prefix has no words or the index is not built.
+        """
+        prefix = normalize_title(prefix)
+        suggestions = []
+        with self.lock:
+            if not prefix or self.entries is None:
+                return suggestions
+            position = bisect_left(self.entries, prefix)
+            for entry in self.entries[position : position + limit]:
+                if not entry.startswith(prefix):
+                    break
+                suggestions.append(self.unpack(entry))
+        return suggestions
+
+    def similar(self, title, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """
+        Get the movies whose title is the closest to a title, with trigrams (see
+        `TrigramIndex.similar`).
+
+        Parameters:
+        - `title` (str): The title (see `models.normalize_title`).
+        - `limit` (int): The maximum number of movies.
+        - `threshold` (float): The minimum similarity of the titles, between 0 and 1.
+
+        Returns:
+        - list: The (title, imdb_id, similarity) of the movies found, by decreasing
+          similarity. Empty if the index is not built.
+        """
+        normalized = normalize_title(title)
+        with self.lock:
+            if self.trigrams is None:
+                return []
+            closest = self.trigrams.similar(normalized, limit, threshold)
+        return [(*self.unpack(entry), similarity) for similarity, entry in closest]
+
+    def near_match(self, title, threshold=NEAR_MATCH_SIMILARITY):
+        """
+        Get the movie whose title only differs from a title by typos.
+
+        Titles this close may still be different movies when they are numbered, so the
+        numbers and Roman numerals of the closest title must be the same.
+
+        Parameters:
+        - `title` (str): The title.
+        - `threshold` (float): The minimum similarity of the titles, between 0 and 1.
+
+        Returns:
+        - tuple or None: The (title, imdb_id) of the closest movie, or None if there is
+          none or the index is not built.
+        """
+        for found, imdb_id, _ in self.similar(title, 1, threshold):
+            if numerals(normalize_title(found)) == numerals(normalize_title(title)):
+                return found, imdb_id
+        return None
+
+    def invalidate(self):
+        """
+        Forget the index, so it is built again on next use.
+        """
+        with self.lock:
+            self.entries = None
+            self.trigrams = None
+
+
+class TitleIndexRegistry:
+    """
+    Process-wide registry of the title indexes keyed by database URL.
+
+    Methods:
+    - `get(database)`: Get the title index of a database URL.
+    - `clear(database=None)`: Forget the index of a database, or every index.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty TitleIndexRegistry.
+        """
+        self.indexes = {}
+
+    def get(self, database):
+        """
+        Get the title index of a database URL, creating it on first use.
+
+        Parameters:
+        - `database` (str): The database connection string.
+
+        Returns:
+        - TitleIndex: The shared title index of the database.
+        """
+        return self.indexes.setdefault(str(database), TitleIndex())
+
+    def clear(self, database=None):
+        """
+        Forget the index of a database, or every index.
+
+        Parameters:
+        - `database` (str, optional): The database connection string. Defaults to every
+          database.
+        """
+        if database is None:
+            self.indexes.clear()
+        else:
+            self.indexes.pop(str(database), None)
+
+
+title_indexes = TitleIndexRegistry()
@@ -1,5 +1,6 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from data_layer.engine_registry import engine_registry
+from data_layer.movie_count import movie_counts
+from data_layer.title_index import title_indexes
 
 
 class UnitOfWork:
@@ -8,6 +9,8 @@ class UnitOfWork:
 
     Attributes:
     - `database` (str): The database connection string.
+    - `movie_count` (MovieCount): The cached number of movies of the database, shared with its repositories.
+    - `title_index` (TitleIndex): The title index of the database, shared with its repositories.
     - `session_maker` (sqlalchemy.orm.session.sessionmaker): The session maker object.
 
     Methods:
@@ -22,10 +25,15 @@ class UnitOfWork:
         """
         Initialize the UnitOfWork with the given database connection string.
 
+        The session maker (and its engine) is shared through the engine registry, so
+        building a UnitOfWork per request does not create a new connection pool.
+
         Parameters:
         - `database` (str): The database connection string.
         """
-        self.session_maker = sessionmaker(bind=create_engine(database))
+        self.movie_count = movie_counts.get(database)
+        self.title_index = title_indexes.get(database)
+        self.session_maker = engine_registry.get_session_maker(database)
 
     def __enter__(self):
         """
@@ -56,5 +64,10 @@ class UnitOfWork:
     def rollback(self):
         """
         Rollback the current transaction.
+
+        The cached movie count and title index may include the discarded changes, so
+        they are invalidated.
         """
         self.session.rollback()
+        self.movie_count.invalidate()
+        self.title_index.invalidate()
@@ -0,0 +1,86 @@
+"""Add movies id
+
+Revision ID: b7d2e4f9a1c3
+Revises: f1b6d3a8c2e5
+Create Date: 2026-10-19 10:12:08.331904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f9a1c3'
+down_revision: Union[str, None] = 'f1b6d3a8c2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The FTS5 index is keyed on the movies rowid, which VACUUM may renumber while the
+# IMDb ID is the primary key. The integer `id` primary key is the rowid itself and
+# is never renumbered, so the index is recreated on it
+# (models.SQLITE_SEARCH_DDL at this revision).
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE movies_fts USING fts5("
+    "title, plot, actors, director, content='movies', content_rowid='{key}', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO movies_fts(movies_fts, rank) "
+    "VALUES('rank', 'bm25(10.0, 1.0, 2.0, 2.0)')",
+    "CREATE TRIGGER movies_fts_insert AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, title, plot, actors, director) "
+    "VALUES (new.{key}, new.title, new.plot, new.actors, new.director); END",
+    "CREATE TRIGGER movies_fts_delete AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, plot, actors, director) "
+    "VALUES ('delete', old.{key}, old.title, old.plot, old.actors, old.director); END",
+    "CREATE TRIGGER movies_fts_update "
+    "AFTER UPDATE OF title, plot, actors, director ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, plot, actors, director) "
+    "VALUES ('delete', old.{key}, old.title, old.plot, old.actors, old.director); "
+    "INSERT INTO movies_fts(rowid, title, plot, actors, director) "
+    "VALUES (new.{key}, new.title, new.plot, new.actors, new.director); END",
+    # Index the movies stored in the rebuilt table
+    "INSERT INTO movies_fts(movies_fts) VALUES('rebuild')",
+]
+
+
+def set_sqlite_fts(key):
+    # The triggers are dropped with the movies table, the FTS5 table is not
+    op.execute("DROP TABLE IF EXISTS movies_fts")
+    for statement in SQLITE_FTS_DDL:
+        op.execute(statement.format(key=key))
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite cannot change a primary key, so the table is copied; the movies get
+        # their ids in rowid order
+        with op.batch_alter_table(
+            'movies', recreate='always', naming_convention={'pk': 'pk_%(table_name)s'}
+        ) as batch_op:
+            batch_op.drop_constraint('pk_movies', type_='primary')
+            batch_op.add_column(sa.Column('id', sa.Integer(), nullable=False))
+            batch_op.create_primary_key('pk_movies', ['id'])
+        op.create_index('ix_movies_imdb_id', 'movies', ['imdb_id'], unique=True)
+        set_sqlite_fts('id')
+        return
+
+    op.execute("ALTER TABLE movies DROP CONSTRAINT movies_pkey")
+    op.execute("ALTER TABLE movies ADD COLUMN id SERIAL PRIMARY KEY")
+    op.create_index('ix_movies_imdb_id', 'movies', ['imdb_id'], unique=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.drop_index('ix_movies_imdb_id', table_name='movies')
+        with op.batch_alter_table('movies', recreate='always') as batch_op:
+            batch_op.drop_constraint('pk_movies', type_='primary')
+            batch_op.drop_column('id')
+            batch_op.create_primary_key('pk_movies', ['imdb_id'])
+        set_sqlite_fts('rowid')
+        return
+
+    op.drop_index('ix_movies_imdb_id', table_name='movies')
+    op.execute("ALTER TABLE movies DROP CONSTRAINT movies_pkey")
+    op.execute("ALTER TABLE movies DROP COLUMN id")
+    op.execute("ALTER TABLE movies ADD PRIMARY KEY (imdb_id)")
@@ -0,0 +1,78 @@
+"""Add movies full-text search
+
+Revision ID: c4e7a1d9f2b6
+Revises: 8e5d2b6c41a7
+Create Date: 2026-10-18 16:25:43.512907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1d9f2b6'
+down_revision: Union[str, None] = '8e5d2b6c41a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# FTS5 table kept in sync with the movies table by triggers
+# (models.SQLITE_SEARCH_DDL at this revision)
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE movies_fts USING fts5("
+    "title, plot, actors, director, content='movies', content_rowid='rowid', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO movies_fts(movies_fts, rank) "
+    "VALUES('rank', 'bm25(10.0, 1.0, 2.0, 2.0)')",
+    "CREATE TRIGGER movies_fts_insert AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, title, plot, actors, director) "
+    "VALUES (new.rowid, new.title, new.plot, new.actors, new.director); END",
+    "CREATE TRIGGER movies_fts_delete AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, plot, actors, director) "
+    "VALUES ('delete', old.rowid, old.title, old.plot, old.actors, old.director); END",
+    "CREATE TRIGGER movies_fts_update AFTER UPDATE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, plot, actors, director) "
+    "VALUES ('delete', old.rowid, old.title, old.plot, old.actors, old.director); "
+    "INSERT INTO movies_fts(rowid, title, plot, actors, director) "
+    "VALUES (new.rowid, new.title, new.plot, new.actors, new.director); END",
+    # Index the movies already stored
+    "INSERT INTO movies_fts(movies_fts) VALUES('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS movies_fts_update",
+    "DROP TRIGGER IF EXISTS movies_fts_delete",
+    "DROP TRIGGER IF EXISTS movies_fts_insert",
+    "DROP TABLE IF EXISTS movies_fts",
+]
+
+# Generated tsvector column and its GIN index
+# (models.POSTGRESQL_SEARCH_DDL at this revision)
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE movies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(director, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(actors, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(plot, '')), 'C')) STORED",
+    "CREATE INDEX ix_movies_search_vector ON movies USING GIN (search_vector)",
+]
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_movies_search_vector",
+    "ALTER TABLE movies DROP COLUMN IF EXISTS search_vector",
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_UPGRADE, SQLITE_DOWNGRADE),
+    'postgresql': (POSTGRESQL_UPGRADE, POSTGRESQL_DOWNGRADE),
+}
+
+
+def upgrade() -> None:
+    upgrade_statements, _ = STATEMENTS.get(op.get_bind().dialect.name, ([], []))
+    for statement in upgrade_statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    _, downgrade_statements = STATEMENTS.get(op.get_bind().dialect.name, ([], []))
+    for statement in downgrade_statements:
+        op.execute(statement)
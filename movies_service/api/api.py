@@ -1,39 +1,170 @@
+import base64
+import binascii
 import logging
 import json
 from fastapi import HTTPException, Query, Depends, status, Header, Response, status
-from data_layer.unit_of_work import UnitOfWork
+from data_layer.async_unit_of_work import AsyncUnitOfWork
 from movies_service.app import app
-from data_layer.movies_repository import MoviesRepository
+from data_layer.async_movies_repository import AsyncMoviesRepository
+from data_layer.models import FIELDS
+from data_layer.search import SEARCH_KEY_TYPES
+from fastapi.responses import ORJSONResponse
 from fastapi.security.api_key import APIKeyHeader
-from fastapi_cache.decorator import cache
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from movies_service.caching import movies_cache
+from movies_service.single_flight import fetch_flights, read_flights
 
-PAGE_SIZE = 10
 
+def encode_cursor(movie):
+    """
+    Build the opaque pagination cursor pointing after a movie.
 
-@app.get("/movies")
-@cache(expire=1)
-async def get_all_movies(
-    limit: int = Query(10, title="The number of movies to retrieve", ge=1),
-    page: int = Query(1, title="Results page", ge=1),
-):
+    Parameters:
+    - `movie` (dict): The last movie of a page.
+
+    Returns:
+    - str: The URL-safe cursor encoding the movie title and IMDb ID.
     """
-    Retrieve a list of movies.
+    key = json.dumps([movie["Title"], movie["imdbID"]]).encode()
+    return base64.urlsafe_b64encode(key).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a pagination cursor built by `encode_cursor`.
 
     Parameters:
-    - `limit` (int): The number of movies to retrieve. Defaults to 10. Must be greater than or equal to 1.
-    - `page` (int): The results page to retrieve. Defaults to 1. Must be greater than or equal to 1.
+    - `cursor` (str): The opaque cursor received from a client.
 
     Returns:
-    - List[Movie]: A list of movies retrieved based on the specified limit and page.
+    - tuple: The (title, imdb_id) of the last movie of the previous page.
 
-    Cache:
-    - This endpoint is cached for 60 seconds.
+    Raises:
+    - HTTPException: If the cursor is malformed.
+    """
+    try:
+        title, imdb_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return title, imdb_id
+
+
+def encode_search_cursor(key):
+    """
+    Build the opaque pagination cursor pointing after a search result.
+
+    Parameters:
+    - `key` (tuple): The (rank, key) ordering key of the last result of a page.
+
+    Returns:
+    - str: The URL-safe cursor encoding the key.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_search_cursor(cursor, dialect):
+    """
+    Decode a search pagination cursor built by `encode_search_cursor`.
+
+    Parameters:
+    - `cursor` (str): The opaque cursor received from a client.
+    - `dialect` (str): The name of the database dialect, which sets the type of the
+      key (see `search.SEARCH_KEY_TYPES`).
+
+    Returns:
+    - tuple: The (rank, key) of the last result of the previous page.
+
+    Raises:
+    - HTTPException: If the cursor is malformed.
+    """
+    rank, key = decode_cursor(cursor)
+    if isinstance(rank, bool) or not isinstance(rank, (int, float)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Exact type: a boolean is not an integer key
+    if type(key) is not SEARCH_KEY_TYPES.get(dialect):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return rank, key
+
+
+def title_index_loading():
+    """
+    Check if the title index is still being built after startup (see
+    `app.load_title_index`).
+
+    Until then, the paths using it answer without it instead of building it again on
+    the event loop.
+
+    Returns:
+    - bool: True if the index is being built, False otherwise.
+    """
+    task = getattr(app.state, "title_index_task", None)
+    return task is not None and not task.done()
+
+
+def parse_fields(fields):
+    """
+    Parse the comma-separated list of fields requested by a client.
+
+    Parameters:
+    - `fields` (str or None): The `fields` query parameter (e.g. "Title,Year,imdbID").
+
+    Returns:
+    - list or None: The requested field names, or None to retrieve all of them.
+
+    Raises:
+    - HTTPException: If an unknown field is requested.
     """
-    with UnitOfWork(app.state.database_url) as unit_of_work:
-        repo = MoviesRepository(unit_of_work.session)
-        if not repo.is_database_empty():
-            offset = (page - 1) * PAGE_SIZE
-            return repo.get_all(offset, limit)
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested
+
+
+async def read_movies(key, generation, limit, page, after, requested_fields):
+    """
+    Query a page of movies and cache the response.
+
+    Parameters:
+    - `key` (str): The cache key of the page.
+    - `generation` (int): The cache generation read before the query.
+    - `limit` (int): The number of movies to retrieve.
+    - `page` (int): The results page to retrieve, ignored when `after` is given.
+    - `after` (tuple or None): The (title, imdb_id) decoded from the cursor.
+    - `requested_fields` (list or None): The fields to retrieve.
+
+    Returns:
+    - ORJSONResponse: The page of movies.
+
+    Raises:
+    - HTTPException: If the database is empty.
+    """
+    # The cursor is built from the title and IMDb ID of the last movie
+    query_fields = requested_fields and list({*requested_fields, "Title", "imdbID"})
+    async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+        repo = AsyncMoviesRepository(
+            unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+        )
+        if not await repo.is_database_empty():
+            offset = 0 if after else (page - 1) * limit
+            movies = await repo.get_all(offset, limit, after, query_fields)
+            headers = {"X-Total-Count": str(await repo.count())}
+            if len(movies) == limit:
+                headers["X-Next-Cursor"] = encode_cursor(movies[-1])
+            if requested_fields:
+                movies = [
+                    {field: movie[field] for field in movie if field in requested_fields}
+                    for movie in movies
+                ]
+            # Rows only hold JSON types, so they skip FastAPI's jsonable_encoder
+            response = ORJSONResponse(movies, headers=headers)
+            await movies_cache.set(key, response, generation)
+            return response
         else:
             logging.warning("Movies not found in the database")
             raise HTTPException(
@@ -41,31 +172,53 @@ async def get_all_movies(
             )
 
 
-@app.get("/movie/{title}")
-@cache(expire=1)
-async def get_movie(title: str):
+async def read_movie(key, generation, title, requested_fields):
     """
-    Retrieve information about a specific movie.
+    Query a movie by its title and cache the response.
 
     Parameters:
+    - `key` (str): The cache key of the movie.
+    - `generation` (int): The cache generation read before the query.
     - `title` (str): The title of the movie to retrieve.
+    - `requested_fields` (list or None): The fields to retrieve.
 
     Returns:
-    - Movie: Information about the specified movie.
+    - Response: The movie, or a 404 response suggesting the closest titles if no title
+      matches.
 
-    Cache:
-    - This endpoint is cached for 60 seconds.
+    Raises:
+    - HTTPException: If the database is empty.
     """
-    with UnitOfWork(app.state.database_url) as unit_of_work:
-        repo = MoviesRepository(unit_of_work.session)
-        if not repo.is_database_empty():
-            movie = repo.get_by_title(title)
+    async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+        repo = AsyncMoviesRepository(
+            unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+        )
+        if not await repo.is_database_empty():
+            if requested_fields:
+                movie = await repo.get_by_title(title, requested_fields)
+            else:
+                # The whole movie is sent as stored, without encoding it again
+                movie = await repo.get_json_by_title(title)
             if not movie:
-                raise HTTPException(
+                suggestions = (
+                    [] if title_index_loading() else await repo.similar_titles(title)
+                )
+                return ORJSONResponse(
+                    {
+                        "detail": f'No exact match for "{title}" in the database.',
+                        "suggestions": [
+                            {"Title": found, "imdbID": imdb_id}
+                            for found, imdb_id, _ in suggestions
+                        ],
+                    },
                     status_code=404,
-                    detail=f'No exact match for "{title}" in the database.',
                 )
-            return movie
+            if requested_fields:
+                response = ORJSONResponse(movie)
+            else:
+                response = Response(content=movie, media_type="application/json")
+            await movies_cache.set(key, response, generation)
+            return response
         else:
             logging.warning("Movie not found in the database")
             raise HTTPException(
@@ -73,11 +226,221 @@ async def get_movie(title: str):
             )
 
 
+@app.get("/movies")
+async def get_all_movies(
+    limit: int = Query(10, title="The number of movies to retrieve", ge=1),
+    page: int = Query(1, title="Results page", ge=1),
+    cursor: str = Query(None, title="Cursor returned in X-Next-Cursor"),
+    fields: str = Query(None, title="Comma-separated fields to retrieve"),
+):
+    """
+    Retrieve a list of movies.
+
+    Parameters:
+    - `limit` (int): The number of movies to retrieve. Defaults to 10. Must be greater than or equal to 1.
+    - `page` (int): The results page to retrieve. Defaults to 1. Must be greater than or equal to 1.
+    - `cursor` (str, optional): The `X-Next-Cursor` header of the previous page. When given,
+      the page right after that one is returned and `page` is ignored.
+    - `fields` (str, optional): Comma-separated fields to retrieve (e.g. "Title,Year,imdbID").
+      Defaults to all of them.
+
+    Returns:
+    - List[Movie]: A list of movies retrieved based on the specified limit and page.
+      The `X-Total-Count` response header holds the number of movies in the database.
+      When the page is full, the `X-Next-Cursor` response header holds the cursor of the
+      next page.
+
+    Cache:
+    - Pages are cached until a movie is added or deleted.
+    """
+    key = movies_cache.list_key(limit, page, cursor, fields)
+    generation = movies_cache.generation
+    cached = await movies_cache.get(key)
+    if cached is not None:
+        return cached
+    after = decode_cursor(cursor) if cursor else None
+    requested_fields = parse_fields(fields)
+    # Concurrent misses of the same page share one query
+    return await read_flights.do(
+        (key, generation),
+        lambda: read_movies(key, generation, limit, page, after, requested_fields),
+    )
+
+
+@app.get("/movie/{title}")
+async def get_movie(
+    title: str,
+    fields: str = Query(None, title="Comma-separated fields to retrieve"),
+):
+    """
+    Retrieve information about a specific movie.
+
+    Titles are matched ignoring case, accents and punctuation, and an exact title wins
+    ties.
+
+    Parameters:
+    - `title` (str): The title of the movie to retrieve.
+    - `fields` (str, optional): Comma-separated fields to retrieve (e.g. "Title,Year,Plot").
+      Defaults to all of them.
+
+    Returns:
+    - Movie: Information about the specified movie. When no title matches, the 404
+      response lists the closest titles in `suggestions` (see `similar_titles`).
+
+    Cache:
+    - Movies are cached until they are added again or deleted.
+    """
+    key = movies_cache.movie_key(title, fields)
+    generation = movies_cache.generation
+    cached = await movies_cache.get(key)
+    if cached is not None:
+        return cached
+    requested_fields = parse_fields(fields)
+    # Concurrent misses of the same movie share one query
+    return await read_flights.do(
+        (key, generation),
+        lambda: read_movie(key, generation, title, requested_fields),
+    )
+
+
+async def read_search(key, generation, q, limit, after, requested_fields):
+    """
+    Search movies and cache the response.
+
+    Parameters:
+    - `key` (str): The cache key of the results page.
+    - `generation` (int): The cache generation read before the query.
+    - `q` (str): The search query.
+    - `limit` (int): The number of movies to retrieve.
+    - `after` (tuple or None): The (rank, key) decoded from the cursor.
+    - `requested_fields` (list or None): The fields to retrieve.
+
+    Returns:
+    - ORJSONResponse: The page of movies found, best matches first.
+    """
+    async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+        repo = AsyncMoviesRepository(
+            unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+        )
+        results = await repo.search(q, limit, after, requested_fields)
+    headers = {}
+    if len(results) == limit:
+        headers["X-Next-Cursor"] = encode_search_cursor(results[-1][1])
+    response = ORJSONResponse([movie for movie, _ in results], headers=headers)
+    await movies_cache.set(key, response, generation)
+    return response
+
+
+@app.get("/search")
+async def search_movies(
+    q: str = Query(..., title="The words searched", min_length=1),
+    limit: int = Query(10, title="The number of movies to retrieve", ge=1),
+    cursor: str = Query(None, title="Cursor returned in X-Next-Cursor"),
+    fields: str = Query(None, title="Comma-separated fields to retrieve"),
+):
+    """
+    Search movies by the words of their title, plot, actors or director.
+
+    Parameters:
+    - `q` (str): The words searched. Movies matching all of them are returned (e.g.
+      "wonderful world disney").
+    - `limit` (int): The number of movies to retrieve. Defaults to 10.
+    - `cursor` (str, optional): The `X-Next-Cursor` header of the previous page.
+    - `fields` (str, optional): Comma-separated fields to retrieve. Defaults to all of
+      them.
+
+    Returns:
+    - List[Movie]: The movies found, best matches first (title matches rank highest).
+      When the page is full, the `X-Next-Cursor` response header holds the cursor of
+      the next page.
+
+    Cache:
+    - Results are cached until a movie is added or deleted.
+    """
+    key = movies_cache.list_key("search", q, limit, cursor, fields)
+    generation = movies_cache.generation
+    cached = await movies_cache.get(key)
+    if cached is not None:
+        return cached
+    dialect = make_url(app.state.database_url).get_backend_name()
+    after = decode_search_cursor(cursor, dialect) if cursor else None
+    requested_fields = parse_fields(fields)
+    # Concurrent misses of the same search share one query
+    return await read_flights.do(
+        (key, generation),
+        lambda: read_search(key, generation, q, limit, after, requested_fields),
+    )
+
+
+@app.get("/movies/suggest")
+async def suggest_movies(
+    prefix: str = Query(..., title="The beginning of the title", min_length=1),
+    limit: int = Query(10, title="The number of movies to retrieve", ge=1),
+):
+    """
+    Suggest movies whose title starts with a prefix, for type-ahead.
+
+    Titles are matched from an in-memory index built after startup and updated when
+    movies are added or deleted, ignoring case, accents and punctuation (e.g. "star wars ep"
+    matches "Star Wars: Episode IV - A New Hope").
+
+    Parameters:
+    - `prefix` (str): The beginning of the title.
+    - `limit` (int): The number of movies to retrieve. Defaults to 10.
+
+    Returns:
+    - List[dict]: The `Title` and `imdbID` of the movies found, in title order.
+
+    Raises:
+    - HTTPException: If the title index is still being built after startup (503).
+    """
+    if title_index_loading():
+        raise HTTPException(
+            status_code=503,
+            detail="Title index is loading",
+            headers={"Retry-After": "1"},
+        )
+    async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+        repo = AsyncMoviesRepository(
+            unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+        )
+        suggestions = await repo.suggest_titles(prefix, limit)
+    return ORJSONResponse(
+        [{"Title": title, "imdbID": imdb_id} for title, imdb_id in suggestions]
+    )
+
+
+async def fetch_and_save_movie(title):
+    """
+    Fetch the first movie matching a title from OMDb and save it.
+
+    The cached responses are invalidated for the movies saved, even if the fetch fails
+    after saving some of them, and before the result is shared with the requests.
+
+    Parameters:
+    - `title` (str): The title of the movie to add.
+
+    Returns:
+    - list or None: The result of `MovieDataFetcher.fetch_and_save_movies_data`.
+    """
+    saved = []
+    try:
+        return await app.state.mdf.fetch_and_save_movies_data(
+            title, limit=1, saved=saved
+        )
+    finally:
+        if saved:
+            await movies_cache.invalidate(saved)
+
+
 @app.post("/movie/{title}")
 async def add_movie(title: str):
     """
     Add a new movie to the database based on the provided title.
 
+    OMDb is not queried when a movie whose title only differs by typos is stored
+    already (see `near_title`).
+
     Parameters:
     - `title` (str): The title of the movie to add.
 
@@ -89,7 +452,22 @@ async def add_movie(title: str):
 
     """
     try:
-        result = await app.state.mdf.fetch_and_save_movies_data(title, limit=1)
+        async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+            repo = AsyncMoviesRepository(
+                unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+            )
+            # Until the title index is built, typos are not checked
+            match = None if title_index_loading() else await repo.near_title(title)
+        if match is not None:
+            return Response(
+                content=json.dumps(
+                    {"detail": f"{match[0]} already exists in the database"}
+                ),
+                status_code=status.HTTP_200_OK,
+                media_type="application/json",
+            )
+        # Concurrent requests for the same title share one OMDb fetch
+        result = await fetch_flights.do(title, lambda: fetch_and_save_movie(title))
         if result is None:
             return Response(
                 content=json.dumps({"detail": f"No match found for {title}"}),
@@ -153,10 +531,54 @@ async def delete_movie(imdb_id: str, api_key: str = Depends(APIKeyAuth)):
     if not is_api_key_valid(api_key):
         raise HTTPException(status_code=401, detail="Invalid API key")
 
-    with UnitOfWork(app.state.database_url) as unit_of_work:
-        repo = MoviesRepository(unit_of_work.session)
-        result = repo.delete_by_id(imdb_id)
+    async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+        repo = AsyncMoviesRepository(
+            unit_of_work.session, unit_of_work.movie_count, unit_of_work.title_index
+        )
+        movie = await repo.get_by_id(imdb_id)
+        result = await repo.delete_by_id(imdb_id)
         if result:
+            await movies_cache.invalidate([movie["Title"]] if movie else [])
             return {"detail": f"Movie with ID {imdb_id} was deleted successfully"}
         logging.warning("Movie not found in the database")
         raise HTTPException(status_code=404, detail="Movie not found in the database")
+
+
+@app.get("/health/live")
+async def liveness():
+    """
+    Check that the service is running.
+
+    Returns:
+    - dict: The status of the service, without checking its dependencies.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Check that the service can serve requests.
+
+    The service is ready once its database answers, without waiting for the initial
+    catalog seed or the title index, whose progress is reported. Until the title index
+    is built, `/movies/suggest` answers 503 and titles are not checked for typos.
+
+    Returns:
+    - dict: The status of the service, the progress of the seed and the state of the
+      title index ("loading" or "ready").
+
+    Raises:
+    - HTTPException: If the database is unreachable (503).
+    """
+    try:
+        async with AsyncUnitOfWork(app.state.database_url) as unit_of_work:
+            await unit_of_work.session.execute(text("SELECT 1"))
+    except Exception as e:
+        logging.warning(f"Readiness check failed: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {
+        "status": "ready",
+        "seed": app.state.seed.to_dict(),
+        "title_index": "loading" if title_index_loading() else "ready",
+    }
@@ -1,5 +1,7 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import logging
 import logging.config
 from sqlalchemy import false
@@ -7,10 +9,36 @@ import yaml
 
 from common import utils
 from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_layer.engine_registry import engine_registry
 from data_layer.unit_of_work import UnitOfWork
 from data_layer.movies_repository import MoviesRepository
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.inmemory import InMemoryBackend
+from movies_service.seeding import SeedStatus, seed_database
+
+
+def load_title_index(database_url):
+    """
+    Build the title index of a database, if it is not built yet.
+
+    It reads every title of the movies table, so it runs in a worker thread after
+    startup (see `lifespan`) instead of delaying it.
+
+    Parameters:
+    - `database_url` (str): The database connection string.
+    """
+    try:
+        with UnitOfWork(database_url) as unit_of_work:
+            repo = MoviesRepository(
+                unit_of_work.session,
+                unit_of_work.movie_count,
+                unit_of_work.title_index,
+            )
+            repo.load_title_index()
+        logging.info("Title index loaded")
+    except Exception as e:
+        # The repositories build it on first use instead
+        logging.error(f"Loading the title index failed: {e}")
 
 
 @asynccontextmanager
@@ -46,20 +74,44 @@ async def lifespan(app: FastAPI):
 
         app.state.database_url = utils.get_database_url_from_alembic_config()
 
+        # Shared engines and connection pools, reused by every request
+        engine_registry.configure(**utils.get_engine_options_from_alembic_config())
+        engine_registry.get_engine(app.state.database_url)
+        engine_registry.get_async_engine(app.state.database_url)
+
         FastAPICache.init(
-            backend=InMemoryBackend(), prefix="fastapi-cache", enable=True
+            backend=InMemoryBackend(),
+            prefix="fastapi-cache",
+            enable=True,
         )
 
         # Database initilization
         with UnitOfWork(app.state.database_url) as unit_of_work:
-            repo = MoviesRepository(unit_of_work.session)
+            repo = MoviesRepository(
+                unit_of_work.session,
+                unit_of_work.movie_count,
+                unit_of_work.title_index,
+            )
             app.state.mdf = MovieDataFetcher()
+            # Shared HTTP session, reused by every fetch
+            await app.state.mdf.open()
+            # Prefix index of /movies/suggest, then kept up to date by the writes. It is
+            # built in the background, so requests are served right away
+            app.state.title_index_task = asyncio.create_task(
+                asyncio.to_thread(load_title_index, app.state.database_url)
+            )
             if repo.is_database_empty():
-                result = await app.state.mdf.fetch_and_save_movies_data("Disney")
-                if result:
-                    logging.info(
-                        f"Added {len (result)} movies to database during startup"
+                # Seeded in the background, so requests are served right away
+                app.state.seed = SeedStatus()
+                app.state.seed_task = asyncio.create_task(
+                    seed_database(
+                        app.state.mdf,
+                        app.state.seed,
+                        snapshot=utils.get_snapshot_path_from_alembic_config(),
                     )
+                )
+            else:
+                app.state.seed = SeedStatus("done")
 
     except Exception as e:
         logging.error(f"An unexpected error occurred during startup: {e}")
@@ -67,9 +119,25 @@ async def lifespan(app: FastAPI):
     finally:
         yield
         # Shutdown (Close connections to db, ...)
-
-
-app = FastAPI(title="Movies API", version="1.0.0", lifespan=lifespan)
+        if hasattr(app.state, "title_index_task"):
+            app.state.title_index_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await app.state.title_index_task
+        if hasattr(app.state, "seed_task"):
+            app.state.seed_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await app.state.seed_task
+        if hasattr(app.state, "mdf"):
+            await app.state.mdf.close()
+        await engine_registry.dispose_async()
+
+
+app = FastAPI(
+    title="Movies API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 with open("movies_service/oas.yaml", "r") as file:
     oas_doc = yaml.safe_load(file)
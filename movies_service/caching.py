@@ -0,0 +1,144 @@
+import orjson
+from fastapi_cache import FastAPICache
+from starlette.responses import Response
+
+from data_layer.models import normalize_title
+
+# Headers recomputed when a cached response is sent again
+SKIPPED_HEADERS = {"content-length", "content-type"}
+
+
+class MoviesCache:
+    """
+    Response cache of the movie read endpoints, invalidated when movies change.
+
+    Entries live in the FastAPICache backend. Instead of expiring them after a short
+    TTL, writes evict them: the entries of the added or deleted titles are cleared and
+    the generation of the movie lists is bumped, so reads can be cached for a long time
+    without serving deleted or outdated movies. A response computed while a write was
+    in progress belongs to an older generation and is not stored.
+
+    Attributes:
+    - `expire` (int): The number of seconds an entry is kept.
+    - `generation` (int): The version of the cached data, bumped by every invalidation.
+
+    Methods:
+    - `movie_key(title, fields)`: Get the key of a /movie/{title} response.
+    - `list_key(*params)`: Get the key of a /movies response for the current generation.
+    - `get(key)`: Get a cached response.
+    - `set(key, response, generation)`: Store a response.
+    - `invalidate(titles)`: Evict the responses affected by a change of the given titles.
+    """
+
+    def __init__(self, expire=3600):
+        """
+        Initialize the MoviesCache.
+
+        Parameters:
+        - `expire` (int): The number of seconds an entry is kept. Defaults to 1 hour.
+        """
+        self.expire = expire
+        self.generation = 0
+
+    @staticmethod
+    def movie_namespace(title):
+        """
+        Get the namespace holding the /movie/{title} responses of a title.
+
+        Titles are looked up ignoring case and accents, so the namespace is the one of
+        the normalized title, and a change of a movie evicts every spelling of it.
+
+        Parameters:
+        - `title` (str): The title of the movie.
+
+        Returns:
+        - str: The key prefix of the responses of the title.
+        """
+        return f"{FastAPICache.get_prefix()}:movie:{normalize_title(title)}:"
+
+    def movie_key(self, title, fields=None):
+        """
+        Get the key of a /movie/{title} response.
+
+        Parameters:
+        - `title` (str): The title requested.
+        - `fields` (str, optional): The fields requested.
+
+        Returns:
+        - str: The cache key.
+        """
+        # Exact titles win ties, so each spelling has its own key
+        return f"{self.movie_namespace(title)}{fields or ''}:{title}"
+
+    def list_key(self, *params):
+        """
+        Get the key of a /movies (or /search) response for the current generation.
+
+        Parameters:
+        - `params`: The query parameters of the request.
+
+        Returns:
+        - str: The cache key.
+        """
+        return f"{FastAPICache.get_prefix()}:movies:{self.generation}:{params}"
+
+    async def get(self, key):
+        """
+        Get a cached response.
+
+        Parameters:
+        - `key` (str): The cache key.
+
+        Returns:
+        - Response or None: The cached response, or None on a miss or if caching is disabled.
+        """
+        if not FastAPICache.get_enable():
+            return None
+        value = await FastAPICache.get_backend().get(key)
+        if value is None:
+            return None
+        headers, body = value.split(b"\n", 1)
+        return Response(
+            content=body, headers=orjson.loads(headers), media_type="application/json"
+        )
+
+    async def set(self, key, response, generation):
+        """
+        Store a response, unless the cache was invalidated since it was computed.
+
+        Parameters:
+        - `key` (str): The cache key.
+        - `response` (Response): The JSON response to store.
+        - `generation` (int): The generation read before computing the response.
+        """
+        if not FastAPICache.get_enable() or generation != self.generation:
+            return
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name not in SKIPPED_HEADERS
+        }
+        # Serialized headers never contain a raw newline
+        value = orjson.dumps(headers) + b"\n" + response.body
+        await FastAPICache.get_backend().set(key, value, self.expire)
+
+    async def invalidate(self, titles=()):
+        """
+        Evict the responses affected by a change of the given titles.
+
+        Every movie list is evicted, since adding or deleting a movie changes the pages
+        and the total count.
+
+        Parameters:
+        - `titles` (iterable): The titles of the movies added, updated or deleted.
+        """
+        self.generation += 1
+        if not FastAPICache.get_enable():
+            return
+        backend = FastAPICache.get_backend()
+        for title in titles:
+            await backend.clear(namespace=self.movie_namespace(title))
+        await backend.clear(namespace=f"{FastAPICache.get_prefix()}:movies:")
+
+
+movies_cache = MoviesCache()
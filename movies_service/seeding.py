@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import time
+
+from data_layer.snapshot import import_snapshot
+from movies_service.caching import movies_cache
+
+
+class SeedStatus:
+    """
+    Progress of the initial catalog seed, run in the background on startup.
+
+    Attributes:
+    - `state` (str): "pending", "seeding", "done" or "failed".
+    - `saved` (int): The number of movies saved so far.
+    - `error` (str or None): The error that stopped the seed, if it failed.
+    - `started_at` (float or None): The time the seed started at (epoch seconds).
+    - `finished_at` (float or None): The time the seed finished at (epoch seconds).
+
+    Methods:
+    - `start()`: Mark the seed as running.
+    - `progress(saved)`: Record the number of movies saved so far.
+    - `finish()`: Mark the seed as done.
+    - `fail(error)`: Mark the seed as failed.
+    - `to_dict()`: Get the status as a dictionary.
+    """
+
+    def __init__(self, state="pending"):
+        """
+        Initialize the SeedStatus.
+
+        Parameters:
+        - `state` (str): The initial state. Defaults to "pending".
+        """
+        self.state = state
+        self.saved = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        """
+        Mark the seed as running.
+        """
+        self.state = "seeding"
+        self.started_at = time.time()
+
+    def progress(self, saved):
+        """
+        Record the number of movies saved so far.
+
+        Parameters:
+        - `saved` (int): The number of movies saved.
+        """
+        self.saved = saved
+
+    def finish(self):
+        """
+        Mark the seed as done.
+        """
+        self.state = "done"
+        self.finished_at = time.time()
+
+    def fail(self, error):
+        """
+        Mark the seed as failed.
+
+        Parameters:
+        - `error` (Exception): The error that stopped the seed.
+        """
+        self.state = "failed"
+        self.error = str(error)
+        self.finished_at = time.time()
+
+    def to_dict(self):
+        """
+        Get the status as a dictionary.
+
+        Returns:
+        - dict: The state, the number of movies saved, the error and the timestamps.
+        """
+        return {
+            "state": self.state,
+            "saved": self.saved,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+async def seed_database(fetcher, status, title="Disney", snapshot=None):
+    """
+    Fill an empty database, recording the progress in `status`.
+
+    The movies are loaded from the snapshot file when it exists, without using the
+    network. Otherwise they are fetched from the OMDB API. Errors are logged and
+    recorded instead of raised: the service keeps serving (without movies) when the
+    OMDB API is unreachable. The cached responses are invalidated for the movies saved,
+    even if the seed fails or is cancelled after saving some of them.
+
+    Parameters:
+    - `fetcher` (MovieDataFetcher): The fetcher of the movies.
+    - `status` (SeedStatus): The progress of the seed.
+    - `title` (str): The title searched. Defaults to "Disney".
+    - `snapshot` (str, optional): The path of a snapshot file (see `data_layer.snapshot`).
+    """
+    status.start()
+    # Titles of the movies committed so far (see `MovieDataFetcher.ingest`)
+    saved = []
+    try:
+        if snapshot and os.path.exists(snapshot):
+            # Loaded in a thread, so requests are served meanwhile
+            loaded = await asyncio.to_thread(
+                import_snapshot,
+                fetcher.database_url,
+                snapshot,
+                progress=status.progress,
+            )
+            logging.info(f"Loaded {loaded} movies from {snapshot} during startup")
+        else:
+            await fetcher.fetch_and_save_movies_data(
+                title, progress=status.progress, saved=saved
+            )
+            status.progress(len(saved))
+            logging.info(f"Added {len(saved)} movies to database during startup")
+        status.finish()
+    except Exception as e:
+        logging.error(f"The initial catalog seed failed: {e}")
+        status.fail(e)
+    finally:
+        # Snapshot imports do not report their titles: evicting the movie lists is
+        # enough, as titles missing from the database are not cached
+        await movies_cache.invalidate(saved)
@@ -0,0 +1,62 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into a single in-flight call.
+
+    The first caller of a key runs the call in a task; callers arriving while it runs
+    await the same task and get its result (or its exception) instead of repeating the
+    work. Once the task is done the key is forgotten, so later callers run it again.
+
+    Attributes:
+    - `calls` (dict): The in-flight tasks keyed by call key.
+
+    Methods:
+    - `do(key, function)`: Run `function` or join the in-flight call of `key`.
+    """
+
+    def __init__(self):
+        """
+        Initialize a SingleFlight without in-flight calls.
+        """
+        self.calls = {}
+
+    async def do(self, key, function):
+        """
+        Run `function` or join the in-flight call of `key`.
+
+        Parameters:
+        - `key` (hashable): The identity of the call.
+        - `function` (callable): A coroutine function without arguments doing the work.
+
+        Returns:
+        - The result of the shared call.
+
+        Raises:
+        - Exception: Any exception raised by the shared call.
+        """
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.forget(key, task))
+        # A cancelled caller must not cancel the call shared with the others
+        return await asyncio.shield(task)
+
+    def forget(self, key, task):
+        """
+        Forget the finished call of `key`, unless it was replaced already.
+
+        Parameters:
+        - `key` (hashable): The identity of the call.
+        - `task` (asyncio.Task): The finished task.
+        """
+        if self.calls.get(key) is task:
+            del self.calls[key]
+
+
+# Database reads of the GET endpoints
+read_flights = SingleFlight()
+# OMDb fetches of the POST endpoint
+fetch_flights = SingleFlight()
@@ -1,3 +1,6 @@
+import asyncio
+import httpx
+import json
 import pytest
 from fastapi.testclient import TestClient
 from movies_service.app import app
@@ -18,6 +21,17 @@ def test_app():
     return TestClient(app)
 
 
+@pytest.fixture
+def no_near_title():
+    """Mock the repository of POST /movie/{title}, finding no title close to it."""
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.near_title.return_value = None
+        yield mock_repo_instance
+
+
 def test_get_all_movies(test_app):
     movies_data = [
         {"Title": "Movie 1", "Year": "2000"},
@@ -30,16 +44,17 @@ def test_get_all_movies(test_app):
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = False
         mock_repo_instance.get_all.return_value = movies_data
+        mock_repo_instance.count.return_value = 3
 
         # Make the request to the endpoint
         response = test_app.get("/movies")
@@ -50,6 +65,217 @@ def test_get_all_movies(test_app):
         # Assert that the response body contains the expected movies data
         assert response.json() == movies_data
 
+        # Assert that the total number of movies is returned in a header
+        assert response.headers["X-Total-Count"] == "3"
+
+
+def test_get_all_movies_next_cursor(test_app):
+    movies_data = [
+        {"Title": "Movie 1", "Year": "2000", "imdbID": "tt0000001"},
+        {"Title": "Movie 2", "Year": "2001", "imdbID": "tt0000002"},
+    ]
+
+    # Mocking the app.state.database_url
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+
+    # Mocking the UnitOfWork class
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.is_database_empty.return_value = False
+        mock_repo_instance.get_all.return_value = movies_data
+        mock_repo_instance.count.return_value = 7
+
+        # A full page returns the cursor of the next page
+        response = test_app.get("/movies", params={"limit": 2, "page": 3})
+
+        assert response.status_code == 200
+        mock_repo_instance.get_all.assert_awaited_with(4, 2, None, None)
+        cursor = response.headers["X-Next-Cursor"]
+        assert api.decode_cursor(cursor) == ("Movie 2", "tt0000002")
+
+        # The cursor seeks after the last movie and ignores the page
+        response = test_app.get("/movies", params={"limit": 5, "cursor": cursor})
+
+        assert response.status_code == 200
+        mock_repo_instance.get_all.assert_awaited_with(
+            0, 5, ("Movie 2", "tt0000002"), None
+        )
+        assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_all_movies_invalid_cursor(test_app):
+    # Make the request to the endpoint
+    response = test_app.get("/movies", params={"cursor": "not a cursor"})
+
+    # Assert that the request is rejected
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_search_movies_next_cursor(test_app):
+    results = [
+        ({"Title": "Movie 1", "imdbID": "tt0000001"}, (-2.5, 1)),
+        ({"Title": "Movie 2", "imdbID": "tt0000002"}, (-1.5, 2)),
+    ]
+
+    # Mocking the app.state.database_url
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "sqlite:///mocked_database.db"
+
+    # Mocking the UnitOfWork class
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.search.return_value = results
+
+        # A full page returns the cursor of the next page
+        response = test_app.get("/search", params={"q": "movie", "limit": 2})
+
+        assert response.status_code == 200
+        assert response.json() == [movie for movie, _ in results]
+        mock_repo_instance.search.assert_awaited_with("movie", 2, None, None)
+        cursor = response.headers["X-Next-Cursor"]
+        assert api.decode_search_cursor(cursor, "sqlite") == (-1.5, 2)
+
+        # The cursor seeks after the last result
+        mock_repo_instance.search.return_value = []
+        response = test_app.get("/search", params={"q": "movie", "cursor": cursor})
+
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_repo_instance.search.assert_awaited_with("movie", 10, (-1.5, 2), None)
+        assert "X-Next-Cursor" not in response.headers
+
+
+def test_search_movies_invalid_request(test_app):
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "sqlite:///mocked_database.db"
+
+    # A cursor of /movies is not a search cursor
+    cursor = api.encode_cursor({"Title": "Movie 2", "imdbID": "tt0000002"})
+    response = test_app.get("/search", params={"q": "movie", "cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+    # The key must be of the type of the database (the movie ID on SQLite)
+    for key in ([1], "tt0000002", True, None, 1.5):
+        cursor = api.encode_search_cursor((1.0, key))
+        response = test_app.get("/search", params={"q": "movie", "cursor": cursor})
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Invalid cursor"}
+
+    # On PostgreSQL, the key is the IMDb ID
+    test_app.app.state.database_url = "postgresql://user@localhost/movies"
+    cursor = api.encode_search_cursor((1.0, 2))
+    response = test_app.get("/search", params={"q": "movie", "cursor": cursor})
+
+    assert response.status_code == 400
+    assert api.decode_search_cursor(
+        api.encode_search_cursor((1.0, "tt0000002")), "postgresql"
+    ) == (1.0, "tt0000002")
+
+    # The query is required
+    assert test_app.get("/search").status_code == 422
+    assert test_app.get("/search", params={"q": ""}).status_code == 422
+
+
+def test_suggest_movies(test_app):
+    # Mocking the app.state.database_url
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+
+    # Mocking the UnitOfWork class
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.suggest_titles.return_value = [
+            ("Star Wars: Episode IV", "tt0076759"),
+            ("Star Wars: Episode V", "tt0080684"),
+        ]
+
+        response = test_app.get("/movies/suggest", params={"prefix": "star w"})
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"Title": "Star Wars: Episode IV", "imdbID": "tt0076759"},
+            {"Title": "Star Wars: Episode V", "imdbID": "tt0080684"},
+        ]
+        mock_repo_instance.suggest_titles.assert_awaited_with("star w", 10)
+
+    # The prefix is required
+    assert test_app.get("/movies/suggest").status_code == 422
+
+
+def test_suggest_movies_while_title_index_loads(test_app):
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+    test_app.app.state.title_index_task.done.return_value = False
+
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+
+        response = test_app.get("/movies/suggest", params={"prefix": "star w"})
+
+        # The index is not built again on the event loop
+        assert response.status_code == 503
+        assert response.json() == {"detail": "Title index is loading"}
+        assert response.headers["Retry-After"] == "1"
+        mock_repo_instance.suggest_titles.assert_not_awaited()
+
+
+def test_get_all_movies_fields(test_app):
+    movies_data = [
+        {"Title": "Movie 1", "Year": "2000", "imdbID": "tt0000001"},
+        {"Title": "Movie 2", "Year": "2001", "imdbID": "tt0000002"},
+    ]
+
+    # Mocking the app.state.database_url
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+
+    # Mocking the UnitOfWork class
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.is_database_empty.return_value = False
+        mock_repo_instance.get_all.return_value = movies_data
+        mock_repo_instance.count.return_value = 2
+
+        response = test_app.get("/movies", params={"limit": 2, "fields": "Year"})
+
+        # The cursor fields are queried but only the requested ones are returned
+        assert response.status_code == 200
+        assert response.json() == [{"Year": "2000"}, {"Year": "2001"}]
+        query_fields = mock_repo_instance.get_all.await_args.args[3]
+        assert sorted(query_fields) == ["Title", "Year", "imdbID"]
+        assert api.decode_cursor(response.headers["X-Next-Cursor"]) == (
+            "Movie 2",
+            "tt0000002",
+        )
+
+
+def test_get_movie_unknown_field(test_app):
+    # Make the request to the endpoint
+    response = test_app.get("/movie/title_to_search", params={"fields": "Title,Foo"})
+
+    # Assert that the request is rejected
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: Foo"}
+
 
 def test_get_all_movies_empty_database(test_app):
     # Mocking the app.state.database_url
@@ -57,12 +283,12 @@ def test_get_all_movies_empty_database(test_app):
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = True
@@ -85,15 +311,18 @@ def test_get_movie_by_exact_title(test_app):
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = False
+        mock_repo_instance.get_json_by_title.return_value = json.dumps(
+            movie_data
+        ).encode()
         mock_repo_instance.get_by_title.return_value = movie_data
 
         # Make the request to the endpoint
@@ -105,6 +334,64 @@ def test_get_movie_by_exact_title(test_app):
         # Assert that the response body contains the expected movies data
         assert response.json() == movie_data
 
+        # Only the requested fields are queried
+        response = test_app.get("/movie/title_to_search", params={"fields": "Title"})
+
+        mock_repo_instance.get_by_title.assert_awaited_with(
+            "title_to_search", ["Title"]
+        )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_get_movie_share_one_query():
+    app.state = MagicMock()
+    app.state.database_url = "mocked_database_url"
+
+    async def get_json_by_title(title):
+        await asyncio.sleep(0.01)
+        return b'{"Title": "Movie 1"}'
+
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository:
+
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.is_database_empty.return_value = False
+        mock_repo_instance.get_json_by_title.side_effect = get_json_by_title
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.get("/movie/Movie 1") for _ in range(5))
+            )
+
+        assert all(response.json() == {"Title": "Movie 1"} for response in responses)
+        mock_repo_instance.get_json_by_title.assert_awaited_once_with("Movie 1")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_post_movie_share_one_fetch(no_near_title):
+    async def fetch_and_save_movies_data(title, limit, saved):
+        await asyncio.sleep(0.01)
+        return [None]
+
+    app.state = MagicMock()
+    app.state.mdf = AsyncMock()
+    app.state.mdf.fetch_and_save_movies_data.side_effect = fetch_and_save_movies_data
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(client.post("/movie/Movie 1") for _ in range(5))
+        )
+
+    assert all(response.status_code == 200 for response in responses)
+    app.state.mdf.fetch_and_save_movies_data.assert_awaited_once_with(
+        "Movie 1", limit=1, saved=[]
+    )
+
 
 def test_get_movie_by_mismatching_title(test_app):
     # Mocking the app.state.database_url
@@ -112,16 +399,19 @@ def test_get_movie_by_mismatching_title(test_app):
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = False
-        mock_repo_instance.get_by_title.return_value = dict()
+        mock_repo_instance.get_json_by_title.return_value = None
+        mock_repo_instance.similar_titles.return_value = [
+            ("Title to Search", "tt0000001", 0.8)
+        ]
 
         # Make the request to the endpoint
         response = test_app.get("/movie/title_to_search")
@@ -129,10 +419,12 @@ def test_get_movie_by_mismatching_title(test_app):
         # Assert that the response is successful
         assert response.status_code == 404
 
-        # Assert that the response body contains the expected movies data
+        # The closest titles are suggested
         assert response.json() == {
-            "detail": 'No exact match for "title_to_search" in the database.'
+            "detail": 'No exact match for "title_to_search" in the database.',
+            "suggestions": [{"Title": "Title to Search", "imdbID": "tt0000001"}],
         }
+        mock_repo_instance.similar_titles.assert_awaited_once_with("title_to_search")
 
 
 def test_get_movie_in_empty_database(test_app):
@@ -141,12 +433,12 @@ def test_get_movie_in_empty_database(test_app):
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = True
@@ -162,7 +454,7 @@ def test_get_movie_in_empty_database(test_app):
         assert response.json() == {"detail": "Movie not found in the database"}
 
 
-def test_post_movie_by_title(test_app):
+def test_post_movie_by_title(test_app, no_near_title):
     title_to_search = "sample_title"
     return_value = [title_to_search]
     expected_response = {"detail": f"Saved {return_value}"}
@@ -181,7 +473,49 @@ def test_post_movie_by_title(test_app):
     assert response.json() == expected_response
 
 
-def test_post_movie_by_title_already_exists(test_app):
+def test_post_movie_by_title_invalidates_cache(test_app, no_near_title):
+    async def fetch_and_save_movies_data(title, limit, saved):
+        saved.append("Movie 1")
+        return ["Movie 1", None]
+
+    test_app.app.state.mdf = AsyncMock()
+    test_app.app.state.mdf.fetch_and_save_movies_data.side_effect = (
+        fetch_and_save_movies_data
+    )
+
+    with patch("movies_service.api.api.movies_cache") as mock_cache:
+        mock_cache.invalidate = AsyncMock()
+
+        response = test_app.post("/movie/Movie 1")
+
+        assert response.status_code == 201
+
+        # The saved titles are evicted, along with the movie lists
+        mock_cache.invalidate.assert_awaited_once_with(["Movie 1"])
+
+
+def test_post_movie_by_title_invalidates_cache_on_failure(test_app, no_near_title):
+    async def fetch_and_save_movies_data(title, limit, saved):
+        saved.append("Movie 1")
+        raise Exception("Database is locked")
+
+    test_app.app.state.mdf = AsyncMock()
+    test_app.app.state.mdf.fetch_and_save_movies_data.side_effect = (
+        fetch_and_save_movies_data
+    )
+
+    with patch("movies_service.api.api.movies_cache") as mock_cache:
+        mock_cache.invalidate = AsyncMock()
+
+        response = test_app.post("/movie/Movie 1")
+
+        assert response.status_code == 500
+
+        # The movie committed before the failure is evicted all the same
+        mock_cache.invalidate.assert_awaited_once_with(["Movie 1"])
+
+
+def test_post_movie_by_title_already_exists(test_app, no_near_title):
     title_to_search = "sample_title"
     return_value = [None]
     expected_response = {"detail": f"{title_to_search} already exists in the database"}
@@ -200,7 +534,20 @@ def test_post_movie_by_title_already_exists(test_app):
     assert response.json() == expected_response
 
 
-def test_post_movie_by_title_no_match(test_app):
+def test_post_movie_by_title_near_match(test_app, no_near_title):
+    no_near_title.near_title.return_value = ("Interstellar", "tt0816692")
+    test_app.app.state.mdf = AsyncMock()
+
+    response = test_app.post("/movie/Interstelar")
+
+    # The stored movie is kept, without querying OMDb
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Interstellar already exists in the database"}
+    no_near_title.near_title.assert_awaited_once_with("Interstelar")
+    test_app.app.state.mdf.fetch_and_save_movies_data.assert_not_awaited()
+
+
+def test_post_movie_by_title_no_match(test_app, no_near_title):
     title_to_search = "sample_title"
     return_value = None
     expected_response = {"detail": f"No match found for {title_to_search}"}
@@ -226,12 +573,12 @@ def test_delete_movie_by_imdb_id_with_valid_api_key(mock_api_verification, test_
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = False
@@ -249,6 +596,31 @@ def test_delete_movie_by_imdb_id_with_valid_api_key(mock_api_verification, test_
         }
 
 
+@patch("movies_service.api.api.is_api_key_valid", return_value=True)
+def test_delete_movie_invalidates_cache(mock_api_verification, test_app):
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
+    ) as MockMoviesRepository, patch(
+        "movies_service.api.api.movies_cache"
+    ) as mock_cache:
+
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
+        mock_repo_instance.get_by_id.return_value = {
+            "Title": "Movie 1",
+            "imdbID": "tt0000001",
+        }
+        mock_repo_instance.delete_by_id.return_value = True
+        mock_cache.invalidate = AsyncMock()
+
+        response = test_app.delete("/movie/tt0000001")
+
+        assert response.status_code == 200
+        mock_cache.invalidate.assert_awaited_once_with(["Movie 1"])
+
+
 @patch("movies_service.api.api.is_api_key_valid", return_value=True)
 def test_delete_movie_not_in_database_imdb_id_with_valid_api_key(
     mock_api_verification, test_app
@@ -258,12 +630,12 @@ def test_delete_movie_not_in_database_imdb_id_with_valid_api_key(
     test_app.app.state.database_url = "mocked_database_url"
 
     # Mocking the UnitOfWork class
-    with patch("movies_service.api.api.UnitOfWork"), patch(
-        "movies_service.api.api.MoviesRepository"
+    with patch("movies_service.api.api.AsyncUnitOfWork"), patch(
+        "movies_service.api.api.AsyncMoviesRepository"
     ) as MockMoviesRepository:
 
         # mock_unit_of_work_instance = MockUnitOfWork.return_value
-        mock_repo_instance = MockMoviesRepository.return_value
+        mock_repo_instance = MockMoviesRepository.return_value = AsyncMock()
 
         # Set up the return value of is_database_empty and get_all methods
         mock_repo_instance.is_database_empty.return_value = False
@@ -303,7 +675,7 @@ def test_is_api_key_invalid():
     assert response == False
 
 
-def test_post_movie_by_title_no_valid_api_key(test_app):
+def test_post_movie_by_title_no_valid_api_key(test_app, no_near_title):
     title_to_search = "sample_title"
     exception_message = "Non valid API_KEY"
     expected_response = {"detail": f"An error occurred: {exception_message}"}
@@ -322,3 +694,48 @@ def test_post_movie_by_title_no_valid_api_key(test_app):
 
     # Assert that the response body contains the expected movies data
     assert response.json() == expected_response
+
+
+def test_liveness(test_app):
+    response = test_app.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness_reports_seed_progress(test_app):
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+    test_app.app.state.seed.to_dict.return_value = {"state": "seeding", "saved": 50}
+    # The title index is still being built
+    test_app.app.state.title_index_task.done.return_value = False
+
+    with patch("movies_service.api.api.AsyncUnitOfWork") as MockUnitOfWork:
+        MockUnitOfWork.return_value.__aenter__.return_value.session = AsyncMock()
+
+        response = test_app.get("/health/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "ready",
+            "seed": {"state": "seeding", "saved": 50},
+            "title_index": "loading",
+        }
+
+        test_app.app.state.title_index_task.done.return_value = True
+        response = test_app.get("/health/ready")
+
+        assert response.json()["title_index"] == "ready"
+
+
+def test_readiness_database_unavailable(test_app):
+    test_app.app.state = MagicMock()
+    test_app.app.state.database_url = "mocked_database_url"
+
+    with patch("movies_service.api.api.AsyncUnitOfWork") as MockUnitOfWork:
+        session = MockUnitOfWork.return_value.__aenter__.return_value.session
+        session.execute = AsyncMock(side_effect=Exception("unable to open database"))
+
+        response = test_app.get("/health/ready")
+
+    assert response.status_code == 503
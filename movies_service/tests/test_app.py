@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from venv import create
 import pytest
@@ -22,7 +23,12 @@ async def test_lifespan():
         mock_get_database_url.return_value = "mocked_database_url"
         with patch("movies_service.app.UnitOfWork"), patch(
             "movies_service.app.MoviesRepository"
-        ), patch("movies_service.app.MovieDataFetcher") as mock_data_fetcher:
+        ) as mock_repository, patch(
+            "movies_service.app.MovieDataFetcher"
+        ) as mock_data_fetcher, patch(
+            "movies_service.app.engine_registry"
+        ) as mock_engine_registry:
+            mock_engine_registry.dispose_async = AsyncMock()
 
             mock_fetch_and_save_movies_data = AsyncMock()
             mock_fetch_and_save_movies_data.return_value = [
@@ -35,13 +41,34 @@ async def test_lifespan():
             mock_data_fetcher.return_value.fetch_and_save_movies_data = (
                 mock_fetch_and_save_movies_data
             )
+            mock_data_fetcher.return_value.open = AsyncMock()
+            mock_data_fetcher.return_value.close = AsyncMock()
 
             # Execute the lifespan context manager
             async with lifespan(app):
-                pass  # You can add test code here if necessary
+                # The seed and the title index load run in the background
+                await app.state.seed_task
+                await app.state.title_index_task
 
             mock_get_database_url.assert_called_once()
-            app.state.mdf.fetch_and_save_movies_data.assert_called_with("Disney")
+            app.state.mdf.fetch_and_save_movies_data.assert_called_once()
+            fetch_and_save_movies_data = app.state.mdf.fetch_and_save_movies_data
+            assert fetch_and_save_movies_data.call_args.args == ("Disney",)
+            assert app.state.seed.state == "done"
+            mock_repository.return_value.load_title_index.assert_called_once()
+
+            # The shared engines are created on startup and disposed on shutdown
+            mock_engine_registry.get_engine.assert_called_once_with(
+                "mocked_database_url"
+            )
+            mock_engine_registry.get_async_engine.assert_called_once_with(
+                "mocked_database_url"
+            )
+            mock_engine_registry.dispose_async.assert_awaited_once()
+
+            # The fetcher HTTP session is opened on startup and closed on shutdown
+            app.state.mdf.open.assert_awaited_once()
+            app.state.mdf.close.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -65,3 +92,39 @@ async def test_lifespan_raise_exception():
 
         # Assert that the mocked function was called once
         mock_get_database_url.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_does_not_wait_for_seed():
+    app = MagicMock(FastAPI, create=True)
+    app.state = MagicMock()
+    fetch_started = asyncio.Event()
+
+    async def fetch_and_save_movies_data(title, progress=None, saved=None):
+        fetch_started.set()
+        # OMDb does not answer
+        await asyncio.sleep(60)
+
+    with patch(
+        "movies_service.app.utils.get_database_url_from_alembic_config",
+        return_value="mocked_database_url",
+    ), patch("movies_service.app.UnitOfWork"), patch(
+        "movies_service.app.MoviesRepository"
+    ), patch(
+        "movies_service.app.MovieDataFetcher"
+    ) as mock_data_fetcher, patch(
+        "movies_service.app.engine_registry"
+    ) as mock_engine_registry:
+        mock_engine_registry.dispose_async = AsyncMock()
+        mock_data_fetcher.return_value.fetch_and_save_movies_data = (
+            fetch_and_save_movies_data
+        )
+        mock_data_fetcher.return_value.open = AsyncMock()
+        mock_data_fetcher.return_value.close = AsyncMock()
+
+        async with lifespan(app):
+            await asyncio.wait_for(fetch_started.wait(), 1)
+            assert app.state.seed.state == "seeding"
+
+        # The seed is cancelled on shutdown
+        assert app.state.seed_task.cancelled()
@@ -0,0 +1,88 @@
+import orjson
+import pytest
+import pytest_asyncio
+from fastapi.responses import ORJSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from movies_service.caching import MoviesCache
+
+
+@pytest_asyncio.fixture
+async def movies_cache():
+    """Create a MoviesCache backed by an enabled in-memory FastAPICache."""
+    state = {
+        name: getattr(FastAPICache, name)
+        for name in ("_init", "_backend", "_prefix", "_enable")
+    }
+    FastAPICache.reset()
+    FastAPICache.init(backend=InMemoryBackend(), prefix="test-cache", enable=True)
+    yield MoviesCache()
+    # Other tests run with the cache disabled
+    await FastAPICache.get_backend().clear(namespace="test-cache")
+    FastAPICache.reset()
+    for name, value in state.items():
+        setattr(FastAPICache, name, value)
+
+
+@pytest.mark.asyncio
+async def test_set_and_get_keep_body_and_headers(movies_cache):
+    key = movies_cache.list_key(10, 1, None, None)
+    response = ORJSONResponse([{"Title": "Movie 1"}], headers={"X-Total-Count": "1"})
+
+    await movies_cache.set(key, response, movies_cache.generation)
+    cached = await movies_cache.get(key)
+
+    assert orjson.loads(cached.body) == [{"Title": "Movie 1"}]
+    assert cached.headers["X-Total-Count"] == "1"
+    assert cached.media_type == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_get_miss(movies_cache):
+    assert await movies_cache.get(movies_cache.movie_key("Movie 1")) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_evicts_title_and_lists(movies_cache):
+    movie_key = movies_cache.movie_key("Movie 1")
+    fields_key = movies_cache.movie_key("Movie 1", "Title,Year")
+    spelling_key = movies_cache.movie_key("MOVIE  1")
+    other_key = movies_cache.movie_key("Movie 2")
+    list_key = movies_cache.list_key(10, 1, None, None)
+    for key in (movie_key, fields_key, spelling_key, other_key, list_key):
+        await movies_cache.set(key, ORJSONResponse({}), movies_cache.generation)
+
+    await movies_cache.invalidate(["Movie 1"])
+
+    assert await movies_cache.get(movie_key) is None
+    assert await movies_cache.get(fields_key) is None
+    # Titles are looked up ignoring case, so every spelling is evicted
+    assert await movies_cache.get(spelling_key) is None
+    assert await movies_cache.get(list_key) is None
+    assert await movies_cache.get(other_key) is not None
+    # Lists of the new generation use new keys
+    assert movies_cache.list_key(10, 1, None, None) != list_key
+
+
+@pytest.mark.asyncio
+async def test_set_skips_responses_computed_before_an_invalidation(movies_cache):
+    key = movies_cache.movie_key("Movie 1")
+    generation = movies_cache.generation
+
+    await movies_cache.invalidate(["Movie 1"])
+    await movies_cache.set(key, ORJSONResponse({"Title": "Movie 1"}), generation)
+
+    assert await movies_cache.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_stores_nothing():
+    movies_cache = MoviesCache()
+    state = FastAPICache._enable
+    FastAPICache._enable = False
+    try:
+        key = movies_cache.movie_key("Movie 1")
+        await movies_cache.set(key, ORJSONResponse({}), movies_cache.generation)
+        assert await movies_cache.get(key) is None
+    finally:
+        FastAPICache._enable = state
@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from aiohttp.test_utils import TestServer
+from common.fetcher_benchmark import write_benchmark_config
+from data_fetcher.movie_data_fetcher import MovieDataFetcher
+from data_fetcher.omdb_stub import OmdbStub
+from data_layer.engine_registry import engine_registry
+from movies_service.seeding import SeedStatus, seed_database
+
+
+def test_seed_status():
+    status = SeedStatus()
+    assert status.to_dict()["state"] == "pending"
+
+    status.start()
+    status.progress(10)
+    assert status.state == "seeding"
+    assert status.saved == 10
+    assert status.started_at is not None
+
+    status.finish()
+    assert status.state == "done"
+    assert status.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_seed_database_records_progress():
+    fetcher = MagicMock()
+    status = SeedStatus()
+
+    async def fetch_and_save_movies_data(title, progress=None, saved=None):
+        saved.append("Movie 1")
+        progress(1)
+        saved.append("Movie 2")
+        progress(2)
+        return ["Movie 1", "Movie 2", None]
+
+    fetcher.fetch_and_save_movies_data = fetch_and_save_movies_data
+
+    with patch("movies_service.seeding.movies_cache") as mock_cache:
+        mock_cache.invalidate = AsyncMock()
+        await seed_database(fetcher, status)
+
+    assert status.state == "done"
+    assert status.saved == 2
+    mock_cache.invalidate.assert_awaited_once_with(["Movie 1", "Movie 2"])
+
+
+@pytest.mark.asyncio
+async def test_seed_database_records_failure():
+    fetcher = MagicMock()
+    fetcher.fetch_and_save_movies_data = AsyncMock(
+        side_effect=Exception("Cannot connect to host www.omdbapi.com")
+    )
+    status = SeedStatus()
+
+    with patch("movies_service.seeding.movies_cache") as mock_cache:
+        mock_cache.invalidate = AsyncMock()
+        await seed_database(fetcher, status)
+
+    assert status.state == "failed"
+    assert status.error == "Cannot connect to host www.omdbapi.com"
+    mock_cache.invalidate.assert_awaited_once_with([])
+
+
+@pytest.mark.asyncio
+async def test_seed_database_invalidates_movies_saved_before_failing():
+    fetcher = MagicMock()
+    status = SeedStatus()
+
+    async def fetch_and_save_movies_data(title, progress=None, saved=None):
+        saved.append("Movie 1")
+        progress(1)
+        raise Exception("Database is locked")
+
+    fetcher.fetch_and_save_movies_data = fetch_and_save_movies_data
+
+    with patch("movies_service.seeding.movies_cache") as mock_cache:
+        mock_cache.invalidate = AsyncMock()
+        await seed_database(fetcher, status)
+
+    assert status.state == "failed"
+    assert status.saved == 1
+    # The movie committed before the failure is not hidden by cached pages
+    mock_cache.invalidate.assert_awaited_once_with(["Movie 1"])
+
+
+@pytest.mark.asyncio
+async def test_seed_database_loads_snapshot(tmp_path):
+    snapshot = tmp_path / "movies_snapshot.jsonl.gz"
+    snapshot.touch()
+    fetcher = MagicMock()
+    fetcher.database_url = "sqlite:///test.db"
+    fetcher.fetch_and_save_movies_data = AsyncMock()
+    status = SeedStatus()
+
+    def import_snapshot(database, path, progress=None):
+        progress(3)
+        return 3
+
+    with patch(
+        "movies_service.seeding.import_snapshot", side_effect=import_snapshot
+    ) as mock_import, patch("movies_service.seeding.movies_cache") as mock_cache:
+        mock_cache.invalidate = AsyncMock()
+        await seed_database(fetcher, status, snapshot=str(snapshot))
+
+    # The OMDB API is not used
+    fetcher.fetch_and_save_movies_data.assert_not_awaited()
+    mock_import.assert_called_once()
+    assert mock_import.call_args.args == ("sqlite:///test.db", str(snapshot))
+    assert status.state == "done"
+    assert status.saved == 3
+    mock_cache.invalidate.assert_awaited_once_with([])
+
+
+class RecordingOmdbStub(OmdbStub):
+    """OMDB API stub recording the (title, page) of the search requests."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.searches = []
+
+    def answer(self, parameters):
+        if "s" in parameters:
+            self.searches.append((parameters["s"], int(parameters.get("page", 1))))
+        return super().answer(parameters)
+
+
+@pytest.mark.asyncio
+async def test_seed_database_alongside_post_requests(tmp_path):
+    stub = RecordingOmdbStub(movies=100, latency=0.01)
+    status = SeedStatus()
+
+    async with TestServer(stub.app()) as server:
+        fetcher = MovieDataFetcher(
+            *write_benchmark_config(str(tmp_path), str(server.make_url("/")), 1000, 10)
+        )
+        await fetcher.open()
+        try:
+            with patch("movies_service.seeding.movies_cache") as mock_cache:
+                mock_cache.invalidate = AsyncMock()
+                # A POST /movie/{title} searching while the seed fetches its pages
+                await asyncio.gather(
+                    seed_database(fetcher, status, title="Disney"),
+                    fetcher.fetch_and_save_movies_data("Zorro", limit=1),
+                )
+        finally:
+            await fetcher.close()
+            engine_registry.dispose(fetcher.database_url)
+
+    # Each search kept its own title
+    assert sorted(stub.searches) == [("Disney", page) for page in range(1, 11)] + [
+        ("Zorro", 1)
+    ]
+    assert fetcher.config["parameters_global_search"]["s"] == "disney"
+    assert status.state == "done"
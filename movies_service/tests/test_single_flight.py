@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from movies_service.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_call():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"Title": "Movie 1"}
+
+    results = await asyncio.gather(
+        *(single_flight.do("Movie 1", query) for _ in range(10))
+    )
+
+    assert calls == 1
+    assert results == [{"Title": "Movie 1"}] * 10
+    assert single_flight.calls == {}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def query(title):
+        calls.append(title)
+        await asyncio.sleep(0.01)
+        return title
+
+    results = await asyncio.gather(
+        single_flight.do("Movie 1", lambda: query("Movie 1")),
+        single_flight.do("Movie 2", lambda: query("Movie 2")),
+    )
+
+    assert results == ["Movie 1", "Movie 2"]
+    assert sorted(calls) == ["Movie 1", "Movie 2"]
+
+
+@pytest.mark.asyncio
+async def test_sequential_calls_run_again():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await single_flight.do("Movie 1", query) == 1
+    assert await single_flight.do("Movie 1", query) == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_is_raised_to_every_caller():
+    single_flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.01)
+        raise ValueError("Movie not found")
+
+    results = await asyncio.gather(
+        single_flight.do("Movie 1", query),
+        single_flight.do("Movie 1", query),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.calls == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    single_flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.01)
+        return "Movie 1"
+
+    first = asyncio.ensure_future(single_flight.do("Movie 1", query))
+    second = asyncio.ensure_future(single_flight.do("Movie 1", query))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "Movie 1"